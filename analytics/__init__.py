@@ -4,5 +4,6 @@ Handles data analysis, metrics, and reporting
 """
 
 from .engine import AnalyticsEngine
+from .rollups import RollupStore
 
-__all__ = ['AnalyticsEngine']
\ No newline at end of file
+__all__ = ['AnalyticsEngine', 'RollupStore']
\ No newline at end of file
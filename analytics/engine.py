@@ -1,59 +1,105 @@
-import streamlit as st
+import threading
+import time
+from datetime import datetime, timedelta
+import feedback
+from config import Config
 from database.connection import get_db_connection
 
+# include_archive -> (metrics, monotonic expiry)
+_metrics_cache = {}
+_metrics_lock = threading.Lock()
+
+
 class AnalyticsEngine:
     @staticmethod
-    def get_dashboard_metrics(conn):
-        """Get comprehensive dashboard metrics"""
-        cursor = conn.cursor()
+    def get_dashboard_metrics(conn, include_archive=False):
+        """Get comprehensive dashboard metrics
+
+        Served from a short-lived process cache (Config.DASHBOARD_CACHE_TTL
+        seconds) that TicketManager invalidates whenever tickets are created,
+        assigned or closed. On a miss, the counts, averages and urgency
+        split come from a single grouped scan of tickets, and the 30-day
+        trend from one indexed range query. Archived tickets are only
+        scanned when include_archive is set.
+        """
+        with _metrics_lock:
+            cached = _metrics_cache.get(include_archive)
+            if cached is not None and time.monotonic() < cached[1]:
+                return dict(cached[0])
         
+        source = 'tickets'
+        if include_archive:
+            source = '''(
+                SELECT status, urgency_level, created_at, resolved_at, sentiment_score FROM tickets
+                UNION ALL
+                SELECT status, urgency_level, created_at, resolved_at, sentiment_score FROM tickets_archive
+            ) AS all_tickets'''
+
+        cursor = conn.cursor()
+
         metrics = {}
-        
+
         try:
-            if st.session_state.get('debug', False):
-                st.info("🔧 Debug: Fetching dashboard metrics...")
-                
-            # Basic metrics
-            cursor.execute('SELECT COUNT(*) as count FROM tickets')
-            metrics['total_tickets'] = cursor.fetchone()[0]
-            
-            cursor.execute('SELECT COUNT(*) as count FROM tickets WHERE status = "open"')
-            metrics['open_tickets'] = cursor.fetchone()[0]
-            
-            cursor.execute('SELECT COUNT(*) as count FROM tickets WHERE status = "closed"')
-            metrics['closed_tickets'] = cursor.fetchone()[0]
-            
-            # Resolution time metrics
-            cursor.execute('''
-                SELECT AVG(TIMESTAMPDIFF(HOUR, created_at, resolved_at)) as avg_hours 
-                FROM tickets WHERE status = "closed"
+            if feedback.debug_enabled():
+                feedback.info("🔧 Debug: Fetching dashboard metrics...")
+
+            # Totals, resolution time, sentiment and urgency split in one scan
+            cursor.execute(f'''
+                SELECT
+                    urgency_level,
+                    COUNT(*) as total,
+                    SUM(CASE WHEN status = 'open' THEN 1 ELSE 0 END) as open_count,
+                    SUM(CASE WHEN status = 'closed' THEN 1 ELSE 0 END) as closed_count,
+                    SUM(CASE WHEN status = 'closed' THEN TIMESTAMPDIFF(HOUR, created_at, resolved_at) END) as resolution_hours,
+                    COUNT(CASE WHEN status = 'closed' THEN TIMESTAMPDIFF(HOUR, created_at, resolved_at) END) as resolved_count,
+                    SUM(sentiment_score) as sentiment_sum,
+                    COUNT(sentiment_score) as sentiment_count
+                FROM {source}
+                GROUP BY urgency_level
             ''')
-            metrics['avg_resolution_hours'] = cursor.fetchone()[0] or 0
-            
-            # Sentiment analysis
-            cursor.execute('SELECT AVG(sentiment_score) as avg_sentiment FROM tickets')
-            metrics['avg_sentiment'] = cursor.fetchone()[0] or 0
-            
-            # Urgency distribution
-            cursor.execute('SELECT urgency_level, COUNT(*) FROM tickets GROUP BY urgency_level')
-            metrics['urgency_distribution'] = dict(cursor.fetchall())
-            
-            # Daily ticket trends
-            cursor.execute('''
-                SELECT DATE(created_at) as date, COUNT(*) as count 
-                FROM tickets 
-                WHERE created_at >= DATE_SUB(NOW(), INTERVAL 30 DAY)
-                GROUP BY DATE(created_at) 
+            rows = cursor.fetchall()
+
+            metrics['total_tickets'] = sum(row[1] for row in rows)
+            metrics['open_tickets'] = int(sum(row[2] or 0 for row in rows))
+            metrics['closed_tickets'] = int(sum(row[3] or 0 for row in rows))
+
+            resolved_count = sum(row[5] for row in rows)
+            metrics['avg_resolution_hours'] = (
+                float(sum(row[4] or 0 for row in rows)) / resolved_count if resolved_count else 0
+            )
+
+            sentiment_count = sum(row[7] for row in rows)
+            metrics['avg_sentiment'] = (
+                float(sum(row[6] or 0 for row in rows)) / sentiment_count if sentiment_count else 0
+            )
+
+            metrics['urgency_distribution'] = {row[0]: row[1] for row in rows}
+
+            # Daily ticket trends; a literal bound on the bare column lets MySQL prune partitions
+            cursor.execute(f'''
+                SELECT DATE(created_at) as date, COUNT(*) as count
+                FROM {source}
+                WHERE created_at >= %s
+                GROUP BY DATE(created_at)
                 ORDER BY date
-            ''')
+            ''', (datetime.now() - timedelta(days=30),))
             metrics['daily_trends'] = cursor.fetchall()
-            
-            if st.session_state.get('debug', False):
-                st.success(f"🔧 Debug: Retrieved {len(metrics)} metric groups")
-                
+
+            with _metrics_lock:
+                _metrics_cache[include_archive] = (metrics, time.monotonic() + Config.DASHBOARD_CACHE_TTL)
+
+            if feedback.debug_enabled():
+                feedback.success(f"🔧 Debug: Retrieved {len(metrics)} metric groups")
+
         except Exception as e:
-            st.error(f"Analytics error: {e}")
+            feedback.error(f"Analytics error: {e}")
         finally:
             cursor.close()
-        
-        return metrics
\ No newline at end of file
+
+        return dict(metrics)
+
+    @staticmethod
+    def invalidate_cache():
+        """Drop cached dashboard metrics so the next render recomputes them"""
+        with _metrics_lock:
+            _metrics_cache.clear()
@@ -0,0 +1,160 @@
+from collections import defaultdict
+import pandas as pd
+
+# Rollup grains, stored in analytics.period
+PERIODS = ('day', 'hour')
+
+# Additive per-bucket metrics; averages are derived when reading
+METRICS = ('tickets_created', 'tickets_closed', 'resolution_hours', 'sentiment_sum')
+
+
+class RollupStore:
+    """Daily and hourly ticket rollups kept in the ``analytics`` table
+
+    Every row is one metric for one (period, bucket start, assignee,
+    urgency) combination, where the bucket is the hour or day in which the
+    ticket was created. All metrics are plain sums, so a ticket's
+    contribution can be added and later retracted exactly. Writers call
+    ``retract`` before changing a ticket and ``add`` after, inside the same
+    transaction, so the rollups always agree with the committed tickets.
+    """
+
+    # Tickets read per query when rebuilding from scratch
+    REBUILD_CHUNK_SIZE = 5000
+
+    @staticmethod
+    def add(cursor, ticket_ids):
+        """Add the current contribution of ticket_ids to the rollups"""
+        RollupStore._apply(cursor, ticket_ids, 1)
+
+    @staticmethod
+    def retract(cursor, ticket_ids):
+        """Remove the current contribution of ticket_ids from the rollups"""
+        RollupStore._apply(cursor, ticket_ids, -1)
+
+    @staticmethod
+    def rebuild(conn):
+        """Recompute every rollup row from live and archived tickets; returns tickets scanned"""
+        cursor = conn.cursor()
+        try:
+            totals = defaultdict(float)
+            scanned = 0
+            for table in ('tickets', 'tickets_archive'):
+                last_id = 0
+                while True:
+                    cursor.execute(f'''
+                        SELECT id, created_at, assigned_to, urgency_level, status,
+                               TIMESTAMPDIFF(HOUR, created_at, resolved_at), sentiment_score
+                        FROM {table}
+                        WHERE id > %s
+                        ORDER BY id
+                        LIMIT {RollupStore.REBUILD_CHUNK_SIZE}
+                    ''', (last_id,))
+                    rows = cursor.fetchall()
+                    if not rows:
+                        break
+                    RollupStore.accumulate(totals, (row[1:] for row in rows), 1)
+                    scanned += len(rows)
+                    last_id = rows[-1][0]
+
+            placeholders = ', '.join(['%s'] * len(PERIODS))
+            cursor.execute(f'DELETE FROM analytics WHERE period IN ({placeholders})', PERIODS)
+            RollupStore._write(cursor, totals)
+            conn.commit()
+            return scanned
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def load(conn, period, since=None):
+        """Rollup rows at or after since as a DataFrame, one column per metric
+
+        Columns: bucket, assigned_to, urgency_level and every name in METRICS.
+        Unassigned tickets have an empty assigned_to.
+        """
+        cursor = conn.cursor()
+        try:
+            query = '''
+                SELECT recorded_at, assigned_to, urgency_level, metric_name, metric_value
+                FROM analytics
+                WHERE period = %s
+            '''
+            params = [period]
+            if since is not None:
+                query += ' AND recorded_at >= %s'
+                params.append(since)
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+
+        columns = ['bucket', 'assigned_to', 'urgency_level']
+        if not rows:
+            return pd.DataFrame(columns=columns + list(METRICS))
+        frame = pd.DataFrame(rows, columns=columns + ['metric_name', 'metric_value'])
+        frame = frame.pivot_table(index=columns, columns='metric_name', values='metric_value',
+                                  aggfunc='sum', fill_value=0)
+        return frame.reindex(columns=list(METRICS), fill_value=0).reset_index()
+
+    @staticmethod
+    def _apply(cursor, ticket_ids, sign):
+        ticket_ids = [ticket_id for ticket_id in ticket_ids if ticket_id is not None]
+        if not ticket_ids:
+            return
+        placeholders = ', '.join(['%s'] * len(ticket_ids))
+        cursor.execute(f'''
+            SELECT created_at, assigned_to, urgency_level, status,
+                   TIMESTAMPDIFF(HOUR, created_at, resolved_at), sentiment_score
+            FROM tickets
+            WHERE id IN ({placeholders})
+            FOR UPDATE
+        ''', ticket_ids)
+        totals = defaultdict(float)
+        RollupStore.accumulate(totals, cursor.fetchall(), sign)
+        RollupStore._write(cursor, totals)
+
+    @staticmethod
+    def accumulate(totals, tickets, sign=1):
+        """Add sign x each ticket's contribution into totals, keyed like analytics rows
+
+        tickets yields (created_at, assigned_to, urgency_level, status,
+        resolution_hours, sentiment_score); totals is a defaultdict(float).
+        """
+        for created_at, assigned_to, urgency_level, status, resolution_hours, sentiment_score in tickets:
+            if created_at is None:
+                continue
+            closed = status == 'closed'
+            contribution = (
+                ('tickets_created', 1),
+                ('tickets_closed', 1 if closed else 0),
+                ('resolution_hours', (resolution_hours or 0) if closed else 0),
+                ('sentiment_sum', sentiment_score or 0),
+            )
+            buckets = (
+                ('day', created_at.replace(hour=0, minute=0, second=0, microsecond=0)),
+                ('hour', created_at.replace(minute=0, second=0, microsecond=0)),
+            )
+            for period, bucket in buckets:
+                key = (period, bucket, assigned_to or '', urgency_level or '')
+                for metric_name, value in contribution:
+                    totals[key + (metric_name,)] += sign * value
+
+    @staticmethod
+    def rows(totals):
+        """(period, recorded_at, assigned_to, urgency_level, metric_name, metric_value) rows for totals"""
+        return [key + (value,) for key, value in totals.items() if value]
+
+    @staticmethod
+    def _write(cursor, totals):
+        # Key order keeps concurrent writers locking analytics rows in the same order (no deadlocks)
+        rows = sorted(RollupStore.rows(totals), key=lambda row: row[:5])
+        if not rows:
+            return
+        cursor.executemany('''
+            INSERT INTO analytics (period, recorded_at, assigned_to, urgency_level, metric_name, metric_value)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE metric_value = metric_value + VALUES(metric_value)
+        ''', rows)
@@ -0,0 +1,4 @@
+"""
+Benchmarks for Sacco Ticket System
+Micro and end-to-end performance measurements, run with python -m benchmarks.<name>
+"""
@@ -0,0 +1,317 @@
+"""
+End-to-end ingestion benchmark against a synthetic mailbox
+
+Generates N synthetic RFC 822 messages (seeded, with configurable body
+sizes and share of HTML mail) and serves them from an in-process IMAP
+stand-in. They are then pushed through the real IngestPipeline: fetch as
+imap_tools messages, parse, analyze, and assign/insert through
+TicketManager. By default the database is a fresh in-memory SQLite one.
+
+    python -m benchmarks.ingest --emails 2000 [--body-sizes 512,4096,32768]
+                                [--html-ratio 0.3] [--batch-size 50] [--seed 7] [--staff N]
+                                [--sqlite PATH | --mysql] [--output FILE]
+                                [--compare BASELINE.json]
+
+Assignment only picks staff without an open ticket, so the run adds
+--staff IT Staff users and, between batches, closes the tickets just
+created (outside the timed sections), as a team keeping up with the queue
+would.
+
+Per-email latency runs from the moment the message is handed out by the
+mailbox to the commit of the batch that stored it. Results (throughput,
+p50/p95/p99 latency, peak RSS of this process, per-stage timings, git
+commit) are written as JSON, by default to ingest-<commit>.json, so runs
+from different commits can be compared with --compare. --mysql writes to
+the configured MySQL database; point it at a scratch schema.
+"""
+import argparse
+import hashlib
+import json
+import platform
+import random
+import resource
+import statistics
+import subprocess
+import time
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from email.utils import format_datetime
+from pathlib import Path
+
+from imap_tools import MailMessage
+
+from config import Config, EmailConfig
+from database import get_db_connection, init_db
+from email_processing.fetcher import EmailFetcher
+from email_processing.pipeline import IngestPipeline
+from tickets.manager import TicketManager
+
+VOCABULARY = (
+    "dear team please kindly assist member account statement loan balance transfer "
+    "sacco branch payment request update portal report download thanks regards "
+    "mobile banking deposit withdrawal dividend shares guarantor application"
+).split()
+# Words the analyzer reacts to, sprinkled in so urgency and insights vary
+SIGNAL_WORDS = ("urgent", "asap", "error", "failed", "login", "password", "complaint", "thank you")
+SUBJECTS = (
+    "Loan Application", "Account Statement Request", "Password Reset", "Mobile Banking Issue",
+    "Card Blocked", "Dividend Query", "Transfer Failed", "Portal Login Problem", "Shares Balance",
+)
+UIDVALIDITY = 1
+
+
+class SyntheticMessages:
+    """Deterministic raw messages for a given seed"""
+
+    def __init__(self, count, body_sizes, html_ratio, seed):
+        self.count = count
+        self.body_sizes = body_sizes
+        self.html_ratio = html_ratio
+        self.seed = seed
+
+    def generate(self):
+        """List of (uid, raw bytes), UIDs from 1"""
+        rng = random.Random(self.seed)
+        start = datetime(2025, 1, 6, 8, 0)
+        return [(uid, self._message(rng, uid, start + timedelta(minutes=uid))) for uid in range(1, self.count + 1)]
+
+    def _message(self, rng, uid, sent_at):
+        msg = EmailMessage()
+        member = rng.randrange(1, max(2, self.count // 10))
+        msg['Message-ID'] = f"<bench-{self.seed}-{uid}@members.test>"
+        msg['From'] = f"Member {member} <member{member}@members.test>"
+        msg['To'] = Config.EMAIL_ADDRESS
+        msg['Subject'] = rng.choice(SUBJECTS)
+        msg['Date'] = format_datetime(sent_at)
+
+        text = self._body(rng, rng.choice(self.body_sizes))
+        msg.set_content(text)
+        if rng.random() < self.html_ratio:
+            paragraphs = ''.join(f"<p>{paragraph}</p>" for paragraph in text.split('\n\n'))
+            msg.add_alternative(f"<html><body>{paragraphs}</body></html>", subtype='html')
+        return msg.as_bytes()
+
+    @staticmethod
+    def _body(rng, size):
+        words = []
+        length = 0
+        while length < size:
+            word = rng.choice(SIGNAL_WORDS) if rng.random() < 0.02 else rng.choice(VOCABULARY)
+            words.append(word)
+            length += len(word) + 1
+        # Paragraph breaks every ~60 words
+        for index in range(60, len(words), 60):
+            words[index] += '\n\n'
+        return ' '.join(words).replace('\n\n ', '\n\n')
+
+
+class SyntheticMailbox:
+    """The slice of imap_tools.MailBox that EmailFetcher uses, served from memory
+
+    fetch() builds a real imap_tools MailMessage from each raw message, as
+    the live client does from a server response, and records when each UID
+    was handed out. client.uid() accepts the flag STOREs and counts them.
+    """
+
+    def __init__(self, messages):
+        self._messages = messages
+        self.fetched_at = {}
+        self.stores = 0
+        self.folder = self
+        self.client = self
+
+    def status(self, folder, items):
+        return {'UIDVALIDITY': UIDVALIDITY, 'UIDNEXT': len(self._messages) + 1}
+
+    def uid(self, command, *args):
+        self.stores += 1
+        return 'OK', [None]
+
+    def fetch(self, criteria, mark_seen=True, bulk=False):
+        for uid, raw in self._messages:
+            msg = MailMessage([(f"{uid} (UID {uid} RFC822 {{{len(raw)}}}".encode(), raw), b')'])
+            self.fetched_at[uid] = time.perf_counter()
+            yield msg
+
+
+def add_staff(count):
+    """Make sure count benchmark IT Staff users exist"""
+    password_hash = hashlib.sha256(b"admin123").hexdigest()
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.executemany(
+            'INSERT IGNORE INTO users (email, password_hash, name, role) VALUES (%s, %s, %s, %s)',
+            [(f"bench{i:03d}@sacco.test", password_hash, f"Bench Staff {i}", 'IT Staff') for i in range(1, count + 1)]
+        )
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def close_open_tickets():
+    """Resolve every open ticket so its assignee is available again"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "UPDATE tickets SET status = 'closed', resolved_at = %s, resolved_by = assigned_to WHERE status = 'open'",
+            (datetime.now(),)
+        )
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process (ru_maxrss is KiB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if platform.system() == 'Darwin' else peak / 1024
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    """Run one benchmark; returns the result dict"""
+    if not args.mysql:
+        Config.DB_BACKEND = 'sqlite'
+        Config.SQLITE_PATH = args.sqlite
+
+    init_db()
+    batch_size = args.batch_size or Config.INGEST_BATCH_SIZE
+    # A batch hands each free staff member at most one ticket
+    staff = args.staff or batch_size
+    add_staff(staff)
+    close_open_tickets()
+    messages = SyntheticMessages(args.emails, args.body_sizes, args.html_ratio, args.seed).generate()
+    raw_bytes = sum(len(raw) for _, raw in messages)
+    rss_before = peak_rss_mb()
+
+    mailbox = SyntheticMailbox(messages)
+    fetcher = EmailFetcher(EmailConfig())
+    fetcher.mailbox = mailbox
+    pipeline = IngestPipeline(fetcher, TicketManager().assign_tickets, batch_size)
+
+    latencies = []
+    housekeeping = 0.0
+
+    def on_batch(batch, results):
+        nonlocal housekeeping
+        committed = time.perf_counter()
+        latencies.extend(committed - mailbox.fetched_at[email_data['uid']] for email_data in batch)
+        close_open_tickets()
+        housekeeping += time.perf_counter() - committed
+
+    started = time.perf_counter()
+    outcomes = pipeline.run(on_batch=on_batch)
+    elapsed = time.perf_counter() - started - housekeeping
+
+    latencies.sort()
+    processed = len(latencies)
+    return {
+        'benchmark': 'ingest',
+        'commit': git_commit(),
+        'recorded_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'backend': 'mysql' if args.mysql else f"sqlite:{args.sqlite}",
+        'params': {
+            'emails': args.emails,
+            'body_sizes': args.body_sizes,
+            'html_ratio': args.html_ratio,
+            'batch_size': batch_size,
+            'seed': args.seed,
+            'staff': staff,
+        },
+        'raw_mb': round(raw_bytes / (1024 * 1024), 2),
+        'processed': processed,
+        'created': pipeline.created,
+        'outcomes': {outcome: outcomes[outcome] for outcome in ('exists', 'no_staff', 'db_error')},
+        'flag_stores': mailbox.stores,
+        'seconds': round(elapsed, 3),
+        'emails_per_second': round(processed / elapsed, 2) if elapsed else 0.0,
+        'emails_per_minute': round(processed / elapsed * 60, 1) if elapsed else 0.0,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 0.50) * 1000, 2),
+            'p95': round(percentile(latencies, 0.95) * 1000, 2),
+            'p99': round(percentile(latencies, 0.99) * 1000, 2),
+            'max': round(latencies[-1] * 1000, 2) if latencies else 0.0,
+            'mean': round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+        },
+        'rss_mb': {'before_run': round(rss_before, 1), 'peak': round(peak_rss_mb(), 1)},
+        'stages': {
+            stage.name: {'items': stage.items, 'seconds': round(stage.seconds, 3), 'per_second': round(stage.rate, 1)}
+            for stage in pipeline.stats.values()
+        },
+    }
+
+
+def compare(result, baseline):
+    """Lines comparing the headline numbers of two results"""
+    def line(label, new, old, unit, higher_is_better):
+        change = (new - old) / old * 100 if old else 0.0
+        better = change >= 0 if higher_is_better else change <= 0
+        return f"  {label:<14} {old:>10.1f} → {new:>10.1f} {unit:<6} {change:+6.1f}% {'' if better else '⚠️'}"
+
+    lines = [f"vs {baseline.get('commit') or 'baseline'} ({baseline.get('recorded_at')}):"]
+    lines.append(line('emails/min', result['emails_per_minute'], baseline['emails_per_minute'], '', True))
+    for key in ('p50', 'p95', 'p99'):
+        lines.append(line(f"latency {key}", result['latency_ms'][key], baseline['latency_ms'][key], 'ms', False))
+    lines.append(line('peak RSS', result['rss_mb']['peak'], baseline['rss_mb']['peak'], 'MB', False))
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--emails', type=int, default=2000)
+    parser.add_argument('--body-sizes', type=lambda value: [int(size) for size in value.split(',')],
+                        default=[512, 4096, 32768], help="comma-separated text body sizes in bytes, picked at random")
+    parser.add_argument('--html-ratio', type=float, default=0.3, help="share of messages with an HTML alternative")
+    parser.add_argument('--batch-size', type=int, default=None, help="default: Config.INGEST_BATCH_SIZE")
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--staff', type=int, default=None, help="IT Staff users to assign to (default: batch size)")
+    backend = parser.add_mutually_exclusive_group()
+    backend.add_argument('--sqlite', metavar='PATH', default=':memory:', help="SQLite database (default: in memory)")
+    backend.add_argument('--mysql', action='store_true', help="use the configured MySQL database")
+    parser.add_argument('--output', metavar='FILE', help="result JSON (default: ingest-<commit>.json)")
+    parser.add_argument('--compare', metavar='BASELINE', help="earlier result JSON to compare against")
+    args = parser.parse_args()
+
+    result = run(args)
+    output = args.output or f"ingest-{result['commit'] or 'local'}.json"
+    with open(output, 'w', encoding='utf-8') as handle:
+        json.dump(result, handle, indent=2)
+
+    latency = result['latency_ms']
+    print(f"{result['processed']:,} emails ({result['raw_mb']} MB) in {result['seconds']:.2f}s: "
+          f"{result['emails_per_minute']:,.0f} emails/min, {result['created']:,} tickets created")
+    print(f"latency p50 {latency['p50']:.1f}ms  p95 {latency['p95']:.1f}ms  p99 {latency['p99']:.1f}ms  "
+          f"max {latency['max']:.1f}ms")
+    print(f"peak RSS {result['rss_mb']['peak']:.1f} MB (before run {result['rss_mb']['before_run']:.1f} MB)")
+    for name, stage in result['stages'].items():
+        print(f"  {name:<8} {stage['items']:>7} items {stage['seconds']:>8.3f}s {stage['per_second']:>9.1f}/s")
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as handle:
+            print('\n'.join(compare(result, json.load(handle))))
+    print(f"Saved {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Keyword matching micro-benchmark
+
+Compares the analyzer's original per-keyword substring scans, a single
+word-boundary alternation regex, and KeywordMatcher on multi-KB bodies, with
+the real rule set and with a rule set ten times larger.
+
+    python -m benchmarks.keyword_matching [--repeat 200] [--seed 7]
+"""
+import argparse
+import random
+import re
+import timeit
+
+from email_processing.analyzer import AIEmailAnalyzer
+from email_processing.keywords import KeywordMatcher
+
+BODY_SIZES = (1024, 4096, 16384, 65536)
+VOCABULARY = (
+    "dear team please kindly assist member account statement loan balance transfer "
+    "sacco branch payment request update portal report download flag thanks regards "
+    "mobile banking deposit withdrawal dividend shares guarantor application"
+).split()
+
+
+def _rule_keywords():
+    return (
+        AIEmailAnalyzer.URGENT_KEYWORDS
+        + AIEmailAnalyzer.HIGH_KEYWORDS
+        + tuple(word for _, keywords in AIEmailAnalyzer.INSIGHT_RULES for word in keywords)
+    )
+
+
+def _make_body(rng, size):
+    words = []
+    length = 0
+    while length < size:
+        word = rng.choice(VOCABULARY)
+        words.append(word)
+        length += len(word) + 1
+    # A couple of real hits so every strategy has matches to report
+    words.insert(len(words) // 2, "urgent,")
+    words.append("login failed.")
+    return " ".join(words)
+
+
+def substring_scan(keywords):
+    """The original approach: one `keyword in text` scan per keyword"""
+    def find(text):
+        lowered = text.lower()
+        return {keyword for keyword in keywords if keyword in lowered}
+    return find
+
+
+def alternation_regex(keywords):
+    pattern = re.compile(
+        r'\b(?:' + '|'.join(re.escape(k) for k in sorted(keywords, key=len, reverse=True)) + r')\b'
+    )
+    return lambda text: set(pattern.findall(text.lower()))
+
+
+def run(repeat, seed):
+    rng = random.Random(seed)
+    base = _rule_keywords()
+    extended = base + tuple(
+        ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(4, 10)))
+        for _ in range(len(base) * 9)
+    )
+
+    print(f"{'keywords':>8} {'body':>7} {'substring':>11} {'regex':>11} {'matcher':>11} {'speedup':>8}")
+    for keywords in (base, extended):
+        strategies = {
+            'substring': substring_scan(keywords),
+            'regex': alternation_regex(keywords),
+            'matcher': KeywordMatcher(keywords).find,
+        }
+        for size in BODY_SIZES:
+            body = _make_body(rng, size)
+            timings = {
+                name: timeit.timeit(lambda: find(body), number=repeat) / repeat * 1e6
+                for name, find in strategies.items()
+            }
+            print(
+                f"{len(keywords):>8} {size:>7} "
+                f"{timings['substring']:>9.1f}us {timings['regex']:>9.1f}us {timings['matcher']:>9.1f}us "
+                f"{timings['substring'] / timings['matcher']:>7.2f}x"
+            )
+
+    body = _make_body(rng, 4096)
+    print("\nHits on a 4 KB body:")
+    print(f"  substring: {sorted(substring_scan(base)(body))}")
+    print(f"  matcher:   {sorted(KeywordMatcher(base).find(body))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    run(args.repeat, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,303 @@
+"""
+Seeded synthetic dataset generator
+
+Fills users, tickets (with ticket_bodies and ticket_message_ids) and the
+analytics rollups with realistic data: business-hours arrival, a few
+heavy senders, urgency-dependent sentiment and resolution times, and older
+tickets mostly closed. The same --seed, --tickets, --days and --end always
+produce identical rows.
+
+    python -m benchmarks.seed --tickets 100000 [--days 365] [--seed 42]
+                              [--sqlite bench.db] [--reset]
+
+Without --sqlite the MySQL database from Config is used (migrated first).
+"""
+import argparse
+import hashlib
+import math
+import random
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from analytics.rollups import RollupStore
+from database import sqlite_backend
+from database.connection import get_pool
+from database.migrations import ensure_schema
+from database.partitions import ensure_partitions_from, month_start
+
+URGENCY_WEIGHTS = {'normal': 0.7, 'high': 0.2, 'urgent': 0.1}
+PRIORITY_BY_URGENCY = {'urgent': ('high',), 'high': ('high', 'medium'), 'normal': ('medium', 'low')}
+# (mean, stdev) of sentiment; angrier mail tends to be more urgent
+SENTIMENT_BY_URGENCY = {'normal': (0.1, 0.25), 'high': (-0.05, 0.3), 'urgent': (-0.3, 0.3)}
+# Median resolution hours, log-normally spread
+RESOLUTION_HOURS_BY_URGENCY = {'urgent': 2, 'high': 8, 'normal': 24}
+# Share of arrivals per hour of day; quiet nights, busy mornings
+HOUR_WEIGHTS = [1, 1, 1, 1, 1, 2, 4, 8, 14, 16, 15, 13, 10, 12, 13, 12, 10, 7, 5, 4, 3, 2, 2, 1]
+WEEKDAY_WEIGHTS = [10, 10, 10, 10, 9, 4, 2]
+
+TOPICS = {
+    'Login Issue': ["I cannot log into my account", "my password is not accepted", "the portal says my account is locked"],
+    'Password Reset': ["I forgot my password, please reset", "kindly reset my password", "the reset link has expired"],
+    'Loan Application': ["I applied for a loan last week", "my loan status still shows pending", "please confirm my guarantor details"],
+    'Statement Request': ["please send my account statement", "I need my statement for the last six months", "my statement download fails"],
+    'Mobile Banking': ["the mobile app crashes on login", "mobile transfers are failing", "I did not receive the OTP"],
+    'Dividend Query': ["when will dividends be paid", "my dividend amount looks wrong", "please confirm my shares balance"],
+    'Card Blocked': ["my card has been blocked", "the ATM retained my card", "my card is declined everywhere"],
+}
+URGENT_PHRASES = ["This is urgent, please assist immediately.", "The system is down and members are waiting.",
+                  "Critical: payments are failing.", "Emergency - please call me asap."]
+FILLER = ("dear team please kindly assist member account branch payment request update portal report "
+          "thanks regards mobile deposit withdrawal shares balance transfer").split()
+FIRST_NAMES = ["Veronah", "Joan", "John", "Joel", "Bonny", "Grace", "Peter", "Mary", "Kevin", "Faith",
+               "Brian", "Mercy", "Dennis", "Ann", "Samuel", "Esther", "David", "Lucy", "James", "Irene"]
+LAST_NAMES = ["Ayieko", "Gakuu", "Doe", "Dan", "Otieno", "Wanjiku", "Kamau", "Njeri", "Mutua", "Achieng",
+              "Kiprop", "Mwangi", "Odhiambo", "Chebet", "Kariuki", "Nyambura", "Omondi", "Wafula"]
+
+TICKET_COLUMNS = (
+    'id', 'message_id', 'subject', 'sender_email', 'sender_name', 'body_preview', 'assigned_to',
+    'status', 'priority', 'sentiment_score', 'urgency_level', 'created_at', 'assigned_at',
+    'resolved_at', 'resolved_by', 'resolution_notes', 'ai_insights',
+)
+
+SEEDED_TABLES = ('analytics', 'ticket_message_ids', 'ticket_bodies', 'tickets')
+
+# Every seeded user's email is in this domain; --reset deletes only those users
+SEED_DOMAIN = 'sacco.test'
+
+
+class DatasetGenerator:
+    """Deterministic stream of users and tickets for a given seed"""
+
+    def __init__(self, seed, tickets, days, end, staff):
+        self.seed = seed
+        self.tickets = tickets
+        self.days = days
+        self.end = end
+        self.staff = staff
+        self.rng = random.Random(seed)
+        self.staff_emails = [f"staff{i:03d}@{SEED_DOMAIN}" for i in range(1, staff + 1)]
+        # Uneven workloads: some staff pick up far more tickets than others
+        self.staff_weights = [self.rng.uniform(0.5, 2.0) for _ in self.staff_emails]
+        self.senders = self._senders(max(50, tickets // 20))
+
+    def users(self):
+        password_hash = hashlib.sha256(b"admin123").hexdigest()
+        rows = [(email, password_hash, f"Staff Member {i}", 'IT Staff')
+                for i, email in enumerate(self.staff_emails, 1)]
+        rows.append((f'admin@{SEED_DOMAIN}', password_hash, 'Seed Administrator', 'Admin'))
+        return rows
+
+    def ticket_batches(self, first_id, batch_size):
+        """Yield lists of (ticket row, body) with ids from first_id, in created_at order"""
+        start = self.end - timedelta(days=self.days)
+        arrivals = sorted(self._arrival(start) for _ in range(self.tickets))
+        batch = []
+        for offset, created_at in enumerate(arrivals):
+            batch.append(self._ticket(first_id + offset, created_at))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _senders(self, count):
+        senders = []
+        for i in range(count):
+            first, last = self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+            senders.append((f"{first.lower()}.{last.lower()}{i}@members.test", f"{first} {last}"))
+        return senders
+
+    def _arrival(self, start):
+        rng = self.rng
+        while True:
+            day = start + timedelta(days=rng.randrange(self.days))
+            if rng.random() * max(WEEKDAY_WEIGHTS) < WEEKDAY_WEIGHTS[day.weekday()]:
+                break
+        hour = rng.choices(range(24), weights=HOUR_WEIGHTS)[0]
+        return day.replace(hour=hour, minute=rng.randrange(60), second=rng.randrange(60), microsecond=0)
+
+    def _ticket(self, ticket_id, created_at):
+        rng = self.rng
+        urgency = rng.choices(list(URGENCY_WEIGHTS), weights=list(URGENCY_WEIGHTS.values()))[0]
+        # Pareto-ish: a few members send a large share of the mail
+        sender_email, sender_name = self.senders[min(int(rng.paretovariate(1.2)) - 1, len(self.senders) - 1)
+                                                 if rng.random() < 0.3 else rng.randrange(len(self.senders))]
+        topic = rng.choice(list(TOPICS))
+        body = self._body(topic, urgency)
+        mean, stdev = SENTIMENT_BY_URGENCY[urgency]
+        sentiment = round(max(-1.0, min(1.0, rng.gauss(mean, stdev))), 3)
+        assigned_to = rng.choices(self.staff_emails, weights=self.staff_weights)[0]
+        assigned_at = created_at + timedelta(seconds=rng.randrange(5, 600))
+
+        resolution_hours = rng.lognormvariate(math.log(RESOLUTION_HOURS_BY_URGENCY[urgency]), 0.9)
+        resolved_at = created_at + timedelta(hours=resolution_hours)
+        # Anything whose resolution lies in the future is still open, plus a small stuck tail
+        closed = resolved_at <= self.end and rng.random() > 0.02
+        status = 'closed' if closed else 'open'
+
+        row = (
+            ticket_id,
+            f"<seed-{self.seed}-{ticket_id}@sacco.test>",
+            f"{'URGENT: ' if urgency == 'urgent' else ''}{topic}",
+            sender_email,
+            sender_name,
+            ' '.join(body.split())[:300],
+            assigned_to,
+            status,
+            rng.choice(PRIORITY_BY_URGENCY[urgency]),
+            sentiment,
+            urgency,
+            created_at,
+            assigned_at,
+            resolved_at if closed else None,
+            assigned_to if closed else None,
+            rng.choice(["Resolved", "Password reset", "Escalated to core banking", "Member advised"]) if closed else None,
+            f"Urgency: {urgency}",
+        )
+        return row, body
+
+    def _body(self, topic, urgency):
+        rng = self.rng
+        sentences = [f"Dear support team, {rng.choice(TOPICS[topic])}."]
+        if urgency == 'urgent':
+            sentences.append(rng.choice(URGENT_PHRASES))
+        words = int(rng.lognormvariate(math.log(80), 0.8))
+        sentences.append(' '.join(rng.choice(FILLER) for _ in range(words)) + '.')
+        sentences.append("Regards.")
+        return '\n\n'.join(sentences)
+
+
+class SeedTarget:
+    """Multi-row INSERT writer for a MySQL or SQLite-backend connection"""
+
+    def __init__(self, conn, rows_per_statement):
+        self.conn = conn
+        self.rows_per_statement = rows_per_statement
+
+    def insert(self, table, columns, rows, ignore=False):
+        cursor = self.conn.cursor()
+        try:
+            row_values = f"({', '.join(['%s'] * len(columns))})"
+            verb = 'INSERT IGNORE' if ignore else 'INSERT'
+            for start in range(0, len(rows), self.rows_per_statement):
+                chunk = rows[start:start + self.rows_per_statement]
+                cursor.execute(
+                    f"{verb} INTO {table} ({', '.join(columns)}) VALUES {', '.join([row_values] * len(chunk))}",
+                    [value for row in chunk for value in row]
+                )
+        finally:
+            cursor.close()
+
+    def scalar(self, sql):
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(sql)
+            return cursor.fetchone()[0]
+        finally:
+            cursor.close()
+
+    def execute(self, sql):
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(sql)
+        finally:
+            cursor.close()
+
+
+def connect(sqlite_path):
+    """(connection, SeedTarget) for SQLite at sqlite_path, or the configured MySQL"""
+    if sqlite_path:
+        conn = sqlite_backend.connect(sqlite_path)
+        # SQLite caps bound variables per statement; 17 columns x 50 rows stays well inside
+        target = SeedTarget(conn, 50)
+    else:
+        conn = get_pool().get_connection()
+        target = SeedTarget(conn, 500)
+    ensure_schema(conn)
+    return conn, target
+
+
+def seed(target, generator, batch_size=2000, reset=False, on_batch=None):
+    """Write the generated dataset through target; returns tickets inserted"""
+    if reset:
+        for table in SEEDED_TABLES:
+            target.execute(f"DELETE FROM {table}")
+        # The app's own default admin and staff accounts are kept
+        target.execute(f"DELETE FROM users WHERE email LIKE '%@{SEED_DOMAIN}'")
+
+    target.insert('users', ('email', 'password_hash', 'name', 'role'), generator.users(), ignore=True)
+    target.conn.commit()
+
+    first_id = (target.scalar('SELECT MAX(id) FROM tickets') or 0) + 1
+    totals = defaultdict(float)
+    inserted = 0
+    for batch in generator.ticket_batches(first_id, batch_size):
+        rows = [row for row, _ in batch]
+        target.insert('tickets', TICKET_COLUMNS, rows)
+        target.insert('ticket_bodies', ('ticket_id', 'body', 'body_html'),
+                      [(row[0], body, None) for row, body in batch])
+        target.insert('ticket_message_ids', ('message_id', 'ticket_id'), [(row[1], row[0]) for row in rows])
+        target.conn.commit()
+
+        RollupStore.accumulate(totals, (
+            (row[11], row[6], row[10], row[7],
+             int((row[13] - row[11]).total_seconds() // 3600) if row[13] else None, row[9])
+            for row in rows
+        ))
+        inserted += len(rows)
+        if on_batch:
+            on_batch(inserted)
+
+    # Rollups for the new tickets are added on top of whatever is already there
+    existing = defaultdict(float)
+    if not reset:
+        cursor = target.conn.cursor()
+        try:
+            cursor.execute('SELECT period, recorded_at, assigned_to, urgency_level, metric_name, metric_value FROM analytics')
+            for *key, value in cursor.fetchall():
+                existing[tuple(key)] = value
+        finally:
+            cursor.close()
+    for key, value in existing.items():
+        totals[key] += value
+    target.execute('DELETE FROM analytics')
+    target.insert('analytics', ('period', 'recorded_at', 'assigned_to', 'urgency_level', 'metric_name', 'metric_value'),
+                  RollupStore.rows(totals))
+    target.conn.commit()
+    return inserted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickets', type=int, default=100_000)
+    parser.add_argument('--days', type=int, default=365, help="date span ending at --end")
+    parser.add_argument('--end', type=lambda value: datetime.strptime(value, '%Y-%m-%d'),
+                        default=datetime.now().replace(hour=0, minute=0, second=0, microsecond=0),
+                        help="last day of the span, YYYY-MM-DD (default: today; pass it to reproduce exactly)")
+    parser.add_argument('--staff', type=int, default=12)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch-size', type=int, default=2000)
+    parser.add_argument('--sqlite', metavar='PATH', help="write to a SQLite file instead of MySQL")
+    parser.add_argument('--reset', action='store_true', help=f"delete existing tickets, rollups and @{SEED_DOMAIN} users first")
+    args = parser.parse_args()
+
+    generator = DatasetGenerator(args.seed, args.tickets, args.days, args.end, args.staff)
+    conn, target = connect(args.sqlite)
+    try:
+        created = ensure_partitions_from(conn, month_start(args.end - timedelta(days=args.days)))
+        if created:
+            print(f"Added partitions {created[0]}..{created[-1]}")
+
+        started = time.perf_counter()
+        inserted = seed(target, generator, args.batch_size, args.reset,
+                        on_batch=lambda count: print(f"\r{count:>10,} tickets", end='', flush=True))
+        elapsed = time.perf_counter() - started
+        print(f"\nSeeded {inserted:,} tickets (seed {args.seed}, {args.days} days to {args.end:%Y-%m-%d}) "
+              f"in {elapsed:.1f}s, {inserted / elapsed if elapsed else 0:,.0f} tickets/s")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -7,11 +7,15 @@ class Config:
     """Configuration class for environment variables"""
     
     # Database
+    DB_BACKEND = os.getenv('DB_BACKEND', 'mysql').lower()  # 'sqlite' for local test/benchmark runs
+    SQLITE_PATH = os.getenv('SQLITE_PATH', 'sacco_tickets.db')  # ':memory:' for a throwaway database
     MYSQL_HOST = os.getenv('MYSQL_HOST', 'localhost')
     MYSQL_PORT = int(os.getenv('MYSQL_PORT', 3306))
     MYSQL_USER = os.getenv('MYSQL_USER', 'root')
     MYSQL_PASSWORD = os.getenv('MYSQL_PASSWORD', '')
     MYSQL_DATABASE = os.getenv('MYSQL_DATABASE', 'sacco_tickets')
+    MYSQL_POOL_SIZE = int(os.getenv('MYSQL_POOL_SIZE', 10))
+    MYSQL_POOL_TIMEOUT = float(os.getenv('MYSQL_POOL_TIMEOUT', 10))
     
     # Email
     EMAIL_ADDRESS = os.getenv('EMAIL_ADDRESS', 'saccodesksupport@co-opbank.co.ke')
@@ -19,6 +23,48 @@ class Config:
     EMAIL_SERVICE_NAME = os.getenv('EMAIL_SERVICE_NAME', 'Office365')
     IMAP_SERVER = os.getenv('IMAP_SERVER', 'outlook.office365.com')
     IMAP_PORT = int(os.getenv('IMAP_PORT', 993))
+    IMAP_IDLE_TIMEOUT = int(os.getenv('IMAP_IDLE_TIMEOUT', 600))  # re-IDLE well inside RFC 2177's 29 minutes
+    EMAIL_POLL_INTERVAL = int(os.getenv('EMAIL_POLL_INTERVAL', 900))  # servers without IDLE
+    EMAIL_RETRY_INTERVAL = int(os.getenv('EMAIL_RETRY_INTERVAL', 300))  # longest wait between retries
+    EMAIL_RETRY_BASE_SECONDS = float(os.getenv('EMAIL_RETRY_BASE_SECONDS', 5))  # first retry; doubles per failure, jittered
+    IMAP_MAX_SESSIONS = int(os.getenv('IMAP_MAX_SESSIONS', 3))
+    IMAP_KEEPALIVE_SECONDS = int(os.getenv('IMAP_KEEPALIVE_SECONDS', 120))
+    IMAP_SESSION_TIMEOUT = float(os.getenv('IMAP_SESSION_TIMEOUT', 30))
+    INGEST_BATCH_SIZE = int(os.getenv('INGEST_BATCH_SIZE', 50))  # emails per analyze/insert micro-batch
+    IMAP_INGESTED_FLAGS = os.getenv('IMAP_INGESTED_FLAGS', '\\Seen')  # set once a ticket commits, e.g. "\\Seen $Ticketed"
+    INGEST_SPOOL = os.getenv('INGEST_SPOOL', 'True').lower() == 'true'  # watcher fetches into a local queue; tickets are created from it
+    INGEST_SPOOL_PATH = os.getenv('INGEST_SPOOL_PATH', 'ingest_spool.db')
+    INGEST_QUEUE = os.getenv('INGEST_QUEUE', 'local').lower()  # 'local' (per-host spool file) or 'database' (shared ingest_jobs table)
+    INGEST_PROCESSORS = int(os.getenv('INGEST_PROCESSORS', 1))  # queue consumer threads per process
+    INGEST_SPOOL_CLAIM_SECONDS = int(os.getenv('INGEST_SPOOL_CLAIM_SECONDS', 300))  # unacked batches are redelivered after this
+    INGEST_SPOOL_RETRY_SECONDS = int(os.getenv('INGEST_SPOOL_RETRY_SECONDS', 60))  # delay before retrying no_staff/db_error emails
+    INGEST_MAX_FAILURES = int(os.getenv('INGEST_MAX_FAILURES', 5))  # queued emails whose processing raises this often are dead-lettered
+    
+    # AI analysis
+    ANALYZER_WORKERS = int(os.getenv('ANALYZER_WORKERS', 0))  # 0 = one per CPU
+    ANALYZER_POOL_MIN_BATCH = int(os.getenv('ANALYZER_POOL_MIN_BATCH', 32))  # smaller batches run in-process
+    ANALYZER_TIMEOUT = float(os.getenv('ANALYZER_TIMEOUT', 5))  # seconds per message
+    ANALYSIS_CACHE_SIZE = int(os.getenv('ANALYSIS_CACHE_SIZE', 5000))  # in-memory LRU entries
+    ANALYSIS_CACHE_PERSIST = os.getenv('ANALYSIS_CACHE_PERSIST', 'True').lower() == 'true'
+    ANALYSIS_CACHE_MAX_AGE_DAYS = int(os.getenv('ANALYSIS_CACHE_MAX_AGE_DAYS', 90))  # persisted rows older than this are pruned
+    
+    # Analytics
+    DASHBOARD_CACHE_TTL = int(os.getenv('DASHBOARD_CACHE_TTL', 30))  # seconds
+    
+    # Partitioning
+    PARTITION_MONTHS_AHEAD = int(os.getenv('PARTITION_MONTHS_AHEAD', 3))  # monthly tickets partitions kept ready
+    
+    # Archival
+    ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', 90))  # closed tickets resolved longer ago move to tickets_archive
+    ARCHIVE_CHUNK_SIZE = int(os.getenv('ARCHIVE_CHUNK_SIZE', 500))  # tickets moved per transaction
+    ARCHIVE_THROTTLE_SECONDS = float(os.getenv('ARCHIVE_THROTTLE_SECONDS', 0.5))  # pause between chunks
+    ARCHIVE_MAX_SECONDS = int(os.getenv('ARCHIVE_MAX_SECONDS', 60))  # time budget per run; rerun to continue
+    
+    # Ingestion worker
+    EMBEDDED_FETCHER = os.getenv('EMBEDDED_FETCHER', 'True').lower() == 'true'  # False when python -m email_processing.worker does the fetching
+    WORKER_ID = os.getenv('WORKER_ID', '')  # defaults to hostname:pid
+    WORKER_HEARTBEAT_SECONDS = int(os.getenv('WORKER_HEARTBEAT_SECONDS', 30))
+    INGEST_LEASE_SECONDS = int(os.getenv('INGEST_LEASE_SECONDS', 15))  # a dead leader is replaced within ~4/3 of this
     
     # App
     DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'
@@ -3,15 +3,22 @@ Database module for Sacco Ticket System
 Handles all database operations, connections, and setup
 """
 
-from .connection import get_db_connection
+from .connection import get_db_connection, get_pool_stats
 from .setup import init_db, reset_db
-from .models import User, Ticket, Analytics
+from .migrations import ensure_schema, LATEST_VERSION
+from .models import User, Ticket, TicketBody, Analytics, MailSyncState, WorkerHeartbeat
 
 __all__ = [
     'get_db_connection',
+    'get_pool_stats',
     'init_db', 
     'reset_db',
+    'ensure_schema',
+    'LATEST_VERSION',
     'User',
     'Ticket', 
-    'Analytics'
+    'TicketBody',
+    'Analytics',
+    'MailSyncState',
+    'WorkerHeartbeat'
 ]
\ No newline at end of file
@@ -1,21 +1,185 @@
+import queue
+import threading
+import time
 import mysql.connector
 from mysql.connector import Error
-import streamlit as st
+import feedback
 from config import Config
+from database import sqlite_backend
+
+
+class PoolTimeoutError(Error):
+    """Raised when no pooled connection becomes free within the checkout timeout"""
+
+
+class PooledConnection:
+    """Proxy around a pooled MySQL connection.
+
+    Behaves like the underlying connection, except that close() hands the
+    connection back to the pool instead of tearing down the socket, so the
+    existing ``conn.close()`` calls throughout the app keep working.
+    """
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.release(conn)
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of MySQL connections shared by the whole process"""
+
+    def __init__(self, size, timeout, **connect_args):
+        self.size = size
+        self.timeout = timeout
+        self._connect_args = connect_args
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_seconds': 0.0,
+            'timeouts': 0,
+            'connections_created': 0,
+            'stale_replaced': 0,
+            'in_use': 0,
+        }
+
+    def get_connection(self):
+        """Check out a live connection, waiting up to ``timeout`` seconds for a free slot"""
+        if not self._slots.acquire(blocking=False):
+            started = time.monotonic()
+            acquired = self._slots.acquire(timeout=self.timeout)
+            with self._lock:
+                self._stats['waits'] += 1
+                self._stats['wait_seconds'] += time.monotonic() - started
+                if not acquired:
+                    self._stats['timeouts'] += 1
+            if not acquired:
+                raise PoolTimeoutError(
+                    msg=f"No database connection available after {self.timeout}s "
+                        f"(pool size {self.size})"
+                )
+
+        try:
+            conn = self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._stats['checkouts'] += 1
+            self._stats['in_use'] += 1
+        return PooledConnection(self, conn)
+
+    def release(self, conn):
+        """Return a connection to the pool, discarding it if it is no longer usable"""
+        try:
+            # End any open transaction so the next borrower gets a fresh snapshot
+            conn.rollback()
+            self._idle.put(conn)
+        except Error:
+            self._discard(conn)
+        finally:
+            with self._lock:
+                self._stats['in_use'] -= 1
+            self._slots.release()
+
+    def stats(self):
+        """Snapshot of pool counters"""
+        with self._lock:
+            snapshot = dict(self._stats)
+        snapshot['size'] = self.size
+        snapshot['idle'] = self._idle.qsize()
+        return snapshot
+
+    def _checkout(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+        # Liveness ping: MySQL drops idle sockets after wait_timeout
+        try:
+            conn.ping(reconnect=False)
+            return conn
+        except Error:
+            self._discard(conn)
+            with self._lock:
+                self._stats['stale_replaced'] += 1
+            return self._connect()
+
+    def _connect(self):
+        conn = mysql.connector.connect(**self._connect_args)
+        with self._lock:
+            self._stats['connections_created'] += 1
+        return conn
+
+    @staticmethod
+    def _discard(conn):
+        try:
+            conn.close()
+        except Error:
+            pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    size=Config.MYSQL_POOL_SIZE,
+                    timeout=Config.MYSQL_POOL_TIMEOUT,
+                    host=Config.MYSQL_HOST,
+                    port=Config.MYSQL_PORT,
+                    user=Config.MYSQL_USER,
+                    password=Config.MYSQL_PASSWORD,
+                    database=Config.MYSQL_DATABASE,
+                )
+    return _pool
+
+
+def get_pool_stats():
+    """Return checkout/wait counters for the shared connection pool"""
+    if _pool is None:
+        return {}
+    return _pool.stats()
+
 
 def get_db_connection():
-    """Create and return a MySQL database connection"""
+    """Borrow a MySQL connection from the shared pool; close() returns it
+
+    With ``Config.DB_BACKEND = 'sqlite'`` this opens a connection to
+    ``Config.SQLITE_PATH`` instead (see database/sqlite_backend.py).
+    """
     try:
-        conn = mysql.connector.connect(
-            host=Config.MYSQL_HOST,
-            port=Config.MYSQL_PORT,
-            user=Config.MYSQL_USER,
-            password=Config.MYSQL_PASSWORD,
-            database=Config.MYSQL_DATABASE,
-        )
+        if Config.DB_BACKEND == sqlite_backend.DIALECT:
+            conn = sqlite_backend.connect(Config.SQLITE_PATH)
+        else:
+            conn = get_pool().get_connection()
         if Config.DEBUG:
-            st.success("🔧 Debug: Database connection established")
+            feedback.success("🔧 Debug: Database connection established")
         return conn
     except Error as e:
-        st.error(f"Database connection error: {e}")
-        return None
\ No newline at end of file
+        feedback.error(f"Database connection error: {e}")
+        return None
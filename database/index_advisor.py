@@ -0,0 +1,303 @@
+"""EXPLAIN every SQL statement the app runs and flag full scans and filesorts
+
+Developer command, run against a database that has realistic data in it:
+
+    python -m database.index_advisor [path ...] [--sqlite bench.db]
+
+Statements are pulled out of ``cursor.execute(...)`` calls in the ui,
+tickets and analytics packages (or the given files/directories) with the
+ast module. f-string fragments that only splice in ``%s`` lists, column
+lists, batch sizes or table names are filled in; anything else is reported
+as dynamic and skipped. ``%s`` parameters become sample literals chosen from
+the column they are compared against. For INSERT ... SELECT the SELECT is
+explained.
+
+Queries assembled from filters at run time (the All Tickets keyset page and
+the analytics rollup load) are also built by their own code for a set of
+representative filter combinations, and each variant is explained with its
+real parameters. Exits non-zero when any statement is flagged.
+
+On the SQLite backend (``--sqlite``, or ``DB_BACKEND=sqlite``) plans come
+from EXPLAIN QUERY PLAN: ``SCAN <table>`` without an index and
+``USE TEMP B-TREE`` for ORDER BY/GROUP BY/DISTINCT are flagged.
+"""
+import argparse
+import ast
+import re
+import sys
+from datetime import date, datetime
+from pathlib import Path
+from config import Config
+from database import sqlite_backend
+from database.connection import get_db_connection
+from tickets.archiver import ARCHIVED_COLUMNS
+
+DEFAULT_PATHS = ('ui', 'tickets', 'analytics')
+
+# f-string fields with a known, EXPLAIN-safe expansion
+FSTRING_FIELDS = {
+    'placeholders': '%s',
+    'table': 'tickets',
+    'source': 'tickets',
+    'where': '',
+    'name': 'pfuture',
+    'columns': ', '.join(ARCHIVED_COLUMNS),
+    'source_columns': ', '.join(f't.{column}' for column in ARCHIVED_COLUMNS),
+}
+
+# All Tickets filter combinations explained: (status, urgency, assignee, created date range)
+TICKET_PAGE_FILTERS = [
+    ("All", "All", "All", ()),
+    ("open", "All", "All", ()),
+    ("closed", "All", "All", (date(2025, 1, 1), date(2025, 3, 31))),
+    ("All", "urgent", "All", ()),
+    ("All", "All", "staff@sacco.test", ()),
+    ("open", "All", "staff@sacco.test", ()),
+    ("All", "All", "Unassigned", ()),
+    ("open", "high", "staff@sacco.test", (date(2025, 1, 1), date(2025, 1, 31))),
+]
+
+EXPLAINABLE = ('SELECT', 'UPDATE', 'DELETE')
+
+# EXPLAIN QUERY PLAN details: a table scan (the USING clause names any index it walks) and a sort/group step
+SQLITE_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?(.*)$')
+SQLITE_DERIVED = re.compile(r'^(?:CO-ROUTINE|MATERIALIZE) (\w+)')
+SQLITE_TEMP_BTREE = re.compile(r'USE TEMP B-TREE FOR (.+)$')
+
+
+def extract_statements(paths):
+    """Yield (location, sql) for every execute/executemany call with literal SQL"""
+    for path in paths:
+        path = Path(path)
+        files = sorted(path.rglob('*.py')) if path.is_dir() else [path]
+        for file in files:
+            tree = ast.parse(file.read_text(encoding='utf-8'), filename=str(file))
+            for node in ast.walk(tree):
+                if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+                        and node.func.attr in ('execute', 'executemany') and node.args):
+                    continue
+                yield f"{file}:{node.lineno}", _literal_sql(node.args[0])
+
+
+def expanded_statements():
+    """Yield (location, sql, params) for the filter-built queries, one per representative variant"""
+    # Imported here: ui.pages pulls in streamlit, which the static scan does not need
+    from analytics.rollups import RollupStore
+    from ui.pages import _fetch_ticket_page
+
+    recorder = _RecordingCursor()
+    for status, urgency, assignee, date_range in TICKET_PAGE_FILTERS:
+        for after in (None, (datetime(2025, 6, 1), 1000)):
+            for include_archive in (False, True):
+                _fetch_ticket_page(recorder, status, urgency, assignee, date_range, after, 25, include_archive)
+                sql, params = recorder.statements.pop()
+                variant = (f"status={status} urgency={urgency} assignee={assignee} "
+                           f"dates={'yes' if date_range else 'no'} page={'next' if after else 'first'}"
+                           f"{' +archive' if include_archive else ''}")
+                yield f"_fetch_ticket_page({variant})", sql, params
+
+    for period, since in (('day', None), ('hour', datetime(2025, 1, 1))):
+        RollupStore.load(recorder, period, since)
+        sql, params = recorder.statements.pop()
+        yield f"RollupStore.load(period={period}, since={since or 'all'})", sql, params
+
+
+def explain(cursor, sql, params=None):
+    """EXPLAIN rows as dicts keyed by column name; sample values stand in for missing params
+
+    On SQLite the rows are EXPLAIN QUERY PLAN's (id, parent, notused, detail).
+    """
+    select = re.search(r'\bSELECT\b', sql, re.IGNORECASE)
+    if sql.lstrip().upper().startswith('INSERT') and select:
+        sql = sql[select.start():]
+    filled = _with_sample_values(sql) if params is None else _with_params(sql, params)
+    if getattr(cursor, 'dialect', 'mysql') == sqlite_backend.DIALECT:
+        cursor.execute(f"EXPLAIN QUERY PLAN {filled}")
+    else:
+        cursor.execute(f"EXPLAIN {filled}")
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def problems(plan):
+    """Human-readable findings for one EXPLAIN (MySQL) or EXPLAIN QUERY PLAN (SQLite) plan"""
+    if plan and 'detail' in plan[0]:
+        return _sqlite_problems(plan)
+    found = []
+    for row in plan:
+        table = row.get('table')
+        extra = row.get('Extra') or ''
+        if row.get('type') == 'ALL' and not str(table).startswith('<'):
+            found.append(f"full scan of {table} (~{row.get('rows')} rows)")
+        if 'Using filesort' in extra:
+            found.append(f"filesort on {table}")
+        if 'Using temporary' in extra:
+            found.append(f"temporary table for {table}")
+    return found
+
+
+def _sqlite_problems(plan):
+    """Findings for an EXPLAIN QUERY PLAN; like MySQL's <derived> rows, subquery results are not flagged"""
+    derived = {match.group(1) for match in (SQLITE_DERIVED.match(row['detail']) for row in plan) if match}
+    derived.add('CONSTANT')
+    # Steps that read a subquery's rows; a sort there only orders that (already limited) result
+    over_derived = set()
+    for row in plan:
+        scan = SQLITE_SCAN.match(row['detail'])
+        if scan and scan.group(1) in derived:
+            over_derived.add(row['parent'])
+
+    found = []
+    for row in plan:
+        scan = SQLITE_SCAN.match(row['detail'])
+        if scan and scan.group(1) not in derived and 'INDEX' not in scan.group(2):
+            found.append(f"full scan of {scan.group(1)}")
+        temp = SQLITE_TEMP_BTREE.search(row['detail'])
+        if temp and row['parent'] not in over_derived:
+            found.append(f"temp b-tree for {temp.group(1)}")
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='*', help="files or directories to scan (default: ui, tickets, analytics "
+                                                 "plus the filter-built queries)")
+    parser.add_argument('--sqlite', metavar='PATH', help="explain against a SQLite file instead of MySQL")
+    args = parser.parse_args(argv)
+
+    if args.sqlite:
+        Config.DB_BACKEND = sqlite_backend.DIALECT
+        Config.SQLITE_PATH = args.sqlite
+    conn = get_db_connection()
+    if conn is None:
+        if Config.DB_BACKEND == sqlite_backend.DIALECT:
+            print(f"Cannot open the SQLite database {Config.SQLITE_PATH}")
+        else:
+            print("Cannot connect to the database; check the MYSQL_* settings")
+        return 2
+
+    statements = [(location, sql, None) for location, sql in extract_statements(args.paths or DEFAULT_PATHS)]
+    if not args.paths:
+        statements.extend(expanded_statements())
+
+    flagged = skipped = checked = 0
+    cursor = conn.cursor()
+    try:
+        for location, sql, params in statements:
+            if sql is None:
+                skipped += 1
+                print(f"SKIP  {location}: dynamic SQL")
+                continue
+            if not sql.lstrip().upper().startswith(EXPLAINABLE + ('INSERT',)):
+                continue
+            if sql.lstrip().upper().startswith('INSERT') and not re.search(r'\bSELECT\b', sql, re.IGNORECASE):
+                continue
+
+            checked += 1
+            try:
+                found = problems(explain(cursor, sql, params))
+            except Exception as e:
+                skipped += 1
+                print(f"SKIP  {location}: {e}")
+                continue
+
+            if found:
+                flagged += 1
+                print(f"FLAG  {location}: {'; '.join(found)}")
+                print(f"      {' '.join(sql.split())[:160]}")
+            else:
+                print(f"OK    {location}")
+    finally:
+        cursor.close()
+        conn.close()
+
+    print(f"\n{checked} statements explained, {flagged} flagged, {skipped} skipped")
+    return 1 if flagged else 0
+
+
+def _literal_sql(node):
+    """The SQL text of a str constant or f-string, None if it cannot be resolved"""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.JoinedStr):
+        parts = []
+        for value in node.values:
+            if isinstance(value, ast.Constant):
+                parts.append(value.value)
+            elif isinstance(value.value, ast.Name) and value.value.id in FSTRING_FIELDS:
+                parts.append(FSTRING_FIELDS[value.value.id])
+            elif _is_size(value.value):
+                parts.append('100')
+            else:
+                return None
+        return ''.join(parts)
+    return None
+
+
+def _is_size(node):
+    """A batch-size expression such as Config.ARCHIVE_CHUNK_SIZE or int(self.chunk_size)"""
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == 'int' and node.args:
+        node = node.args[0]
+    return isinstance(node, ast.Attribute) and node.attr.upper().endswith('SIZE')
+
+
+class _RecordingCursor:
+    """Connection and cursor stand-in that keeps each statement and returns no rows"""
+
+    description = ()
+
+    def __init__(self):
+        self.statements = []
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=()):
+        self.statements.append((sql, list(params)))
+
+    def fetchall(self):
+        return []
+
+    def fetchone(self):
+        return None
+
+    def close(self):
+        pass
+
+
+def _with_params(sql, params):
+    """Inline real parameters as SQL literals, in order"""
+    def literal(value):
+        if value is None:
+            return 'NULL'
+        if isinstance(value, bool):
+            return 'TRUE' if value else 'FALSE'
+        if isinstance(value, (int, float)):
+            return str(value)
+        if isinstance(value, (date, datetime)):
+            return f"'{value.isoformat(' ') if isinstance(value, datetime) else value.isoformat()}'"
+        return "'" + str(value).replace("'", "''") + "'"
+    values = iter(params)
+    return re.sub(r'%s', lambda match: literal(next(values)), sql)
+
+
+def _with_sample_values(sql):
+    """Replace each %s with a literal typed after the column it is compared with"""
+    def sample(match):
+        before = sql[:match.start()].rstrip().upper()
+        column = re.search(r'(\w+)\s*(?:=|<|>|<=|>=|<>|LIKE|IN\s*\((?:\s*%S\s*,)*)\s*$', before)
+        if before.endswith('LIMIT'):
+            return '10'
+        name = column.group(1).lower() if column else ''
+        if name.endswith('_at') or name in ('date', 'recorded_at'):
+            return "'2025-01-01 00:00:00'"
+        if name == 'id' or (name.endswith('_id') and name != 'message_id'):
+            return '1'
+        if name.startswith('is_'):
+            return 'TRUE'
+        return "'sample'"
+    return re.sub(r'%s', sample, sql)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+import uuid
+import feedback
+from database.connection import get_db_connection
+
+
+class Lease:
+    """A named, expiring lease row: at most one holder at a time across processes
+
+    Expiry is computed with the database clock (NOW()), so replicas with
+    skewed clocks agree on when a lease has lapsed. Every successful
+    acquire/renew bumps ``version``, which also guarantees the UPDATE reports
+    a changed row even when it lands in the same second as the last one.
+
+    ``holder`` names the owner for display; a random suffix makes every
+    Lease object a distinct holder, so two threads of one process never
+    both hold (or release) the same lease.
+    """
+
+    def __init__(self, name, holder, ttl_seconds):
+        self.name = name
+        self.holder = f"{holder}/{uuid.uuid4().hex[:8]}"
+        self.ttl_seconds = ttl_seconds
+
+    def acquire(self):
+        """Take the lease if it is free or lapsed, or extend it if already held; True if held"""
+        conn = get_db_connection()
+        if conn is None:
+            return False
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute('''
+                INSERT IGNORE INTO leases (name, holder, acquired_at, expires_at, version)
+                VALUES (%s, %s, NOW(), TIMESTAMPADD(SECOND, %s, NOW()), 0)
+            ''', (self.name, self.holder, self.ttl_seconds))
+            # acquired_at is assigned before holder, so it still sees the previous holder
+            cursor.execute('''
+                UPDATE leases
+                SET acquired_at = CASE WHEN holder = %s THEN acquired_at ELSE NOW() END,
+                    holder = %s,
+                    expires_at = TIMESTAMPADD(SECOND, %s, NOW()),
+                    version = version + 1
+                WHERE name = %s AND (holder = %s OR expires_at <= NOW())
+            ''', (self.holder, self.holder, self.ttl_seconds, self.name, self.holder))
+            held = cursor.rowcount == 1
+            conn.commit()
+            return held
+        except Exception as e:
+            conn.rollback()
+            feedback.error(f"Error acquiring lease {self.name}: {e}")
+            return False
+        finally:
+            cursor.close()
+            conn.close()
+
+    def release(self):
+        """Give the lease up now so a standby can take it without waiting for expiry"""
+        conn = get_db_connection()
+        if conn is None:
+            return False
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute('''
+                UPDATE leases SET expires_at = NOW(), version = version + 1
+                WHERE name = %s AND holder = %s
+            ''', (self.name, self.holder))
+            conn.commit()
+            return cursor.rowcount == 1
+        except Exception as e:
+            feedback.error(f"Error releasing lease {self.name}: {e}")
+            return False
+        finally:
+            cursor.close()
+            conn.close()
+
+    @staticmethod
+    def current(name):
+        """(holder, expires_at) of an unexpired lease, or None"""
+        conn = get_db_connection()
+        if conn is None:
+            return None
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute('''
+                SELECT holder, expires_at FROM leases
+                WHERE name = %s AND expires_at > NOW()
+            ''', (name,))
+            return cursor.fetchone()
+        finally:
+            cursor.close()
+            conn.close()
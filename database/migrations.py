@@ -0,0 +1,491 @@
+import hashlib
+import threading
+from datetime import datetime
+from mysql.connector import Error
+from config import Config
+from database.partitions import add_months, month_start, partition_definitions
+from database import sqlite_backend
+
+# Named lock that serializes migrations across processes sharing the database
+MIGRATION_LOCK = 'sacco_schema_migrations'
+MIGRATION_LOCK_TIMEOUT = 60  # seconds
+
+# MySQL error raised when schema_version does not exist yet
+ER_NO_SUCH_TABLE = 1146
+
+_schema_current = False
+_schema_lock = threading.Lock()
+
+
+def _v001_initial_schema(cursor):
+    """Users, tickets, rollups, IMAP sync state, analyzer cache and default users"""
+    # Create users table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            email VARCHAR(255) UNIQUE NOT NULL,
+            password_hash VARCHAR(255) NOT NULL,
+            name VARCHAR(255) NOT NULL,
+            role VARCHAR(100) DEFAULT 'Staff',
+            is_active BOOLEAN DEFAULT TRUE,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            last_login DATETIME,
+            INDEX idx_email (email),
+            INDEX idx_role (role)
+        )
+    ''')
+
+    # Create tickets table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tickets (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            message_id VARCHAR(255) UNIQUE,
+            subject TEXT,
+            sender_email VARCHAR(255),
+            sender_name VARCHAR(255),
+            body LONGTEXT,
+            assigned_to VARCHAR(255),
+            status VARCHAR(50) DEFAULT 'open',
+            priority VARCHAR(50) DEFAULT 'medium',
+            sentiment_score FLOAT DEFAULT 0.0,
+            urgency_level VARCHAR(50) DEFAULT 'normal',
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            assigned_at DATETIME,
+            resolved_at DATETIME,
+            resolved_by VARCHAR(255),
+            resolution_notes TEXT,
+            admin_notes TEXT,
+            ai_insights TEXT,
+            INDEX idx_status (status),
+            INDEX idx_assigned_to (assigned_to),
+            INDEX idx_priority (priority),
+            INDEX idx_created_at (created_at),
+            INDEX idx_sentiment (sentiment_score)
+        )
+    ''')
+
+    # Create analytics table (day/hour rollups per assignee and urgency)
+    _upgrade_analytics_table(cursor)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS analytics (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            metric_name VARCHAR(255),
+            metric_value DOUBLE,
+            recorded_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            period VARCHAR(50),
+            assigned_to VARCHAR(255) NOT NULL DEFAULT '',
+            urgency_level VARCHAR(50) NOT NULL DEFAULT '',
+            UNIQUE KEY uq_rollup (period, recorded_at, assigned_to, urgency_level, metric_name)
+        )
+    ''')
+
+    # Create IMAP sync state table (per-folder UID high-water mark)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS mail_sync_state (
+            folder VARCHAR(255) PRIMARY KEY,
+            uidvalidity BIGINT NOT NULL,
+            last_uid BIGINT NOT NULL DEFAULT 0,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Create analyzer result cache table (keyed by content hash + rules version)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS analysis_cache (
+            content_hash CHAR(64) NOT NULL,
+            analyzer_version CHAR(16) NOT NULL,
+            sentiment_score FLOAT,
+            sentiment_label VARCHAR(20),
+            urgency_level VARCHAR(50),
+            content_insights TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (content_hash, analyzer_version)
+        )
+    ''')
+
+    # Create default users
+    _create_default_users(cursor)
+
+
+def _v002_ticket_bodies(cursor):
+    """Move email bodies off the tickets row into ticket_bodies, keep a short preview"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ticket_bodies (
+            ticket_id INT PRIMARY KEY,
+            body LONGTEXT,
+            body_html LONGTEXT
+        )
+    ''')
+
+    if not _column_exists(cursor, 'tickets', 'body_preview'):
+        cursor.execute('ALTER TABLE tickets ADD COLUMN body_preview VARCHAR(300) AFTER sender_name')
+
+    if _column_exists(cursor, 'tickets', 'body'):
+        cursor.execute('''
+            INSERT IGNORE INTO ticket_bodies (ticket_id, body)
+            SELECT id, body FROM tickets
+        ''')
+        cursor.execute('''
+            UPDATE tickets
+            SET body_preview = LEFT(TRIM(REGEXP_REPLACE(body, '[[:space:]]+', ' ')), 300)
+            WHERE body_preview IS NULL
+        ''')
+        cursor.execute('ALTER TABLE tickets DROP COLUMN body')
+
+
+def _v003_tickets_archive(cursor):
+    """Cold store for old closed tickets, bodies kept COMPRESS()ed"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS tickets_archive (
+            id INT PRIMARY KEY,
+            message_id VARCHAR(255),
+            subject TEXT,
+            sender_email VARCHAR(255),
+            sender_name VARCHAR(255),
+            body_preview VARCHAR(300),
+            assigned_to VARCHAR(255),
+            status VARCHAR(50),
+            priority VARCHAR(50),
+            sentiment_score FLOAT,
+            urgency_level VARCHAR(50),
+            created_at DATETIME,
+            assigned_at DATETIME,
+            resolved_at DATETIME,
+            resolved_by VARCHAR(255),
+            resolution_notes TEXT,
+            admin_notes TEXT,
+            ai_insights TEXT,
+            body_compressed LONGBLOB,
+            body_html_compressed LONGBLOB,
+            archived_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_archive_message_id (message_id),
+            INDEX idx_archive_assigned_to (assigned_to),
+            INDEX idx_archive_created_at (created_at)
+        )
+    ''')
+
+
+def _v004_partition_tickets(cursor):
+    """RANGE-partition tickets by month of created_at
+
+    MySQL requires the partitioning column in every unique key, so the
+    primary key becomes (id, created_at) and message_id uniqueness moves
+    to ticket_message_ids, which also covers archived tickets.
+
+    Each ALTER commits on its own, so every step checks information_schema
+    first and a rerun resumes after a failure part-way through.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ticket_message_ids (
+            message_id VARCHAR(255) PRIMARY KEY,
+            ticket_id INT NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        INSERT IGNORE INTO ticket_message_ids (message_id, ticket_id)
+        SELECT message_id, id FROM tickets WHERE message_id IS NOT NULL
+    ''')
+    cursor.execute('''
+        INSERT IGNORE INTO ticket_message_ids (message_id, ticket_id)
+        SELECT message_id, id FROM tickets_archive WHERE message_id IS NOT NULL
+    ''')
+
+    if _index_exists(cursor, 'tickets', 'message_id'):
+        cursor.execute('UPDATE tickets SET created_at = COALESCE(assigned_at, NOW()) WHERE created_at IS NULL')
+        cursor.execute('''
+            ALTER TABLE tickets
+                DROP INDEX message_id,
+                ADD INDEX idx_message_id (message_id),
+                MODIFY created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                DROP PRIMARY KEY,
+                ADD PRIMARY KEY (id, created_at)
+        ''')
+
+    if _is_partitioned(cursor, 'tickets'):
+        return
+    cursor.execute('SELECT MIN(created_at) FROM tickets')
+    oldest = cursor.fetchone()[0] or datetime.now()
+    first_month = month_start(oldest)
+    last_month = add_months(month_start(datetime.now()), Config.PARTITION_MONTHS_AHEAD)
+    cursor.execute(f'''
+        ALTER TABLE tickets PARTITION BY RANGE COLUMNS (created_at) (
+            {partition_definitions(first_month, last_month)}
+        )
+    ''')
+
+
+def _v005_composite_ticket_indexes(cursor):
+    """Indexes matching the real filter + sort shapes; drops their single-column prefixes"""
+    cursor.execute('''
+        ALTER TABLE tickets
+            -- my open tickets (status + assignee, newest first); personal and
+            -- per-user stats read status/created_at/resolved_at from the index
+            ADD INDEX idx_assignee_status_created (assigned_to, status, created_at, resolved_at),
+            -- my recent activity; All Tickets filtered by assignee
+            ADD INDEX idx_assignee_created (assigned_to, created_at),
+            -- open tickets for manual assignment; All Tickets filtered by status
+            ADD INDEX idx_status_created (status, created_at),
+            -- recently closed; archival candidates
+            ADD INDEX idx_status_resolved (status, resolved_at),
+            -- round-robin "last assigned" lookup
+            ADD INDEX idx_assigned_at (assigned_at),
+            DROP INDEX idx_status,
+            DROP INDEX idx_assigned_to
+    ''')
+
+
+def _v006_worker_heartbeats(cursor):
+    """One row per ingestion worker process, refreshed while it runs"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS worker_heartbeats (
+            worker_id VARCHAR(255) PRIMARY KEY,
+            hostname VARCHAR(255) NOT NULL,
+            pid INT NOT NULL,
+            status VARCHAR(20) NOT NULL,
+            started_at DATETIME NOT NULL,
+            last_beat_at DATETIME NOT NULL,
+            tickets_created INT NOT NULL DEFAULT 0,
+            last_error TEXT,
+            INDEX idx_last_beat (last_beat_at)
+        )
+    ''')
+
+
+def _v007_leases(cursor):
+    """Named, expiring leases for single-leader background jobs"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS leases (
+            name VARCHAR(100) PRIMARY KEY,
+            holder VARCHAR(255) NOT NULL,
+            acquired_at DATETIME NOT NULL,
+            expires_at DATETIME NOT NULL,
+            version BIGINT NOT NULL DEFAULT 0
+        )
+    ''')
+
+
+def _v008_heartbeat_queue_depth(cursor):
+    """Local ingest queue depth reported with each worker heartbeat"""
+    cursor.execute('ALTER TABLE worker_heartbeats ADD COLUMN queue_depth INT NOT NULL DEFAULT 0')
+
+
+def _v009_ingest_jobs(cursor):
+    """Shared ingest queue claimed by ticket processors with FOR UPDATE SKIP LOCKED"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ingest_jobs (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            message_id VARCHAR(255) NOT NULL,
+            payload MEDIUMTEXT NOT NULL,
+            enqueued_at DATETIME NOT NULL,
+            attempts INT NOT NULL DEFAULT 0,
+            available_at DATETIME NOT NULL,
+            claim_token CHAR(32) NULL,
+            INDEX idx_available (available_at, id),
+            INDEX idx_claim_token (claim_token)
+        )
+    ''')
+
+
+def _v010_heartbeat_queue_depth_nullable(cursor):
+    """NULL queue_depth: the worker could not read its queue (database or spool unavailable)"""
+    cursor.execute('ALTER TABLE worker_heartbeats MODIFY queue_depth INT NULL')
+
+
+def _v011_ingest_job_dead_letters(cursor):
+    """Failure count, last error and dead-letter time for ingest jobs whose processing raises"""
+    cursor.execute('''
+        ALTER TABLE ingest_jobs
+            ADD COLUMN failures INT NOT NULL DEFAULT 0,
+            ADD COLUMN last_error VARCHAR(1000) NULL,
+            ADD COLUMN dead_at DATETIME NULL
+    ''')
+
+
+# Ordered (version, description, apply) triples. Append new schema changes
+# here with the next number; never edit or renumber a shipped migration.
+MIGRATIONS = [
+    (1, "Initial schema", _v001_initial_schema),
+    (2, "Move email bodies to ticket_bodies", _v002_ticket_bodies),
+    (3, "Add tickets_archive", _v003_tickets_archive),
+    (4, "Partition tickets by month", _v004_partition_tickets),
+    (5, "Composite ticket indexes", _v005_composite_ticket_indexes),
+    (6, "Add worker_heartbeats", _v006_worker_heartbeats),
+    (7, "Add leases", _v007_leases),
+    (8, "Add worker_heartbeats.queue_depth", _v008_heartbeat_queue_depth),
+    (9, "Add ingest_jobs", _v009_ingest_jobs),
+    (10, "Allow unknown worker_heartbeats.queue_depth", _v010_heartbeat_queue_depth_nullable),
+    (11, "Add ingest_jobs dead letters", _v011_ingest_job_dead_letters),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def ensure_schema(conn):
+    """Bring the schema up to date once per process; returns migrations applied
+
+    After the first successful call this returns immediately without touching
+    the database. Otherwise it costs one version query, plus the pending
+    migrations if any.
+    """
+    global _schema_current
+    if _schema_current:
+        return 0
+    with _schema_lock:
+        if _schema_current:
+            return 0
+        applied = 0
+        if current_version(conn) < LATEST_VERSION:
+            if getattr(conn, 'dialect', 'mysql') == sqlite_backend.DIALECT:
+                applied = create_sqlite_schema(conn)
+            else:
+                applied = migrate(conn)
+        _schema_current = True
+        return applied
+
+
+def is_schema_current():
+    """True once ensure_schema has succeeded in this process"""
+    return _schema_current
+
+
+def forget_schema():
+    """Make the next ensure_schema call check the database again (after a reset)"""
+    global _schema_current
+    with _schema_lock:
+        _schema_current = False
+
+
+def current_version(conn):
+    """Highest applied migration number, 0 on a database that predates migrations"""
+    cursor = conn.cursor()
+    try:
+        cursor.execute('SELECT MAX(version) FROM schema_version')
+        row = cursor.fetchone()
+        return (row[0] or 0) if row else 0
+    except Error as e:
+        if e.errno == ER_NO_SUCH_TABLE:
+            return 0
+        raise
+    finally:
+        cursor.close()
+
+
+def migrate(conn):
+    """Apply every pending migration in order; returns how many were applied
+
+    A MySQL named lock keeps two processes from migrating at the same time.
+    Each migration is recorded in schema_version as soon as it succeeds, so
+    a failure leaves the database at the last good version.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute('SELECT GET_LOCK(%s, %s)', (MIGRATION_LOCK, MIGRATION_LOCK_TIMEOUT))
+        if cursor.fetchone()[0] != 1:
+            raise Error(msg="Timed out waiting for another process to finish schema migrations")
+        try:
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INT PRIMARY KEY,
+                    description VARCHAR(255) NOT NULL,
+                    applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            cursor.execute('SELECT version FROM schema_version')
+            done = {row[0] for row in cursor.fetchall()}
+
+            applied = 0
+            for version, description, apply in MIGRATIONS:
+                if version in done:
+                    continue
+                apply(cursor)
+                cursor.execute(
+                    'INSERT INTO schema_version (version, description) VALUES (%s, %s)',
+                    (version, description)
+                )
+                conn.commit()
+                applied += 1
+            return applied
+        finally:
+            cursor.execute('SELECT RELEASE_LOCK(%s)', (MIGRATION_LOCK,))
+            cursor.fetchone()
+    finally:
+        cursor.close()
+
+
+def _column_exists(cursor, table, column):
+    cursor.execute('''
+        SELECT COUNT(*) FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+    ''', (table, column))
+    return cursor.fetchone()[0] > 0
+
+
+def _index_exists(cursor, table, index):
+    cursor.execute('''
+        SELECT COUNT(*) FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+    ''', (table, index))
+    return cursor.fetchone()[0] > 0
+
+
+def _is_partitioned(cursor, table):
+    cursor.execute('''
+        SELECT COUNT(*) FROM information_schema.partitions
+        WHERE table_schema = DATABASE() AND table_name = %s AND partition_name IS NOT NULL
+    ''', (table,))
+    return cursor.fetchone()[0] > 0
+
+
+def _upgrade_analytics_table(cursor):
+    """Drop the pre-rollup analytics table so it is recreated with rollup keys
+
+    The original table was never written to, so nothing is lost; the rollups
+    are filled in by the "Rebuild Analytics" maintenance action.
+    """
+    cursor.execute("SHOW TABLES LIKE 'analytics'")
+    if not cursor.fetchall():
+        return
+    cursor.execute("SHOW COLUMNS FROM analytics LIKE 'assigned_to'")
+    if not cursor.fetchall():
+        cursor.execute("DROP TABLE analytics")
+
+
+def create_sqlite_schema(conn):
+    """Create the current schema in one go on the SQLite backend; returns 1
+
+    SQLite databases are local and disposable, so instead of replaying the
+    MySQL migrations they get the finished schema and are stamped with
+    LATEST_VERSION.
+    """
+    conn.executescript(sqlite_backend.SCHEMA)
+    conn.add_missing_columns()
+    cursor = conn.cursor()
+    try:
+        _create_default_users(cursor)
+        cursor.executemany(
+            'INSERT IGNORE INTO schema_version (version, description) VALUES (%s, %s)',
+            [(version, description) for version, description, _ in MIGRATIONS]
+        )
+        conn.commit()
+        return 1
+    finally:
+        cursor.close()
+
+
+def _create_default_users(cursor):
+    """Create default users in the system"""
+    default_password = "admin123"  # ⚠️ Change in production
+    password_hash = hashlib.sha256(default_password.encode()).hexdigest()
+
+    default_users = [
+        ('bmogambi@co-opbank.co.ke', password_hash, 'B. Mogambi', 'IT Staff'),
+        ('llesiit@co-opbank.co.ke', password_hash, 'L. Lesiit', 'IT Staff'),
+        ('bnyakundi@co-opbank.co.ke', password_hash, 'B. Bildad', 'IT Staff'),
+        ('eotieno@co-opbank.co.ke', password_hash, 'Eva Admin', 'Admin'),
+        ('admin@sacco.co.ke', password_hash, 'System Administrator', 'Admin')
+    ]
+
+    cursor.executemany('''
+        INSERT IGNORE INTO users (email, password_hash, name, role)
+        VALUES (%s, %s, %s, %s)
+    ''', default_users)
@@ -20,7 +20,7 @@ class Ticket:
     subject: str
     sender_email: str
     sender_name: str
-    body: str
+    body_preview: str
     assigned_to: Optional[str] = None
     status: str = "open"
     priority: str = "medium"
@@ -34,10 +34,37 @@ class Ticket:
     admin_notes: Optional[str] = None
     ai_insights: Optional[str] = None
 
+@dataclass
+class TicketBody:
+    ticket_id: int
+    body: str
+    body_html: Optional[str] = None
+
 @dataclass
 class Analytics:
     id: Optional[int]
     metric_name: str
     metric_value: float
     recorded_at: Optional[datetime] = None
-    period: Optional[str] = None
\ No newline at end of file
+    period: Optional[str] = None
+    assigned_to: str = ""
+    urgency_level: str = ""
+
+@dataclass
+class MailSyncState:
+    folder: str
+    uidvalidity: int
+    last_uid: int = 0
+    updated_at: Optional[datetime] = None
+
+@dataclass
+class WorkerHeartbeat:
+    worker_id: str
+    hostname: str
+    pid: int
+    status: str
+    started_at: datetime
+    last_beat_at: datetime
+    tickets_created: int = 0
+    last_error: Optional[str] = None
+    queue_depth: Optional[int] = 0  # None when the queue could not be read
@@ -0,0 +1,197 @@
+from datetime import date, datetime
+from config import Config
+from database import sqlite_backend
+
+# Catch-all last partition; kept empty by creating monthly partitions ahead of time
+FUTURE_PARTITION = 'pfuture'
+
+
+def month_start(value):
+    """First day of the month containing value"""
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    """month (a first-of-month date) moved by count months"""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"p{month:%Y%m}"
+
+
+def partition_definitions(first_month, last_month):
+    """PARTITION clauses for every month from first_month to last_month, plus pfuture"""
+    definitions = []
+    month = first_month
+    while month <= last_month:
+        definitions.append(
+            f"PARTITION {partition_name(month)} VALUES LESS THAN ('{add_months(month, 1):%Y-%m-%d}')"
+        )
+        month = add_months(month, 1)
+    definitions.append(f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN (MAXVALUE)")
+    return ',\n'.join(definitions)
+
+
+def list_partitions(cursor):
+    """(name, upper bound, approximate rows) for each tickets partition, in order
+
+    Always empty on the SQLite backend, which has no partitioning, so the
+    maintenance helpers below do nothing there.
+    """
+    if getattr(cursor, 'dialect', 'mysql') == sqlite_backend.DIALECT:
+        return []
+    cursor.execute('''
+        SELECT partition_name, partition_description, table_rows
+        FROM information_schema.partitions
+        WHERE table_schema = DATABASE() AND table_name = 'tickets' AND partition_name IS NOT NULL
+        ORDER BY partition_ordinal_position
+    ''')
+    return cursor.fetchall()
+
+
+def ensure_future_partitions(conn, months_ahead=None):
+    """Split monthly partitions off the empty pfuture partition; returns names created
+
+    Keeps partitions defined through the current month plus
+    ``Config.PARTITION_MONTHS_AHEAD``. Because pfuture holds no rows while
+    this runs on schedule, REORGANIZE only rewrites metadata. Does nothing
+    if tickets is not partitioned.
+    """
+    months_ahead = months_ahead if months_ahead is not None else Config.PARTITION_MONTHS_AHEAD
+    cursor = conn.cursor()
+    try:
+        partitions = [row[0] for row in list_partitions(cursor) if row[0] != FUTURE_PARTITION]
+        if not partitions:
+            return []
+
+        last_month = datetime.strptime(partitions[-1][1:], '%Y%m').date()
+        target = add_months(month_start(datetime.now()), months_ahead)
+        if last_month >= target:
+            return []
+
+        first_new = add_months(last_month, 1)
+        cursor.execute(f'''
+            ALTER TABLE tickets REORGANIZE PARTITION {FUTURE_PARTITION} INTO (
+                {partition_definitions(first_new, target)}
+            )
+        ''')
+        created = []
+        month = first_new
+        while month <= target:
+            created.append(partition_name(month))
+            month = add_months(month, 1)
+        return created
+    finally:
+        cursor.close()
+
+
+def ensure_partitions_from(conn, first_month):
+    """Split months before the current first partition out of it; returns names created
+
+    Used when loading historical data. The first partition is rewritten, so
+    run this while it is small.
+    """
+    cursor = conn.cursor()
+    try:
+        partitions = [row[0] for row in list_partitions(cursor) if row[0] != FUTURE_PARTITION]
+        if not partitions:
+            return []
+
+        oldest = datetime.strptime(partitions[0][1:], '%Y%m').date()
+        if first_month >= oldest:
+            return []
+
+        definitions = partition_definitions(first_month, oldest).rsplit(',\n', 1)[0]
+        cursor.execute(f'''
+            ALTER TABLE tickets REORGANIZE PARTITION {partitions[0]} INTO (
+                {definitions}
+            )
+        ''')
+        created = []
+        month = first_month
+        while month < oldest:
+            created.append(partition_name(month))
+            month = add_months(month, 1)
+        return created
+    finally:
+        cursor.close()
+
+
+def drop_partition(conn, name):
+    """Drop one monthly partition of tickets (and its bodies) once every ticket in it is archived
+
+    Meant for months the archival job has already copied to
+    tickets_archive: dropping a partition is a metadata change regardless
+    of size. Raises ValueError if any ticket in the partition (open, or
+    closed but not yet archived) is missing from tickets_archive.
+    """
+    _check_partition_name(name)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f'''
+            SELECT COUNT(*) FROM tickets PARTITION ({name}) t
+            LEFT JOIN tickets_archive a ON a.id = t.id
+            WHERE a.id IS NULL
+        ''')
+        if cursor.fetchone()[0]:
+            raise ValueError(f"Partition {name} still holds tickets that are not archived")
+        cursor.execute(f'''
+            DELETE b FROM ticket_bodies b
+            JOIN tickets PARTITION ({name}) t ON t.id = b.ticket_id
+        ''')
+        conn.commit()
+        cursor.execute(f"ALTER TABLE tickets DROP PARTITION {name}")
+    finally:
+        cursor.close()
+
+
+def drop_empty_partitions(conn, before):
+    """Drop monthly partitions that end on or before the given date and hold no tickets
+
+    Pairs with TicketArchiver: once every ticket in a month has been
+    archived, the empty partition is removed. Returns the names dropped.
+    """
+    cursor = conn.cursor()
+    try:
+        candidates = [
+            name for name, _, _ in list_partitions(cursor)
+            if name != FUTURE_PARTITION and add_months(datetime.strptime(name[1:], '%Y%m').date(), 1) <= before
+        ]
+        empty = []
+        for name in candidates:
+            cursor.execute(f"SELECT 1 FROM tickets PARTITION ({name}) LIMIT 1")
+            if cursor.fetchone() is None:
+                empty.append(name)
+    finally:
+        cursor.close()
+
+    for name in empty:
+        drop_partition(conn, name)
+    return empty
+
+
+def exchange_partition(conn, name):
+    """Swap one monthly partition out into a standalone tickets_<name> table; returns its name
+
+    EXCHANGE PARTITION only swaps tablespace files, so a whole month leaves
+    the hot table in constant time and can then be exported or dropped on
+    its own. Bodies stay in ticket_bodies.
+    """
+    _check_partition_name(name)
+    target = f"tickets_{name}"
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"CREATE TABLE {target} LIKE tickets")
+        cursor.execute(f"ALTER TABLE {target} REMOVE PARTITIONING")
+        cursor.execute(f"ALTER TABLE tickets EXCHANGE PARTITION {name} WITH TABLE {target}")
+        return target
+    finally:
+        cursor.close()
+
+
+def _check_partition_name(name):
+    # Names are interpolated into DDL, so only accept the pYYYYMM shape we create
+    if len(name) != 7 or name[0] != 'p' or not name[1:].isdigit():
+        raise ValueError(f"Not a monthly tickets partition: {name}")
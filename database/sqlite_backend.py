@@ -0,0 +1,388 @@
+"""SQLite stand-in for the MySQL database, for local test and benchmark runs
+
+Selected with ``DB_BACKEND=sqlite`` (``Config.SQLITE_PATH`` picks the file,
+``:memory:`` for a process-wide in-memory database). Connections and cursors
+mimic the mysql.connector objects the app uses. Every statement is
+translated from the MySQL dialect the codebase is written in:
+
+- ``%s`` parameters become ``?`` and double-quoted literals single-quoted
+- ``INSERT IGNORE`` becomes ``INSERT OR IGNORE``
+- ``ON DUPLICATE KEY UPDATE c = VALUES(c)`` becomes ``ON CONFLICT DO UPDATE SET c = excluded.c``
+- ``FOR UPDATE [SKIP LOCKED]`` is dropped (SQLite locks the whole database on write)
+- ``TIMESTAMPDIFF``, ``TIMESTAMPADD``, ``COMPRESS``/``UNCOMPRESS``, ``CONVERT(... USING ...)``,
+  ``NOW()`` and ``GET_LOCK``/``RELEASE_LOCK`` are provided as functions
+
+sqlite3 errors are re-raised as the matching mysql.connector error classes,
+so existing ``except Error`` handlers keep working. MySQL stays the
+production backend; partition maintenance is a no-op here.
+"""
+import re
+import sqlite3
+import threading
+import zlib
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from mysql.connector import errors
+
+DIALECT = 'sqlite'
+
+# Current schema (all migrations applied); keep in step with database/migrations.py
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT NOT NULL,
+        applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        email TEXT UNIQUE NOT NULL,
+        password_hash TEXT NOT NULL,
+        name TEXT NOT NULL,
+        role TEXT DEFAULT 'Staff',
+        is_active BOOLEAN DEFAULT 1,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        last_login DATETIME
+    );
+    CREATE INDEX IF NOT EXISTS idx_role ON users (role);
+    CREATE TABLE IF NOT EXISTS tickets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        message_id TEXT,
+        subject TEXT,
+        sender_email TEXT,
+        sender_name TEXT,
+        body_preview TEXT,
+        assigned_to TEXT,
+        status TEXT DEFAULT 'open',
+        priority TEXT DEFAULT 'medium',
+        sentiment_score REAL DEFAULT 0.0,
+        urgency_level TEXT DEFAULT 'normal',
+        created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        assigned_at DATETIME,
+        resolved_at DATETIME,
+        resolved_by TEXT,
+        resolution_notes TEXT,
+        admin_notes TEXT,
+        ai_insights TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_message_id ON tickets (message_id);
+    CREATE INDEX IF NOT EXISTS idx_priority ON tickets (priority);
+    CREATE INDEX IF NOT EXISTS idx_created_at ON tickets (created_at);
+    CREATE INDEX IF NOT EXISTS idx_sentiment ON tickets (sentiment_score);
+    CREATE INDEX IF NOT EXISTS idx_assignee_status_created ON tickets (assigned_to, status, created_at, resolved_at);
+    CREATE INDEX IF NOT EXISTS idx_assignee_created ON tickets (assigned_to, created_at);
+    CREATE INDEX IF NOT EXISTS idx_status_created ON tickets (status, created_at);
+    CREATE INDEX IF NOT EXISTS idx_status_resolved ON tickets (status, resolved_at);
+    CREATE INDEX IF NOT EXISTS idx_assigned_at ON tickets (assigned_at);
+    CREATE TABLE IF NOT EXISTS ticket_bodies (
+        ticket_id INTEGER PRIMARY KEY,
+        body TEXT,
+        body_html TEXT
+    );
+    CREATE TABLE IF NOT EXISTS ticket_message_ids (
+        message_id TEXT PRIMARY KEY,
+        ticket_id INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS tickets_archive (
+        id INTEGER PRIMARY KEY,
+        message_id TEXT,
+        subject TEXT,
+        sender_email TEXT,
+        sender_name TEXT,
+        body_preview TEXT,
+        assigned_to TEXT,
+        status TEXT,
+        priority TEXT,
+        sentiment_score REAL,
+        urgency_level TEXT,
+        created_at DATETIME,
+        assigned_at DATETIME,
+        resolved_at DATETIME,
+        resolved_by TEXT,
+        resolution_notes TEXT,
+        admin_notes TEXT,
+        ai_insights TEXT,
+        body_compressed BLOB,
+        body_html_compressed BLOB,
+        archived_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_archive_message_id ON tickets_archive (message_id);
+    CREATE INDEX IF NOT EXISTS idx_archive_assigned_to ON tickets_archive (assigned_to);
+    CREATE INDEX IF NOT EXISTS idx_archive_created_at ON tickets_archive (created_at);
+    CREATE TABLE IF NOT EXISTS analytics (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        metric_name TEXT,
+        metric_value REAL,
+        recorded_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        period TEXT,
+        assigned_to TEXT NOT NULL DEFAULT '',
+        urgency_level TEXT NOT NULL DEFAULT '',
+        UNIQUE (period, recorded_at, assigned_to, urgency_level, metric_name)
+    );
+    CREATE TABLE IF NOT EXISTS mail_sync_state (
+        folder TEXT PRIMARY KEY,
+        uidvalidity INTEGER NOT NULL,
+        last_uid INTEGER NOT NULL DEFAULT 0,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS analysis_cache (
+        content_hash TEXT NOT NULL,
+        analyzer_version TEXT NOT NULL,
+        sentiment_score REAL,
+        sentiment_label TEXT,
+        urgency_level TEXT,
+        content_insights TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (content_hash, analyzer_version)
+    );
+    CREATE TABLE IF NOT EXISTS worker_heartbeats (
+        worker_id TEXT PRIMARY KEY,
+        hostname TEXT NOT NULL,
+        pid INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        started_at DATETIME NOT NULL,
+        last_beat_at DATETIME NOT NULL,
+        tickets_created INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT,
+        queue_depth INTEGER DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS idx_last_beat ON worker_heartbeats (last_beat_at);
+    CREATE TABLE IF NOT EXISTS leases (
+        name TEXT PRIMARY KEY,
+        holder TEXT NOT NULL,
+        acquired_at DATETIME NOT NULL,
+        expires_at DATETIME NOT NULL,
+        version INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS ingest_jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        message_id TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        enqueued_at DATETIME NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        available_at DATETIME NOT NULL,
+        claim_token TEXT,
+        failures INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT,
+        dead_at DATETIME
+    );
+    CREATE INDEX IF NOT EXISTS idx_available ON ingest_jobs (available_at, id);
+    CREATE INDEX IF NOT EXISTS idx_claim_token ON ingest_jobs (claim_token);
+'''
+
+# Columns added to a table after it first shipped: (table, column, declaration).
+# CREATE TABLE IF NOT EXISTS skips existing tables, so these are added separately.
+ADDED_COLUMNS = (
+    ('worker_heartbeats', 'queue_depth', 'INTEGER DEFAULT 0'),
+    ('ingest_jobs', 'failures', 'INTEGER NOT NULL DEFAULT 0'),
+    ('ingest_jobs', 'last_error', 'TEXT'),
+    ('ingest_jobs', 'dead_at', 'DATETIME'),
+)
+
+# Seconds per TIMESTAMPDIFF/TIMESTAMPADD unit
+_UNIT_SECONDS = {'SECOND': 1, 'MINUTE': 60, 'HOUR': 3600, 'DAY': 86400, 'WEEK': 604800}
+
+_STRING_LITERAL = re.compile(r"('(?:[^']|'')*')")
+_DOUBLE_QUOTED = re.compile(r'"([^"]*)"')
+_ON_DUPLICATE = re.compile(r'\bON\s+DUPLICATE\s+KEY\s+UPDATE\b', re.IGNORECASE)
+_VALUES_REF = re.compile(r'\bVALUES\((\w+)\)', re.IGNORECASE)
+_FOR_UPDATE = re.compile(r'\bFOR\s+UPDATE(\s+SKIP\s+LOCKED)?\b', re.IGNORECASE)
+_INSERT_IGNORE = re.compile(r'\bINSERT\s+IGNORE\b', re.IGNORECASE)
+_TIMESTAMP_UNIT = re.compile(r'\bTIMESTAMP(DIFF|ADD)\(\s*(\w+)\s*,', re.IGNORECASE)
+_CONVERT_USING = re.compile(r'\bCONVERT\((.+?)\s+USING\s+\w+\)', re.IGNORECASE | re.DOTALL)
+
+_memory_anchor = None
+_memory_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1024)
+def translate(sql):
+    """Rewrite one MySQL-dialect statement for SQLite (string literals are left alone)"""
+    parts = _STRING_LITERAL.split(sql)
+    for index in range(0, len(parts), 2):
+        part = parts[index]
+        part = part.replace('%s', '?')
+        part = _DOUBLE_QUOTED.sub(lambda match: "'" + match.group(1).replace("'", "''") + "'", part)
+        part = _INSERT_IGNORE.sub('INSERT OR IGNORE', part)
+        part = _FOR_UPDATE.sub('', part)
+        part = _TIMESTAMP_UNIT.sub(lambda match: f"TIMESTAMP{match.group(1).upper()}('{match.group(2).upper()}',", part)
+        part = _CONVERT_USING.sub(r'CAST(\1 AS TEXT)', part)
+        duplicate = _ON_DUPLICATE.search(part)
+        if duplicate:
+            part = (part[:duplicate.start()] + 'ON CONFLICT DO UPDATE SET'
+                    + _VALUES_REF.sub(r'excluded.\1', part[duplicate.end():]))
+        parts[index] = part
+    return ''.join(parts)
+
+
+class SQLiteCursor:
+    """mysql.connector-style cursor over sqlite3 that translates each statement"""
+
+    dialect = DIALECT
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, params=()):
+        with _mysql_errors():
+            self._cursor.execute(translate(sql), tuple(params or ()))
+
+    def executemany(self, sql, rows):
+        with _mysql_errors():
+            self._cursor.executemany(translate(sql), [tuple(row) for row in rows])
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size=1):
+        return self._cursor.fetchmany(size)
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """mysql.connector-style connection over sqlite3"""
+
+    dialect = DIALECT
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self):
+        return SQLiteCursor(self._conn.cursor())
+
+    def commit(self):
+        with _mysql_errors():
+            self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def ping(self, reconnect=False):
+        pass
+
+    def executescript(self, script):
+        with _mysql_errors():
+            self._conn.executescript(script)
+
+    def add_missing_columns(self):
+        """ALTER in any ADDED_COLUMNS an older database file lacks"""
+        with _mysql_errors():
+            for table, column, declaration in ADDED_COLUMNS:
+                existing = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+                if column not in existing:
+                    self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def connect(path):
+    """Open a connection to the SQLite database at path (':memory:' is shared per process)"""
+    global _memory_anchor
+    if path == ':memory:':
+        target, uri = 'file:sacco_tickets?mode=memory&cache=shared', True
+        with _memory_lock:
+            # Shared in-memory databases vanish with their last connection
+            if _memory_anchor is None:
+                _memory_anchor = _open(target, uri)
+    else:
+        target, uri = path, False
+
+    conn = _open(target, uri)
+    if not uri:
+        conn.execute('PRAGMA journal_mode=WAL')
+    return SQLiteConnection(conn)
+
+
+def _open(target, uri):
+    conn = sqlite3.connect(target, uri=uri, timeout=30, check_same_thread=False,
+                           detect_types=sqlite3.PARSE_DECLTYPES)
+    conn.create_function('TIMESTAMPDIFF', 3, _timestampdiff, deterministic=True)
+    conn.create_function('TIMESTAMPADD', 3, _timestampadd, deterministic=True)
+    conn.create_function('COMPRESS', 1, _compress, deterministic=True)
+    conn.create_function('UNCOMPRESS', 1, _uncompress, deterministic=True)
+    conn.create_function('NOW', 0, lambda: datetime.now().isoformat(' ', 'seconds'))
+    conn.create_function('GET_LOCK', 2, lambda name, timeout: 1)
+    conn.create_function('RELEASE_LOCK', 1, lambda name: 1)
+    return conn
+
+
+def _parse_datetime(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value.decode() if isinstance(value, bytes) else str(value))
+
+
+def _timestampdiff(unit, start, end):
+    """MySQL TIMESTAMPDIFF: whole units from start to end, truncated toward zero"""
+    if start is None or end is None:
+        return None
+    seconds = (_parse_datetime(end) - _parse_datetime(start)).total_seconds()
+    return int(seconds / _UNIT_SECONDS[unit.upper()])
+
+
+def _timestampadd(unit, amount, value):
+    """MySQL TIMESTAMPADD, returned in the same text form NOW() uses"""
+    if amount is None or value is None:
+        return None
+    moved = _parse_datetime(value) + timedelta(seconds=amount * _UNIT_SECONDS[unit.upper()])
+    return moved.isoformat(' ', 'seconds')
+
+
+def _compress(value):
+    if value is None:
+        return None
+    return zlib.compress(value.encode('utf-8') if isinstance(value, str) else value)
+
+
+def _uncompress(value):
+    if value is None:
+        return None
+    return zlib.decompress(value)
+
+
+class _mysql_errors:
+    """Re-raise sqlite3 errors as the mysql.connector error the app already catches"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None or not issubclass(exc_type, sqlite3.Error):
+            return False
+        message = str(exc_value)
+        if issubclass(exc_type, sqlite3.IntegrityError):
+            raise errors.IntegrityError(msg=message, errno=1062 if 'UNIQUE' in message else 1452) from exc_value
+        if 'no such table' in message:
+            raise errors.ProgrammingError(msg=message, errno=1146) from exc_value
+        if issubclass(exc_type, sqlite3.OperationalError):
+            raise errors.OperationalError(msg=message) from exc_value
+        raise errors.DatabaseError(msg=message) from exc_value
+
+
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(' '))
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_converter('DATETIME', _parse_datetime)
+sqlite3.register_converter('TIMESTAMP', _parse_datetime)
@@ -5,5 +5,9 @@ Handles email fetching, sending, and AI analysis
 
 from .fetcher import EmailFetcher
 from .analyzer import AIEmailAnalyzer
+from .watcher import MailboxWatcher
+from .session import MailboxSessionManager, get_session_manager
+from .pipeline import IngestPipeline, StageStats
 
-__all__ = ['EmailFetcher', 'AIEmailAnalyzer']
\ No newline at end of file
+__all__ = ['EmailFetcher', 'AIEmailAnalyzer', 'MailboxWatcher', 'MailboxSessionManager', 'get_session_manager',
+           'IngestPipeline', 'StageStats']
\ No newline at end of file
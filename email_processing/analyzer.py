@@ -1,20 +1,87 @@
+import hashlib
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import CancelledError, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from importlib import metadata
 from textblob import TextBlob
 from datetime import datetime
 import pandas as pd
+from config import Config
+from email_processing.cache import AnalysisCache
+from email_processing.keywords import KeywordMatcher, MATCHER_VERSION
+
+NEUTRAL_SENTIMENT = (0.0, 'neutral')
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _sentiment_chunk(texts):
+    """Process-pool task: sentiment for one chunk of texts"""
+    return [AIEmailAnalyzer.analyze_sentiment(text) for text in texts]
+
+
+def _get_pool():
+    """(pool, worker count) for the shared worker pool, started on first use
+
+    Uses spawn, so no Streamlit threads are forked.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None:
+            _pool_workers = Config.ANALYZER_WORKERS or os.cpu_count()
+            _pool = ProcessPoolExecutor(
+                max_workers=_pool_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _pool, _pool_workers
+
+
+def _reset_pool(pool):
+    """Drop pool, if still the shared one, so the next batch starts a fresh pool
+
+    Queued chunks are cancelled and nothing is waited for. A worker busy on
+    a chunk is not killed; it exits once that chunk finishes.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool is pool:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
 
 class AIEmailAnalyzer:
+    # Detection rules. Any change here alters ANALYZER_VERSION, which
+    # invalidates every cached analysis result automatically.
+    URGENT_KEYWORDS = ('urgent', 'emergency', 'asap', 'immediately', 'critical', 'broken', 'down')
+    HIGH_KEYWORDS = ('important', 'priority', 'attention', 'issue', 'problem')
+    HIGH_KEYWORD_THRESHOLD = 2
+    SENTIMENT_THRESHOLD = 0.1
+    INSIGHT_RULES = (
+        ("🔐 Security-related issue detected", ('password', 'login', 'access')),
+        ("⚡ Performance issue identified", ('slow', 'performance', 'lag')),
+        ("🐛 Technical error reported", ('error', 'failed', 'crash')),
+    )
+    
     @staticmethod
     def analyze_sentiment(text):
         """Analyze sentiment of email content"""
         if not text or len(text.strip()) < 10:
-            return 0.0, 'neutral'
+            return NEUTRAL_SENTIMENT
         
         analysis = TextBlob(text)
         sentiment_score = analysis.sentiment.polarity
         
-        if sentiment_score > 0.1:
+        if sentiment_score > AIEmailAnalyzer.SENTIMENT_THRESHOLD:
             sentiment_label = 'positive'
-        elif sentiment_score < -0.1:
+        elif sentiment_score < -AIEmailAnalyzer.SENTIMENT_THRESHOLD:
             sentiment_label = 'negative'
         else:
             sentiment_label = 'neutral'
@@ -22,19 +89,65 @@ class AIEmailAnalyzer:
         return sentiment_score, sentiment_label
     
     @staticmethod
-    def detect_urgency(subject, body):
-        """Detect urgency level based on content analysis"""
-        text = f"{subject} {body}".lower()
+    def analyze_batch(texts, chunk_size=None):
+        """Sentiment for many texts, fanned out across a process pool
+
+        Returns (score, label) tuples in input order. Batches smaller than
+        Config.ANALYZER_POOL_MIN_BATCH run in-process so small fetches never
+        pay pool startup. The batch gets one deadline, set at submission: the
+        time the chunks would take if every message used its full
+        Config.ANALYZER_TIMEOUT. Chunks not done by then score as neutral
+        rather than stalling ingestion. The pool is then replaced, so a hung
+        worker stops taking new work; it exits once its chunk finishes.
+        """
+        texts = list(texts)
+        if len(texts) < Config.ANALYZER_POOL_MIN_BATCH:
+            return [AIEmailAnalyzer.analyze_sentiment(text) for text in texts]
         
-        urgent_keywords = ['urgent', 'emergency', 'asap', 'immediately', 'critical', 'broken', 'down']
-        high_keywords = ['important', 'priority', 'attention', 'issue', 'problem']
+        pool, workers = _get_pool()
+        if chunk_size is None:
+            # ~4 chunks per worker balances uneven message sizes against IPC overhead
+            chunk_size = max(1, math.ceil(len(texts) / (workers * 4)))
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
         
-        urgent_count = sum(1 for keyword in urgent_keywords if keyword in text)
-        high_count = sum(1 for keyword in high_keywords if keyword in text)
+        try:
+            futures = [pool.submit(_sentiment_chunk, chunk) for chunk in chunks]
+        except BrokenProcessPool:
+            _reset_pool(pool)
+            return [AIEmailAnalyzer.analyze_sentiment(text) for text in texts]
+        # Chunks run in waves of `workers`; each wave may take chunk_size full per-message timeouts
+        deadline = time.monotonic() + Config.ANALYZER_TIMEOUT * chunk_size * math.ceil(len(chunks) / workers)
+        
+        results = []
+        for chunk, future in zip(chunks, futures):
+            try:
+                results.extend(future.result(timeout=max(0.0, deadline - time.monotonic())))
+            except (FutureTimeoutError, CancelledError):
+                # Past the deadline nothing more is awaited; later chunks take what is already done
+                _reset_pool(pool)
+                results.extend([NEUTRAL_SENTIMENT] * len(chunk))
+            except BrokenProcessPool:
+                _reset_pool(pool)
+                results.extend(AIEmailAnalyzer.analyze_sentiment(text) for text in chunk)
+        return results
+    
+    @staticmethod
+    def keyword_hits(subject, body):
+        """Every urgency/insight keyword present, found in a single scan"""
+        return _keyword_matcher.find(f"{subject} {body}")
+    
+    @staticmethod
+    def detect_urgency(subject, body, hits=None):
+        """Detect urgency level based on content analysis"""
+        if hits is None:
+            hits = AIEmailAnalyzer.keyword_hits(subject, body)
+        
+        urgent_count = len(hits.intersection(AIEmailAnalyzer.URGENT_KEYWORDS))
+        high_count = len(hits.intersection(AIEmailAnalyzer.HIGH_KEYWORDS))
         
         if urgent_count > 0:
             return 'urgent'
-        elif high_count > 2:
+        elif high_count > AIEmailAnalyzer.HIGH_KEYWORD_THRESHOLD:
             return 'high'
         else:
             return 'normal'
@@ -61,14 +174,95 @@ class AIEmailAnalyzer:
         elif sentiment_score > 0.3:
             insights.append("😊 Customer seems satisfied")
         
-        # Content-based insights
-        body = f"{ticket_data.get('subject', '')} {ticket_data.get('body', '')}".lower()
-        
-        if any(word in body for word in ['password', 'login', 'access']):
-            insights.append("🔐 Security-related issue detected")
-        if any(word in body for word in ['slow', 'performance', 'lag']):
-            insights.append("⚡ Performance issue identified")
-        if any(word in body for word in ['error', 'failed', 'crash']):
-            insights.append("🐛 Technical error reported")
+        # Content-based insights (precomputed and cached when the email was analyzed)
+        content_insights = ticket_data.get('content_insights')
+        if content_insights is None:
+            content_insights = AIEmailAnalyzer.content_insights(
+                ticket_data.get('subject', ''), ticket_data.get('body', '')
+            )
+        insights.extend(content_insights)
             
-        return insights
\ No newline at end of file
+        return insights
+    
+    @staticmethod
+    def content_insights(subject, body, hits=None):
+        """Insights that depend only on the email text"""
+        if hits is None:
+            hits = AIEmailAnalyzer.keyword_hits(subject, body)
+        return [
+            insight for insight, keywords in AIEmailAnalyzer.INSIGHT_RULES
+            if hits.intersection(keywords)
+        ]
+    
+    @staticmethod
+    def analyze_contents(items):
+        """Full content analysis for (subject, body) pairs, served from the cache when possible
+
+        Returns one dict per item, in order, with sentiment_score,
+        sentiment_label, urgency_level and content_insights. Only cache misses
+        are analyzed, and their sentiment goes through analyze_batch.
+        """
+        cache = AIEmailAnalyzer.get_cache()
+        items = list(items)
+        keys = [cache.key(subject, body) for subject, body in items]
+        results = cache.get_many(keys)
+        
+        # First occurrence of each uncached key; repeats inside the batch share it
+        missing = {}
+        for key, item in zip(keys, items):
+            if key not in results and key not in missing:
+                missing[key] = item
+        
+        if missing:
+            sentiments = AIEmailAnalyzer.analyze_batch(body for _, body in missing.values())
+            computed = {}
+            for (key, (subject, body)), (sentiment_score, sentiment_label) in zip(missing.items(), sentiments):
+                hits = AIEmailAnalyzer.keyword_hits(subject, body)
+                computed[key] = {
+                    'sentiment_score': sentiment_score,
+                    'sentiment_label': sentiment_label,
+                    'urgency_level': AIEmailAnalyzer.detect_urgency(subject, body, hits),
+                    'content_insights': AIEmailAnalyzer.content_insights(subject, body, hits)
+                }
+            cache.put_many(computed)
+            results.update(computed)
+        
+        return [results[key] for key in keys]
+    
+    @staticmethod
+    def get_cache():
+        """Process-wide analysis result cache"""
+        global _cache
+        with _cache_lock:
+            if _cache is None:
+                _cache = AnalysisCache(
+                    ANALYZER_VERSION,
+                    max_entries=Config.ANALYSIS_CACHE_SIZE,
+                    persistent=Config.ANALYSIS_CACHE_PERSIST
+                )
+                # Once per process: drop rows left by older rule versions or past their age
+                _cache.prune(Config.ANALYSIS_CACHE_MAX_AGE_DAYS)
+            return _cache
+
+
+def _rules_version():
+    """Short fingerprint of every rule that shapes an analysis result"""
+    rules = repr((
+        AIEmailAnalyzer.URGENT_KEYWORDS,
+        AIEmailAnalyzer.HIGH_KEYWORDS,
+        AIEmailAnalyzer.HIGH_KEYWORD_THRESHOLD,
+        AIEmailAnalyzer.SENTIMENT_THRESHOLD,
+        AIEmailAnalyzer.INSIGHT_RULES,
+        MATCHER_VERSION,
+        metadata.version('textblob'),
+    ))
+    return hashlib.sha256(rules.encode()).hexdigest()[:16]
+
+
+_keyword_matcher = KeywordMatcher(
+    AIEmailAnalyzer.URGENT_KEYWORDS
+    + AIEmailAnalyzer.HIGH_KEYWORDS
+    + tuple(word for _, keywords in AIEmailAnalyzer.INSIGHT_RULES for word in keywords)
+)
+
+ANALYZER_VERSION = _rules_version()
\ No newline at end of file
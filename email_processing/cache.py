@@ -0,0 +1,179 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from mysql.connector import Error
+import feedback
+from database.connection import get_db_connection
+
+
+class AnalysisCache:
+    """Content-hash keyed cache of analyzer results
+
+    A bounded in-memory LRU sits in front of the ``analysis_cache`` table,
+    so repeat newsletters, auto-replies and forwarded chains are analyzed
+    once across restarts and across processes. Entries are keyed by
+    (normalized-content hash, analyzer version). Changing any detection rule
+    changes the version, so stale results are never served, and prune()
+    deletes them along with rows older than the configured maximum age.
+    """
+
+    def __init__(self, version, max_entries, persistent=True):
+        self.version = version
+        self.max_entries = max_entries
+        self.persistent = persistent
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'memory_hits': 0, 'persistent_hits': 0, 'misses': 0, 'persistent_errors': 0}
+
+    @staticmethod
+    def key(subject, body):
+        """Hash of the case- and whitespace-normalized subject and body"""
+        normalized = f"{' '.join((subject or '').lower().split())}\n{' '.join((body or '').lower().split())}"
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    def get_many(self, keys):
+        """Return {key: result} for every key found in memory or the table"""
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    found[key] = self._entries[key]
+                    self._stats['memory_hits'] += 1
+
+        remaining = [key for key in dict.fromkeys(keys) if key not in found]
+        if remaining and self.persistent:
+            loaded = self._load(remaining)
+            found.update(loaded)
+            with self._lock:
+                self._stats['persistent_hits'] += len(loaded)
+                for key, result in loaded.items():
+                    self._remember(key, result)
+            remaining = [key for key in remaining if key not in loaded]
+
+        with self._lock:
+            self._stats['misses'] += len(remaining)
+        return found
+
+    def put_many(self, results):
+        """Store freshly computed {key: result} entries in both tiers"""
+        with self._lock:
+            for key, result in results.items():
+                self._remember(key, result)
+        if results and self.persistent:
+            self._store(results)
+
+    def clear(self):
+        """Drop every cached result, in memory and in the table; True on success"""
+        with self._lock:
+            self._entries.clear()
+        if not self.persistent:
+            return True
+        conn = get_db_connection()
+        if conn is None:
+            return False
+        cursor = conn.cursor()
+        try:
+            cursor.execute('DELETE FROM analysis_cache')
+            conn.commit()
+            return True
+        except Error as e:
+            feedback.error(f"Error clearing analysis cache: {e}")
+            return False
+        finally:
+            cursor.close()
+            conn.close()
+
+    def prune(self, max_age_days):
+        """Delete table rows from other analyzer versions or older than max_age_days; returns rows deleted"""
+        if not self.persistent:
+            return 0
+        conn = get_db_connection()
+        if conn is None:
+            return 0
+        cursor = conn.cursor()
+        try:
+            cursor.execute('''
+                DELETE FROM analysis_cache
+                WHERE analyzer_version <> %s OR created_at < TIMESTAMPADD(DAY, %s, NOW())
+            ''', (self.version, -max_age_days))
+            conn.commit()
+            return cursor.rowcount
+        except Error as e:
+            feedback.error(f"Error pruning analysis cache: {e}")
+            return 0
+        finally:
+            cursor.close()
+            conn.close()
+
+    def stats(self):
+        """Hit/miss counters plus the overall hit rate"""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot['size'] = len(self._entries)
+        lookups = snapshot['memory_hits'] + snapshot['persistent_hits'] + snapshot['misses']
+        snapshot['hit_rate'] = (lookups - snapshot['misses']) / lookups if lookups else 0.0
+        snapshot['version'] = self.version
+        return snapshot
+
+    def _remember(self, key, result):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _load(self, keys):
+        conn = get_db_connection()
+        if conn is None:
+            return {}
+        cursor = conn.cursor()
+        try:
+            placeholders = ', '.join(['%s'] * len(keys))
+            cursor.execute(f'''
+                SELECT content_hash, sentiment_score, sentiment_label, urgency_level, content_insights
+                FROM analysis_cache
+                WHERE analyzer_version = %s AND content_hash IN ({placeholders})
+            ''', [self.version] + list(keys))
+            return {
+                row[0]: {
+                    'sentiment_score': row[1],
+                    'sentiment_label': row[2],
+                    'urgency_level': row[3],
+                    'content_insights': row[4].split('; ') if row[4] else []
+                }
+                for row in cursor.fetchall()
+            }
+        except Exception:
+            # The cache is an optimization; a failing table just means misses
+            with self._lock:
+                self._stats['persistent_errors'] += 1
+            return {}
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _store(self, results):
+        conn = get_db_connection()
+        if conn is None:
+            return
+        cursor = conn.cursor()
+        try:
+            cursor.executemany('''
+                INSERT IGNORE INTO analysis_cache
+                (content_hash, analyzer_version, sentiment_score, sentiment_label, urgency_level, content_insights)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            ''', [(
+                key,
+                self.version,
+                result['sentiment_score'],
+                result['sentiment_label'],
+                result['urgency_level'],
+                '; '.join(result['content_insights'])
+            ) for key, result in results.items()])
+            conn.commit()
+        except Exception:
+            with self._lock:
+                self._stats['persistent_errors'] += 1
+        finally:
+            cursor.close()
+            conn.close()
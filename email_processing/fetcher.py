@@ -1,64 +1,187 @@
-import streamlit as st
-from imap_tools import MailBox, AND
-from config import EmailConfig
+import imaplib
+import feedback
+from imap_tools import AND, U
+from config import Config, EmailConfig
 from email_processing.analyzer import AIEmailAnalyzer
+from email_processing.flags import committed_uids, store_flags
+from email_processing.session import get_session_manager
+from email_processing.sync_state import SyncStateStore
 
 class EmailFetcher:
-    def __init__(self, config: EmailConfig):
+    FOLDER = 'INBOX'
+    
+    def __init__(self, config: EmailConfig, dedicated=False):
         self.config = config
+        # Long-lived holders (the watcher) log in outside the shared pool
+        self.dedicated = dedicated
         self.mailbox = None
         self.analyzer = AIEmailAnalyzer()
+        self._sync = None
     
     def connect(self):
         try:
-            if st.session_state.get('debug', False):
-                st.info("🔧 Debug: Connecting to email server...")
+            if feedback.debug_enabled():
+                feedback.info("🔧 Debug: Connecting to email server...")
                 
-            self.mailbox = MailBox(self.config.imap_server)
-            self.mailbox.login(self.config.email, self.config.password, initial_folder='INBOX')
+            # Reuses a logged-in session when one is idle in the shared manager
+            manager = get_session_manager()
+            self.mailbox = manager.open_dedicated() if self.dedicated else manager.acquire()
             
-            if st.session_state.get('debug', False):
-                st.success("🔧 Debug: Email connection successful")
+            if feedback.debug_enabled():
+                feedback.success("🔧 Debug: Email connection successful")
             return True
         except Exception as e:
-            st.error(f"Failed to connect to email: {e}")
+            feedback.error(f"Failed to connect to email: {e}")
             return False
     
     def fetch_emails(self):
+        """Fetch, parse and analyze all new mail into a list (see IngestPipeline for streaming)"""
         if not self.mailbox:
             if not self.connect():
                 return []
         
         try:
-            emails = []
-            for msg in self.mailbox.fetch(AND(seen=False)):
-                # AI Analysis
-                sentiment_score, sentiment_label = self.analyzer.analyze_sentiment(msg.text or msg.html)
-                urgency_level = self.analyzer.detect_urgency(msg.subject, msg.text or msg.html)
-                
-                email_data = {
-                    'message_id': msg.uid,
-                    'subject': msg.subject or 'No Subject',
-                    'sender_email': msg.from_,
-                    'sender_name': msg.from_values.name or msg.from_,
-                    'body': msg.text or msg.html or 'No content',
-                    'date': msg.date,
-                    'sentiment_score': sentiment_score,
-                    'sentiment_label': sentiment_label,
-                    'urgency_level': urgency_level
-                }
-                emails.append(email_data)
+            try:
+                emails = self._fetch_all()
+            except (imaplib.IMAP4.abort, OSError):
+                # The server dropped the session: reconnect once and retry
+                self.disconnect(broken=True)
+                if not self.connect():
+                    return []
+                emails = self._fetch_all()
             
-            if st.session_state.get('debug', False):
-                st.info(f"🔧 Debug: Fetched {len(emails)} new emails")
+            if feedback.debug_enabled():
+                feedback.info(f"🔧 Debug: Fetched {len(emails)} new emails")
                 
             return emails
         except Exception as e:
-            st.error(f"Error fetching emails: {e}")
+            feedback.error(f"Error fetching emails: {e}")
             return []
     
-    def disconnect(self):
+    def _fetch_all(self):
+        emails = self.analyze_emails([self.parse_message(msg) for msg in self.iter_new_messages()])
+        self.commit_sync()
+        return emails
+    
+    def iter_new_messages(self):
+        """Yield raw messages above the saved UID high-water mark
+
+        Messages are fetched with BODY.PEEK in UID FETCHes of
+        INGEST_BATCH_SIZE, so memory does not grow with the backlog and
+        nothing is marked read on the server. Progress is only persisted when
+        the caller invokes commit_sync(), and messages are flagged only via
+        flag_ingested() once their tickets are committed.
+        """
+        status = self.mailbox.folder.status(self.FOLDER, ['UIDVALIDITY', 'UIDNEXT'])
+        state = SyncStateStore.load(self.FOLDER)
+        criteria, last_uid = self._sync_criteria(state, status['UIDVALIDITY'])
+        self._sync = {
+            'uidvalidity': status['UIDVALIDITY'],
+            # A first-run/resync search is not ordered from the mark, so only a
+            # completed cycle may move it (to at least UIDNEXT - 1)
+            'baseline': last_uid == 0,
+            'high_water': last_uid or status['UIDNEXT'] - 1,
+        }
+        
+        for msg in self.mailbox.fetch(criteria, mark_seen=False, bulk=max(2, Config.INGEST_BATCH_SIZE)):
+            uid = int(msg.uid)
+            # "UID n:*" always returns the newest message, even when n is past it
+            if uid <= last_uid:
+                continue
+            self._sync['high_water'] = max(self._sync['high_water'], uid)
+            yield msg
+    
+    def commit_sync(self, upto_uid=None):
+        """Persist sync progress
+
+        upto_uid records a partially drained cycle (every UID up to it has been
+        stored); None records that iter_new_messages() was fully consumed.
+        """
+        sync = self._sync
+        if upto_uid is None:
+            mark = sync['high_water']
+        elif sync['baseline']:
+            return
+        else:
+            mark = upto_uid
+        SyncStateStore.save(self.FOLDER, sync['uidvalidity'], mark)
+    
+    def flag_ingested(self, emails, outcomes):
+        """Set Config.IMAP_INGESTED_FLAGS on emails whose tickets committed, in one UID STORE
+
+        Emails whose ticket was not created ("no_staff", "db_error") stay
+        unflagged, and so unread, in the mailbox.
+        """
+        try:
+            store_flags(self.mailbox, committed_uids(emails, outcomes))
+        except Exception as e:
+            feedback.warning(f"⚠️ Could not flag ingested emails on the server: {e}")
+    
+    def parse_message(self, msg):
+        """Turn an imap_tools message into the email dict TicketManager expects"""
+        return {
+            'message_id': self._message_id(msg),
+            'uid': int(msg.uid),
+            'uidvalidity': self._sync['uidvalidity'] if self._sync else None,
+            'subject': msg.subject or 'No Subject',
+            'sender_email': msg.from_,
+            'sender_name': msg.from_values.name or msg.from_,
+            'body': msg.text or msg.html or 'No content',
+            'body_html': msg.html or None,
+            'date': msg.date,
+        }
+    
+    def analyze_emails(self, emails):
+        """Add sentiment, urgency and content insights to parsed email dicts
+
+        Results come from the analysis cache where possible; misses are
+        scored in one batch through the analyzer's process pool.
+        """
+        results = self.analyzer.analyze_contents(
+            (email_data['subject'], email_data['body']) for email_data in emails
+        )
+        for email_data, result in zip(emails, results):
+            email_data.update(result)
+        return emails
+    
+    def analyze_email(self, email_data):
+        """Single-email form of analyze_emails"""
+        return self.analyze_emails([email_data])[0]
+    
+    def _sync_criteria(self, state, uidvalidity):
+        """Pick the IMAP search for this cycle and the UID already ingested
+
+        Returns (criteria, last_uid). last_uid is 0 when the saved mark cannot
+        be trusted and the high-water mark has to be re-established.
+        """
+        if state is None:
+            # First run: pick up whatever the old unseen-based loop would have
+            return AND(seen=False), 0
+        
+        if state.uidvalidity != uidvalidity:
+            # UIDs were renumbered by the server: resync everything received
+            # since the last good sync; message_id dedupe drops repeats
+            feedback.warning(f"📬 {self.FOLDER} UIDVALIDITY changed "
+                       f"({state.uidvalidity} → {uidvalidity}), resyncing since {state.updated_at:%Y-%m-%d}")
+            return AND(date_gte=state.updated_at.date()), 0
+        
+        return AND(uid=U(state.last_uid + 1, '*')), state.last_uid
+    
+    @staticmethod
+    def _message_id(msg):
+        """Stable ticket key: the Message-ID header, falling back to the UID"""
+        header = msg.headers.get('message-id')
+        if header and header[0].strip():
+            return header[0].strip()[:255]
+        return msg.uid
+    
+    def disconnect(self, broken=False):
+        """Hand the session back to the shared manager (logged out if broken or dedicated)"""
         if self.mailbox:
-            self.mailbox.logout()
-            if st.session_state.get('debug', False):
-                st.info("🔧 Debug: Disconnected from email server")
\ No newline at end of file
+            if self.dedicated:
+                get_session_manager().close_dedicated(self.mailbox)
+            else:
+                get_session_manager().release(self.mailbox, broken=broken)
+            self.mailbox = None
+            if feedback.debug_enabled():
+                feedback.info("🔧 Debug: Released email session")
\ No newline at end of file
@@ -0,0 +1,59 @@
+import feedback
+from config import Config
+from email_processing.session import get_session_manager
+
+# Outcomes whose ticket was not committed; those messages are left unflagged
+UNCOMMITTED_OUTCOMES = ("no_staff", "db_error", "queued", "failed")
+
+
+def sequence_set(uids):
+    """Compact IMAP sequence set for UIDs, e.g. [1, 2, 3, 7, 9, 10] -> '1:3,7,9:10'"""
+    ranges = []
+    for uid in sorted(set(uids)):
+        if ranges and uid == ranges[-1][1] + 1:
+            ranges[-1][1] = uid
+        else:
+            ranges.append([uid, uid])
+    return ','.join(str(first) if first == last else f"{first}:{last}" for first, last in ranges)
+
+
+def store_flags(mailbox, uids, flags=None):
+    """Add flags to every UID in one UID STORE (no expunge, no per-message responses)
+
+    imap_tools' MailBox.flag() would also EXPUNGE after the STORE, so the
+    command is issued on the underlying client directly.
+    """
+    if not uids:
+        return
+    flags = flags or Config.IMAP_INGESTED_FLAGS
+    status, data = mailbox.client.uid('STORE', sequence_set(uids), '+FLAGS.SILENT', f"({flags})")
+    if status != 'OK':
+        raise RuntimeError(f"UID STORE {flags} failed: {data}")
+
+
+def committed_uids(emails, outcomes):
+    """UIDs of the emails whose tickets are in the database (created, or already there)"""
+    return [email_data['uid'] for email_data, outcome in zip(emails, outcomes)
+            if outcome not in UNCOMMITTED_OUTCOMES]
+
+
+def flag_committed(emails, outcomes, folder='INBOX'):
+    """Flag committed emails from a queue consumer, on a pooled IMAP session
+
+    Spooled emails carry the UIDVALIDITY they were fetched under. UIDs from
+    an older UIDVALIDITY no longer name the same messages and are skipped.
+    Failures are reported and swallowed: the tickets are already committed
+    and the UID mark, not the flags, decides what is fetched next.
+    """
+    uids = committed_uids(emails, outcomes)
+    if not uids:
+        return
+    try:
+        with get_session_manager().session() as mailbox:
+            uidvalidity = mailbox.folder.status(folder, ['UIDVALIDITY'])['UIDVALIDITY']
+            store_flags(mailbox, [
+                email_data['uid'] for email_data in emails
+                if email_data['uid'] in uids and email_data.get('uidvalidity') == uidvalidity
+            ])
+    except Exception as e:
+        feedback.warning(f"⚠️ Could not flag {len(uids)} ingested emails on the server: {e}")
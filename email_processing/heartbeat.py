@@ -0,0 +1,68 @@
+import feedback
+from datetime import datetime, timedelta
+from database.connection import get_db_connection
+from database.models import WorkerHeartbeat
+
+
+class HeartbeatStore:
+    """Liveness rows for ingestion workers (worker_heartbeats)"""
+
+    @staticmethod
+    def beat(heartbeat: WorkerHeartbeat):
+        """Insert or refresh a worker's row, stamping last_beat_at with now"""
+        conn = get_db_connection()
+        if conn is None:
+            return False
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute('''
+                INSERT INTO worker_heartbeats
+                (worker_id, hostname, pid, status, started_at, last_beat_at, tickets_created, last_error, queue_depth)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    hostname = VALUES(hostname),
+                    pid = VALUES(pid),
+                    status = VALUES(status),
+                    started_at = VALUES(started_at),
+                    last_beat_at = VALUES(last_beat_at),
+                    tickets_created = VALUES(tickets_created),
+                    last_error = VALUES(last_error),
+                    queue_depth = VALUES(queue_depth)
+            ''', (
+                heartbeat.worker_id, heartbeat.hostname, heartbeat.pid, heartbeat.status,
+                heartbeat.started_at, datetime.now(), heartbeat.tickets_created, heartbeat.last_error,
+                heartbeat.queue_depth
+            ))
+            conn.commit()
+            return True
+        except Exception as e:
+            feedback.error(f"Error recording worker heartbeat: {e}")
+            return False
+        finally:
+            cursor.close()
+            conn.close()
+
+    @staticmethod
+    def recent(within_hours=24):
+        """Workers that have beaten within the last within_hours, most recent first"""
+        conn = get_db_connection()
+        if conn is None:
+            return []
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute('''
+                SELECT worker_id, hostname, pid, status, started_at, last_beat_at, tickets_created, last_error,
+                       queue_depth
+                FROM worker_heartbeats
+                WHERE last_beat_at >= %s
+                ORDER BY last_beat_at DESC
+            ''', (datetime.now() - timedelta(hours=within_hours),))
+            return [WorkerHeartbeat(*row) for row in cursor.fetchall()]
+        except Exception as e:
+            feedback.error(f"Error loading worker heartbeats: {e}")
+            return []
+        finally:
+            cursor.close()
+            conn.close()
@@ -0,0 +1,48 @@
+import re
+import string
+
+# Bump when matching semantics change so cached analyzer results are invalidated
+MATCHER_VERSION = 'word-tokens-1'
+
+# Punctuation that separates words; letters, digits and "_" stay part of a word (as with regex \w)
+_WORD_SEPARATORS = str.maketrans({
+    char: ' ' for char in string.punctuation.replace('_', '') + '‘’“”–—…•·«»¡¿'
+})
+
+
+class KeywordMatcher:
+    """Finds every keyword hit in one pass over the text
+
+    The text is lowercased and split into words once, in C (str.translate +
+    str.split), and the words are intersected with a frozenset of keywords.
+    Cost is linear in the body and independent of the number of keywords,
+    and matches respect word boundaries, so "down" no longer fires on
+    "download" or "lag" on "flag". Multi-word phrases, if any are
+    configured, go through one compiled word-boundary alternation regex.
+
+    A single alternation regex was measured too, but CPython's re engine is
+    several times slower than either this or plain substring scans on
+    multi-KB bodies (see benchmarks/keyword_matching.py).
+    """
+
+    def __init__(self, keywords):
+        self.keywords = tuple(dict.fromkeys(keyword.lower() for keyword in keywords))
+        self._words = frozenset(
+            keyword for keyword in self.keywords
+            if keyword.translate(_WORD_SEPARATORS).split() == [keyword]
+        )
+        phrases = sorted((keyword for keyword in self.keywords if keyword not in self._words), key=len, reverse=True)
+        self._phrase_pattern = None
+        if phrases:
+            alternation = '|'.join(re.escape(phrase) for phrase in phrases)
+            self._phrase_pattern = re.compile(rf'\b(?:{alternation})\b')
+
+    def find(self, text):
+        """Set of distinct keywords present in text"""
+        if not text:
+            return set()
+        lowered = text.lower()
+        hits = self._words.intersection(lowered.translate(_WORD_SEPARATORS).split())
+        if self._phrase_pattern is not None:
+            hits.update(self._phrase_pattern.findall(lowered))
+        return hits
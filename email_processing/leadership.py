@@ -0,0 +1,90 @@
+import os
+import socket
+import threading
+import time
+import feedback
+from config import Config
+from database.leases import Lease
+
+# Lease guarding the INBOX fetch loop; one holder across all UI replicas and workers
+INGEST_LEASE = 'mailbox_ingest:INBOX'
+
+
+def process_id():
+    """This process's identity in leases and heartbeats: Config.WORKER_ID or hostname:pid"""
+    return Config.WORKER_ID or f"{socket.gethostname()}:{os.getpid()}"
+
+
+def ingest_lease(holder=None):
+    return Lease(INGEST_LEASE, holder or process_id(), Config.INGEST_LEASE_SECONDS)
+
+
+def run_while_leader(lease, stop_event, target, on_change=None):
+    """Run target(term_event) only while this process holds lease, until stop_event is set
+
+    A standby retries every third of the lease TTL, so a leader that dies
+    without releasing is replaced within about 4/3 of the TTL. The leader
+    renews on the same schedule. term_event is set when stop_event is set or
+    a renewal fails, and target must return soon after; the lease is then
+    released so a standby can take over at once. on_change(is_leader) is
+    called on every transition.
+    """
+    interval = lease.ttl_seconds / 3
+    leading = None
+
+    while not stop_event.is_set():
+        if not lease.acquire():
+            if leading is not False:
+                leading = False
+                if on_change:
+                    on_change(False)
+            stop_event.wait(interval)
+            continue
+
+        leading = True
+        if on_change:
+            on_change(True)
+        feedback.info(f"🗝️ {lease.holder} holds {lease.name}")
+        _lead(lease, stop_event, target)
+
+
+def run_once_as_leader(lease, target):
+    """Run target(term_event) once if lease is free now; False (without running) if another holder has it
+
+    The lease is renewed while target runs and released afterwards, as in
+    run_while_leader.
+    """
+    if not lease.acquire():
+        return False
+    _lead(lease, threading.Event(), target)
+    return True
+
+
+def _lead(lease, stop_event, target):
+    """One term: run target with a renewer thread, then release the lease"""
+    term_event = threading.Event()
+    renewer = threading.Thread(
+        target=_keep_renewed, args=(lease, stop_event, term_event, lease.ttl_seconds / 3),
+        name='lease-renewer', daemon=True
+    )
+    renewer.start()
+    try:
+        target(term_event)
+    finally:
+        term_event.set()
+        renewer.join()
+        lease.release()
+
+
+def _keep_renewed(lease, stop_event, term_event, interval):
+    """Renew every interval seconds; end the term on shutdown or a lost lease"""
+    renew_at = time.monotonic() + interval
+    while not term_event.wait(min(1.0, interval)):
+        if stop_event.is_set():
+            break
+        if time.monotonic() >= renew_at:
+            if not lease.acquire():
+                feedback.warning(f"🗝️ {lease.holder} lost {lease.name}; stopping ingestion")
+                break
+            renew_at = time.monotonic() + interval
+    term_event.set()
@@ -0,0 +1,152 @@
+import time
+from collections import Counter
+from dataclasses import dataclass
+import feedback
+from config import Config
+
+
+@dataclass
+class StageStats:
+    name: str
+    items: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rate(self):
+        """Items per second spent inside this stage"""
+        return self.items / self.seconds if self.seconds else 0.0
+
+
+class IngestPipeline:
+    """Streaming ingestion: fetch → parse → analyze → assign/insert
+
+    Messages are pulled from IMAP one at a time and flow through the stages as
+    generators. They are grouped into micro-batches of ``batch_size`` only
+    for analysis and the ticket insert. At most one batch is held in memory,
+    and each batch becomes visible as tickets as soon as it commits. The UID
+    high-water mark advances after every committed batch, so an interrupted
+    run resumes where it stopped. It never passes an email that came back
+    "no_staff": the mark stops just below the first one, so it is fetched
+    again next cycle, while the emails after it that did commit come back
+    as "exists". The batch's committed messages are then flagged on the
+    server with one UID STORE (EmailFetcher.flag_ingested).
+
+    ``assign_batch`` takes a list of email dicts and returns one outcome per
+    email, as TicketManager.assign_tickets does.
+
+    With a ``spool`` (IngestSpool) the pipeline stops after parsing: each
+    batch is appended to the durable local queue and the mark advances as
+    soon as it is on disk. Fetching then runs at IMAP speed, and a
+    SpoolConsumer does the analysis and ticket creation separately. Those
+    emails count as "queued" and are flagged by the consumer instead.
+    """
+
+    STAGES = ('fetch', 'parse', 'analyze', 'assign')
+    SPOOL_STAGES = ('fetch', 'parse', 'spool')
+
+    def __init__(self, fetcher, assign_batch=None, batch_size=None, spool=None):
+        self.fetcher = fetcher
+        self.assign_batch = assign_batch
+        self.batch_size = batch_size or Config.INGEST_BATCH_SIZE
+        self.spool = spool
+        self.stats = {name: StageStats(name) for name in (self.SPOOL_STAGES if spool else self.STAGES)}
+        self.outcomes = Counter()
+        # Lowest UID whose ticket was not created; the mark stays below it
+        self.held_uid = None
+
+    def run(self, on_batch=None, stop_event=None):
+        """Drain all new mail; on_batch(emails, outcomes) is called after each commit
+
+        Returns the Counter of outcomes. Stops early, leaving the mark at the
+        last committed batch, if a batch fails with a database error or once
+        stop_event is set.
+        """
+        if not self.fetcher.mailbox and not self.fetcher.connect():
+            return self.outcomes
+
+        for batch in self._batches(self._parse(self._fetch())):
+            if self.spool is not None:
+                self._timed('spool', len(batch), self.spool.put_many, batch)
+                results = ["queued"] * len(batch)
+            else:
+                self._analyze(batch)
+                results = self._timed('assign', len(batch), self.assign_batch, batch)
+            self.outcomes.update(results)
+
+            if "db_error" in results:
+                feedback.error("❌ Ticket insert failed; remaining emails will be retried next cycle")
+                return self.outcomes
+
+            held = [email['uid'] for email, outcome in zip(batch, results) if outcome == "no_staff"]
+            if held and self.held_uid is None:
+                self.held_uid = min(held)
+            self.fetcher.commit_sync(self._mark(max(email['uid'] for email in batch)))
+            if self.spool is None:
+                self.fetcher.flag_ingested(batch, results)
+            if on_batch:
+                on_batch(batch, results)
+            if stop_event is not None and stop_event.is_set():
+                return self.outcomes
+
+        self.fetcher.commit_sync(None if self.held_uid is None else self.held_uid - 1)
+        return self.outcomes
+
+    @property
+    def created(self):
+        """Number of tickets created so far"""
+        return sum(count for outcome, count in self.outcomes.items()
+                   if outcome not in ("exists", "no_staff", "db_error", "queued"))
+
+    def bottleneck(self):
+        """Name of the stage that consumed the most wall time"""
+        return max(self.stats.values(), key=lambda stage: stage.seconds).name
+
+    def report(self):
+        """One line per stage: items, seconds and throughput"""
+        return [
+            f"{stage.name:<8} {stage.items:>6} items {stage.seconds:>8.3f}s {stage.rate:>9.1f}/s"
+            for stage in self.stats.values()
+        ]
+
+    def _mark(self, uid):
+        return uid if self.held_uid is None else min(uid, self.held_uid - 1)
+
+    def _fetch(self):
+        stats = self.stats['fetch']
+        messages = self.fetcher.iter_new_messages()
+        while True:
+            started = time.perf_counter()
+            try:
+                msg = next(messages)
+            except StopIteration:
+                stats.seconds += time.perf_counter() - started
+                return
+            stats.seconds += time.perf_counter() - started
+            stats.items += 1
+            yield msg
+
+    def _parse(self, messages):
+        for msg in messages:
+            yield self._timed('parse', 1, self.fetcher.parse_message, msg)
+
+    def _batches(self, emails):
+        batch = []
+        for email_data in emails:
+            batch.append(email_data)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _analyze(self, batch):
+        self._timed('analyze', len(batch), self.fetcher.analyze_emails, batch)
+
+    def _timed(self, stage, items, func, *args):
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            stats = self.stats[stage]
+            stats.seconds += time.perf_counter() - started
+            stats.items += items
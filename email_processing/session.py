@@ -0,0 +1,174 @@
+import threading
+import time
+from contextlib import contextmanager
+from imap_tools import MailBox
+from config import Config, EmailConfig
+
+
+class MailboxSessionManager:
+    """Thread-safe pool of logged-in IMAP sessions shared across the process
+
+    Sessions are logged in once and handed out again on later checkouts, so
+    only the first fetch pays the Office365 login round trips. A session that
+    has sat idle longer than ``keepalive_seconds`` is probed with NOOP before
+    reuse, and a background thread NOOPs idle sessions so the server does not
+    time them out. Dead sessions are replaced with a fresh login transparently.
+    At most ``max_sessions`` pooled sessions exist at once; extra callers wait.
+
+    Sessions held for minutes at a time (the watcher's IDLE) come from
+    open_dedicated() instead, so they never take a pooled slot away from
+    short operations such as Fetch Now or flagging.
+    """
+
+    def __init__(self, config: EmailConfig, max_sessions, keepalive_seconds, checkout_timeout):
+        self.config = config
+        self.max_sessions = max_sessions
+        self.keepalive_seconds = keepalive_seconds
+        self.checkout_timeout = checkout_timeout
+        self._idle = []  # [(mailbox, last_used_monotonic)]
+        self._slots = threading.BoundedSemaphore(max_sessions)
+        self._lock = threading.Lock()
+        self._stats = {'logins': 0, 'reuses': 0, 'noops': 0, 'reconnects': 0}
+        self._keepalive_thread = None
+
+    def acquire(self):
+        """Check out a logged-in MailBox; pair every call with release()"""
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            raise TimeoutError(
+                f"No IMAP session available after {self.checkout_timeout}s "
+                f"({self.max_sessions} sessions in use)"
+            )
+
+        try:
+            with self._lock:
+                entry = self._idle.pop() if self._idle else None
+            if entry is None:
+                return self._login()
+            return self._revive(*entry)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, mailbox, broken=False):
+        """Return a session; broken sessions are logged out and not reused"""
+        try:
+            if broken:
+                self._logout(mailbox)
+            else:
+                with self._lock:
+                    self._idle.append((mailbox, time.monotonic()))
+        finally:
+            self._slots.release()
+
+    def open_dedicated(self):
+        """A fresh logged-in session outside the pool and its cap; pair with close_dedicated()"""
+        return self._login()
+
+    def close_dedicated(self, mailbox):
+        self._logout(mailbox)
+
+    def check_login(self):
+        """Log in and out on a new connection; raises if the server or credentials are rejected"""
+        self._logout(self._login())
+
+    @contextmanager
+    def session(self):
+        """``with manager.session() as mailbox:`` — marks the session broken on error"""
+        mailbox = self.acquire()
+        broken = False
+        try:
+            yield mailbox
+        except Exception:
+            broken = True
+            raise
+        finally:
+            self.release(mailbox, broken=broken)
+
+    def keepalive(self):
+        """NOOP every idle session that has been quiet for keepalive_seconds"""
+        now = time.monotonic()
+        with self._lock:
+            stale = [entry for entry in self._idle if now - entry[1] >= self.keepalive_seconds]
+            self._idle = [entry for entry in self._idle if now - entry[1] < self.keepalive_seconds]
+
+        for mailbox, _ in stale:
+            try:
+                mailbox.client.noop()
+            except Exception:
+                self._logout(mailbox)
+                continue
+            with self._lock:
+                self._stats['noops'] += 1
+                self._idle.append((mailbox, time.monotonic()))
+
+    def start_keepalive(self):
+        """Run keepalive() in a daemon thread for the life of the process"""
+        if self._keepalive_thread is not None:
+            return
+
+        def loop():
+            while True:
+                time.sleep(self.keepalive_seconds)
+                self.keepalive()
+
+        self._keepalive_thread = threading.Thread(target=loop, name="imap-keepalive", daemon=True)
+        self._keepalive_thread.start()
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot['idle'] = len(self._idle)
+        snapshot['max_sessions'] = self.max_sessions
+        return snapshot
+
+    def _revive(self, mailbox, last_used):
+        if time.monotonic() - last_used < self.keepalive_seconds:
+            with self._lock:
+                self._stats['reuses'] += 1
+            return mailbox
+
+        try:
+            mailbox.client.noop()
+            with self._lock:
+                self._stats['reuses'] += 1
+                self._stats['noops'] += 1
+            return mailbox
+        except Exception:
+            self._logout(mailbox)
+            with self._lock:
+                self._stats['reconnects'] += 1
+            return self._login()
+
+    def _login(self):
+        mailbox = MailBox(self.config.imap_server, self.config.imap_port)
+        mailbox.login(self.config.email, self.config.password, initial_folder='INBOX')
+        with self._lock:
+            self._stats['logins'] += 1
+        return mailbox
+
+    @staticmethod
+    def _logout(mailbox):
+        try:
+            mailbox.logout()
+        except Exception:
+            pass
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_session_manager():
+    """Return the process-wide IMAP session manager, creating it on first use"""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = MailboxSessionManager(
+                    EmailConfig(),
+                    max_sessions=Config.IMAP_MAX_SESSIONS,
+                    keepalive_seconds=Config.IMAP_KEEPALIVE_SECONDS,
+                    checkout_timeout=Config.IMAP_SESSION_TIMEOUT,
+                )
+                _manager.start_keepalive()
+    return _manager
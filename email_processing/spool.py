@@ -0,0 +1,498 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+import feedback
+from config import Config
+from database.connection import get_db_connection
+
+# Outcomes that leave an email on the spool for another try; anything else is acked
+RETRIED_OUTCOMES = ("no_staff", "db_error")
+# Outcome of an email whose analyze/assign raised; it is retried, then dead-lettered (see fail())
+FAILED_OUTCOME = "failed"
+# Spool columns added after the file format first shipped: (column, declaration)
+SPOOL_ADDED_COLUMNS = (
+    ('failures', 'INTEGER NOT NULL DEFAULT 0'),
+    ('last_error', 'TEXT'),
+    ('dead_at', 'REAL'),
+)
+# Longest error text kept with a failed email
+ERROR_LENGTH = 1000
+
+
+class IngestSpool:
+    """Durable local queue of parsed emails between fetching and ticket creation
+
+    A SQLite file in WAL mode with synchronous=FULL, so an email is on disk
+    before the IMAP UID mark moves past it. Emails are appended in fetch
+    order and deleted only once their ticket is committed (ack). A consumer
+    claims a batch for ``claim_seconds``. If it dies before acking, the
+    claim lapses and the batch is delivered again. Delivery is at least
+    once, and the message_id dedupe in TicketManager makes the redelivery
+    harmless.
+
+    An email whose processing raises is retried after a delay. After
+    ``Config.INGEST_MAX_FAILURES`` such failures it is dead-lettered: kept
+    with its last error, but not claimed again until requeue_dead().
+    """
+
+    def __init__(self, path=None):
+        self.path = path or Config.INGEST_SPOOL_PATH
+        # Set whenever this process appends, so an in-process consumer wakes at once
+        self.appended = threading.Event()
+        conn = self._connect()
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS spool (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    message_id TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    enqueued_at REAL NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    available_at REAL NOT NULL DEFAULT 0
+                )
+            ''')
+            existing = {row[1] for row in conn.execute('PRAGMA table_info(spool)')}
+            for column, declaration in SPOOL_ADDED_COLUMNS:
+                if column not in existing:
+                    conn.execute(f'ALTER TABLE spool ADD COLUMN {column} {declaration}')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_spool_available ON spool (available_at, seq)')
+        finally:
+            conn.close()
+
+    def put_many(self, emails):
+        """Append parsed email dicts in one durable transaction"""
+        now = time.time()
+        rows = [(email_data['message_id'], json.dumps(email_data, default=_encode), now) for email_data in emails]
+        self._execute_many('INSERT INTO spool (message_id, payload, enqueued_at) VALUES (?, ?, ?)', rows)
+        self.appended.set()
+
+    def claim(self, limit, claim_seconds=None):
+        """Oldest available emails as (seq, email dict) pairs, hidden from other claimers for claim_seconds"""
+        claim_seconds = claim_seconds or Config.INGEST_SPOOL_CLAIM_SECONDS
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                rows = conn.execute(
+                    'SELECT seq, payload FROM spool WHERE available_at <= ? AND dead_at IS NULL ORDER BY seq LIMIT ?',
+                    (now, limit)
+                ).fetchall()
+                conn.executemany(
+                    'UPDATE spool SET attempts = attempts + 1, available_at = ? WHERE seq = ?',
+                    [(now + claim_seconds, seq) for seq, _ in rows]
+                )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        finally:
+            conn.close()
+        return [(seq, json.loads(payload, object_hook=_decode)) for seq, payload in rows]
+
+    def ack(self, seqs):
+        """Remove emails whose tickets are committed"""
+        self._execute_many('DELETE FROM spool WHERE seq = ?', [(seq,) for seq in seqs])
+
+    def retry_later(self, seqs, delay_seconds):
+        """Hand claimed emails back, available again after delay_seconds"""
+        available_at = time.time() + delay_seconds
+        self._execute_many('UPDATE spool SET available_at = ? WHERE seq = ?', [(available_at, seq) for seq in seqs])
+
+    def fail(self, seqs, error, delay_seconds):
+        """Hand back claimed emails whose processing raised; dead-letters those at the failure limit"""
+        now = time.time()
+        # SQLite evaluates every SET expression with the old failures value
+        self._execute_many('''
+            UPDATE spool SET dead_at = CASE WHEN failures + 1 >= ? THEN ? END,
+                failures = failures + 1, last_error = ?, available_at = ?
+            WHERE seq = ?
+        ''', [(Config.INGEST_MAX_FAILURES, now, str(error)[:ERROR_LENGTH], now + delay_seconds, seq) for seq in seqs])
+
+    def depth(self):
+        """Emails waiting or in progress (dead letters excluded)"""
+        conn = self._connect()
+        try:
+            return conn.execute('SELECT COUNT(*) FROM spool WHERE dead_at IS NULL').fetchone()[0]
+        finally:
+            conn.close()
+
+    def oldest_age(self):
+        """Seconds the oldest queued email has waited, 0 when empty"""
+        conn = self._connect()
+        try:
+            oldest = conn.execute('SELECT MIN(enqueued_at) FROM spool WHERE dead_at IS NULL').fetchone()[0]
+            return time.time() - oldest if oldest else 0.0
+        finally:
+            conn.close()
+
+    def dead_letters(self, limit=50):
+        """(message_id, failures, last_error, dead_at) for dead-lettered emails, newest first"""
+        conn = self._connect()
+        try:
+            rows = conn.execute('''
+                SELECT message_id, failures, last_error, dead_at FROM spool
+                WHERE dead_at IS NOT NULL ORDER BY dead_at DESC LIMIT ?
+            ''', (limit,)).fetchall()
+        finally:
+            conn.close()
+        return [(message_id, failures, last_error, datetime.fromtimestamp(dead_at))
+                for message_id, failures, last_error, dead_at in rows]
+
+    def dead_count(self):
+        """Number of dead-lettered emails"""
+        conn = self._connect()
+        try:
+            return conn.execute('SELECT COUNT(*) FROM spool WHERE dead_at IS NOT NULL').fetchone()[0]
+        finally:
+            conn.close()
+
+    def requeue_dead(self):
+        """Put every dead-lettered email back on the queue with a clean failure count; returns how many"""
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                count = conn.execute(
+                    'UPDATE spool SET dead_at = NULL, failures = 0, available_at = 0 WHERE dead_at IS NOT NULL'
+                ).rowcount
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        finally:
+            conn.close()
+        if count:
+            self.appended.set()
+        return count
+
+    def _execute_many(self, sql, rows):
+        if not rows:
+            return
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.executemany(sql, rows)
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        finally:
+            conn.close()
+
+    def _connect(self):
+        # Autocommit mode; writes use explicit BEGIN IMMEDIATE ... COMMIT
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute('PRAGMA synchronous=FULL')
+        return conn
+
+
+class IngestJobQueue:
+    """Ingest queue shared by every host, in the database's ingest_jobs table
+
+    Same interface as IngestSpool, so SpoolConsumer drains either. Processors
+    on any number of hosts claim the oldest available jobs with
+    ``SELECT ... FOR UPDATE SKIP LOCKED``, so concurrent claims get disjoint
+    batches without waiting on each other's locks. Each claim is stamped
+    with a token and a lease of ``claim_seconds``, measured by the database
+    clock. A job whose processor dies becomes claimable again once the
+    lease runs out. ack and retry_later only touch jobs that still carry
+    the caller's token, so a processor whose lease lapsed cannot delete or
+    reschedule a job another processor has since claimed. Delivery is at
+    least once, as with the spool. Failing jobs are dead-lettered in place
+    (dead_at) after ``Config.INGEST_MAX_FAILURES`` failures, also as with
+    the spool.
+    """
+
+    def __init__(self):
+        # Set whenever this process enqueues; other processes find new jobs by polling
+        self.appended = threading.Event()
+
+    def put_many(self, emails):
+        """Enqueue parsed email dicts in one transaction"""
+        rows = [(email_data['message_id'], json.dumps(email_data, default=_encode)) for email_data in emails]
+        if rows:
+            self._write_many('''
+                INSERT INTO ingest_jobs (message_id, payload, enqueued_at, available_at)
+                VALUES (%s, %s, NOW(), NOW())
+            ''', rows)
+            self.appended.set()
+
+    def claim(self, limit, claim_seconds=None):
+        """Oldest available jobs as (claim, email dict) pairs, leased to this caller for claim_seconds
+
+        Each claim is an (id, token) pair to hand back to ack or retry_later.
+        """
+        claim_seconds = claim_seconds or Config.INGEST_SPOOL_CLAIM_SECONDS
+        conn = self._connect()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('''
+                SELECT id, payload FROM ingest_jobs
+                WHERE available_at <= NOW() AND dead_at IS NULL
+                ORDER BY id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            ''', (limit,))
+            rows = cursor.fetchall()
+            if not rows:
+                conn.commit()
+                return []
+
+            token = uuid.uuid4().hex
+            placeholders = ', '.join(['%s'] * len(rows))
+            # available_at is checked again for backends without row locks (SQLite),
+            # where another processor may have claimed some of these meanwhile
+            cursor.execute(f'''
+                UPDATE ingest_jobs
+                SET attempts = attempts + 1, claim_token = %s, available_at = TIMESTAMPADD(SECOND, %s, NOW())
+                WHERE id IN ({placeholders}) AND available_at <= NOW()
+            ''', (token, claim_seconds, *[job_id for job_id, _ in rows]))
+            if cursor.rowcount != len(rows):
+                cursor.execute('SELECT id FROM ingest_jobs WHERE claim_token = %s', (token,))
+                won = {row[0] for row in cursor.fetchall()}
+                rows = [row for row in rows if row[0] in won]
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+        return [((job_id, token), json.loads(payload, object_hook=_decode)) for job_id, payload in rows]
+
+    def ack(self, claims):
+        """Delete claimed jobs whose tickets are committed, unless the claim has since been taken over"""
+        self._update_claims('DELETE FROM ingest_jobs WHERE claim_token = %s AND id IN ({placeholders})', (), claims)
+
+    def retry_later(self, claims, delay_seconds):
+        """Release claimed jobs, available again after delay_seconds, unless the claim has been taken over"""
+        self._update_claims('''
+            UPDATE ingest_jobs SET claim_token = NULL, available_at = TIMESTAMPADD(SECOND, %s, NOW())
+            WHERE claim_token = %s AND id IN ({placeholders})
+        ''', (delay_seconds,), claims)
+
+    def fail(self, claims, error, delay_seconds):
+        """Release claimed jobs whose processing raised; dead-letters those at the failure limit, unless taken over"""
+        # dead_at is assigned before failures: MySQL evaluates SET left to right with the
+        # updated values and SQLite with the old ones, so this order reads the old count on both
+        self._update_claims('''
+            UPDATE ingest_jobs
+            SET dead_at = CASE WHEN failures + 1 >= %s THEN NOW() END,
+                failures = failures + 1, last_error = %s, claim_token = NULL,
+                available_at = TIMESTAMPADD(SECOND, %s, NOW())
+            WHERE claim_token = %s AND id IN ({placeholders})
+        ''', (Config.INGEST_MAX_FAILURES, str(error)[:ERROR_LENGTH], delay_seconds), claims)
+
+    def depth(self):
+        """Jobs waiting or in progress across all hosts (dead letters excluded)"""
+        return self._read_one('SELECT COUNT(*) FROM ingest_jobs WHERE dead_at IS NULL') or 0
+
+    def oldest_age(self):
+        """Seconds the oldest job has waited, 0 when empty"""
+        return self._read_one('''
+            SELECT TIMESTAMPDIFF(SECOND, enqueued_at, NOW()) FROM ingest_jobs
+            WHERE dead_at IS NULL ORDER BY id LIMIT 1
+        ''') or 0
+
+    def dead_letters(self, limit=50):
+        """(message_id, failures, last_error, dead_at) for dead-lettered jobs, newest first"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('''
+                SELECT message_id, failures, last_error, dead_at FROM ingest_jobs
+                WHERE dead_at IS NOT NULL ORDER BY dead_at DESC LIMIT %s
+            ''', (limit,))
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.close()
+
+    def dead_count(self):
+        """Number of dead-lettered jobs"""
+        return self._read_one('SELECT COUNT(*) FROM ingest_jobs WHERE dead_at IS NOT NULL') or 0
+
+    def requeue_dead(self):
+        """Put every dead-lettered job back on the queue with a clean failure count; returns how many"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('''
+                UPDATE ingest_jobs SET dead_at = NULL, failures = 0, claim_token = NULL, available_at = NOW()
+                WHERE dead_at IS NOT NULL
+            ''')
+            count = cursor.rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+        if count:
+            self.appended.set()
+        return count
+
+    def _update_claims(self, sql, params, claims):
+        by_token = {}
+        for job_id, token in claims:
+            by_token.setdefault(token, []).append(job_id)
+        for token, job_ids in by_token.items():
+            placeholders = ', '.join(['%s'] * len(job_ids))
+            self._write_many(sql.format(placeholders=placeholders), [(*params, token, *job_ids)])
+
+    def _write_many(self, sql, rows):
+        conn = self._connect()
+        cursor = conn.cursor()
+        try:
+            cursor.executemany(sql, rows)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _read_one(self, sql):
+        conn = self._connect()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql)
+            row = cursor.fetchone()
+            return row[0] if row else None
+        finally:
+            cursor.close()
+            conn.close()
+
+    @staticmethod
+    def _connect():
+        # Raised rather than reported: callers must not advance the mark or ack on failure
+        conn = get_db_connection()
+        if conn is None:
+            raise ConnectionError("No database connection for the ingest queue")
+        return conn
+
+
+def open_ingest_queue():
+    """The queue fetched mail goes through (Config.INGEST_QUEUE), or None to create tickets inline"""
+    if not Config.INGEST_SPOOL:
+        return None
+    if Config.INGEST_QUEUE == 'database':
+        return IngestJobQueue()
+    return IngestSpool()
+
+
+class SpoolConsumer:
+    """Turns queued emails into tickets: claim → analyze → assign → ack
+
+    ``spool`` is an IngestSpool or an IngestJobQueue. ``analyze`` fills in the analysis fields of a list of email dicts
+    (EmailFetcher.analyze_emails) and ``assign_batch`` creates tickets
+    (TicketManager().assign_tickets). Emails that come back "no_staff" or
+    "db_error" go back on the spool for another try after
+    ``Config.INGEST_SPOOL_RETRY_SECONDS``. If a batch raises, its emails are
+    retried one at a time so one bad email cannot hold back the rest; each
+    email that still raises records a failure (outcome "failed") and is
+    dead-lettered at the limit. ``on_commit(emails, outcomes)``,
+    if given, is called after each acked batch (flags.flag_committed marks
+    the messages on the IMAP server).
+    """
+
+    # How often an idle consumer looks for work appended by other processes
+    POLL_SECONDS = 5
+
+    def __init__(self, spool, analyze, assign_batch, batch_size=None, on_commit=None):
+        self.spool = spool
+        self.analyze = analyze
+        self.assign_batch = assign_batch
+        self.on_commit = on_commit
+        self.batch_size = batch_size or Config.INGEST_BATCH_SIZE
+        self.outcomes = Counter()
+
+    def drain(self, stop_event=None):
+        """Process batches until the spool has nothing available; returns emails handled"""
+        handled = 0
+        while stop_event is None or not stop_event.is_set():
+            claimed = self.spool.claim(self.batch_size)
+            if not claimed:
+                break
+            seqs = [seq for seq, _ in claimed]
+            emails = [email_data for _, email_data in claimed]
+            try:
+                results = self._process(emails)
+            except Exception as e:
+                if len(claimed) == 1:
+                    self.spool.fail(seqs, e, Config.INGEST_SPOOL_RETRY_SECONDS)
+                    raise
+                results = self._process_singly(claimed)
+            self.outcomes.update(results)
+
+            retry = [seq for seq, outcome in zip(seqs, results) if outcome in RETRIED_OUTCOMES]
+            self.spool.ack([seq for seq, outcome in zip(seqs, results)
+                            if outcome not in RETRIED_OUTCOMES and outcome != FAILED_OUTCOME])
+            self.spool.retry_later(retry, Config.INGEST_SPOOL_RETRY_SECONDS)
+            if self.on_commit:
+                self.on_commit(emails, results)
+            handled += len(claimed)
+            if "db_error" in results:
+                feedback.error("❌ Ticket insert failed; queued emails will be retried")
+                break
+        return handled
+
+    def _process(self, emails):
+        self.analyze(emails)
+        return self.assign_batch(emails)
+
+    def _process_singly(self, claimed):
+        """Outcomes for a batch that raised, processing each email on its own; re-raises if every one fails"""
+        results = []
+        error = None
+        for seq, email_data in claimed:
+            try:
+                results.extend(self._process([email_data]))
+            except Exception as e:
+                error = e
+                self.spool.fail([seq], e, Config.INGEST_SPOOL_RETRY_SECONDS)
+                feedback.error(f"❌ Could not process queued email {email_data['message_id']}: {e}")
+                results.append(FAILED_OUTCOME)
+        if error is not None and all(outcome == FAILED_OUTCOME for outcome in results):
+            # Nothing got through, so the fault is probably not in the emails; stop draining
+            raise error
+        return results
+
+    def run(self, stop_event):
+        """Drain whenever work arrives until stop_event is set"""
+        while not stop_event.is_set():
+            self.spool.appended.clear()
+            try:
+                self.drain(stop_event)
+            except Exception as e:
+                feedback.error(f"Ingest queue consumer error: {e}")
+            self.spool.appended.wait(self.POLL_SECONDS)
+
+
+def start_consumer(spool, analyze, assign_batch, stop_event, on_commit=None):
+    """Run a SpoolConsumer on a daemon thread; returns the thread"""
+    consumer = SpoolConsumer(spool, analyze, assign_batch, on_commit=on_commit)
+    thread = threading.Thread(target=consumer.run, args=(stop_event,), name='spool-consumer', daemon=True)
+    thread.start()
+    return thread
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    raise TypeError(f"Cannot spool {type(value).__name__}")
+
+
+def _decode(value):
+    if '__datetime__' in value:
+        return datetime.fromisoformat(value['__datetime__'])
+    return value
@@ -0,0 +1,58 @@
+import feedback
+from datetime import datetime
+from database.connection import get_db_connection
+from database.models import MailSyncState
+
+
+class SyncStateStore:
+    """Persisted per-folder IMAP sync position (UIDVALIDITY + last ingested UID)"""
+
+    @staticmethod
+    def load(folder):
+        """Return the saved MailSyncState for a folder, or None if never synced
+
+        Raises on database errors rather than returning None, so an outage is
+        never mistaken for a first sync.
+        """
+        conn = get_db_connection()
+        if conn is None:
+            raise RuntimeError("Database unavailable; cannot load mail sync state")
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute('''
+                SELECT folder, uidvalidity, last_uid, updated_at
+                FROM mail_sync_state
+                WHERE folder = %s
+            ''', (folder,))
+            row = cursor.fetchone()
+            return MailSyncState(*row) if row else None
+        finally:
+            cursor.close()
+            conn.close()
+
+    @staticmethod
+    def save(folder, uidvalidity, last_uid):
+        """Record the high-water mark reached for a folder"""
+        conn = get_db_connection()
+        if conn is None:
+            return False
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute('''
+                INSERT INTO mail_sync_state (folder, uidvalidity, last_uid, updated_at)
+                VALUES (%s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    uidvalidity = VALUES(uidvalidity),
+                    last_uid = VALUES(last_uid),
+                    updated_at = VALUES(updated_at)
+            ''', (folder, uidvalidity, last_uid, datetime.now()))
+            conn.commit()
+            return True
+        except Exception as e:
+            feedback.error(f"Error saving mail sync state: {e}")
+            return False
+        finally:
+            cursor.close()
+            conn.close()
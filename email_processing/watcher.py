@@ -0,0 +1,128 @@
+import random
+import threading
+import time
+import feedback
+from config import Config, EmailConfig
+from email_processing.fetcher import EmailFetcher
+from email_processing.pipeline import IngestPipeline
+
+
+class Backoff:
+    """Exponential retry delays with jitter
+
+    The n-th consecutive failure waits a random time between half and all of
+    min(cap, base * 2**n). The jitter keeps several workers that lost the
+    server at the same moment from reconnecting in lockstep.
+    """
+
+    def __init__(self, base, cap):
+        self.base = base
+        self.cap = cap
+        self.failures = 0
+
+    def next(self):
+        ceiling = min(self.cap, self.base * 2 ** self.failures)
+        self.failures += 1
+        return random.uniform(ceiling / 2, ceiling)
+
+    def reset(self):
+        self.failures = 0
+
+
+class MailboxWatcher:
+    """Long-lived INBOX watcher: IMAP IDLE push with a polling fallback
+
+    Holds one dedicated session (outside the MailboxSessionManager pool),
+    ingests any backlog on (re)connect, then sleeps in IDLE until the server
+    announces new mail with an EXISTS response. IDLE is re-issued every
+    ``Config.IMAP_IDLE_TIMEOUT`` seconds so the server never drops the
+    session. Servers without the IDLE capability are polled on the same
+    session every ``Config.EMAIL_POLL_INTERVAL`` seconds instead.
+
+    New mail is streamed through an IngestPipeline; ``assign_batch`` is its
+    ticket-creation stage (normally TicketManager().assign_tickets). With
+    a ``spool`` the pipeline only queues mail locally, and a SpoolConsumer
+    does the ticket creation.
+    Connection failures and errors are retried with jittered exponential
+    backoff, from ``Config.EMAIL_RETRY_BASE_SECONDS`` up to
+    ``Config.EMAIL_RETRY_INTERVAL``. The most recent error is kept in
+    ``last_error``. nudge() cuts the current IDLE or poll wait short, so
+    "Fetch Now" can ask a running watcher to ingest at once.
+    """
+
+    # How often a running IDLE checks whether it has been asked to stop
+    STOP_CHECK_SECONDS = 5
+
+    def __init__(self, config: EmailConfig, assign_batch, spool=None):
+        self.config = config
+        self.assign_batch = assign_batch
+        self.spool = spool
+        self.fetcher = EmailFetcher(config, dedicated=True)
+        self.last_error = None
+        self._nudged = threading.Event()
+
+    def run(self, stop_event=None):
+        """Watch the mailbox until stop_event is set (forever if None)"""
+        stop_event = stop_event or threading.Event()
+        backoff = Backoff(Config.EMAIL_RETRY_BASE_SECONDS, Config.EMAIL_RETRY_INTERVAL)
+
+        while not stop_event.is_set():
+            if not self.fetcher.mailbox and not self.fetcher.connect():
+                self.last_error = "Could not connect to the mail server"
+                stop_event.wait(backoff.next())
+                continue
+
+            try:
+                self._ingest(stop_event)
+                backoff.reset()
+                self.last_error = None
+                if self.supports_idle():
+                    while not stop_event.is_set():
+                        if self._idle_until_new_mail(stop_event):
+                            self._ingest(stop_event)
+                else:
+                    self._wait_for_poll(stop_event)
+            except Exception as e:
+                self.last_error = str(e)
+                feedback.error(f"Mailbox watcher error: {e}")
+                self.fetcher.disconnect(broken=True)
+                stop_event.wait(backoff.next())
+
+        self.fetcher.disconnect()
+
+    def nudge(self):
+        """Ingest now instead of waiting for the next IDLE response or poll"""
+        self._nudged.set()
+
+    def supports_idle(self):
+        return 'IDLE' in self.fetcher.mailbox.client.capabilities
+
+    def _idle_until_new_mail(self, stop_event):
+        """Hold one IDLE session; True if EXISTS arrived, False on re-IDLE deadline or stop"""
+        mailbox = self.fetcher.mailbox
+        deadline = time.monotonic() + Config.IMAP_IDLE_TIMEOUT
+
+        mailbox.idle.start()
+        try:
+            while not stop_event.is_set() and time.monotonic() < deadline:
+                responses = mailbox.idle.poll(timeout=self.STOP_CHECK_SECONDS)
+                if self._nudged.is_set() or any(b'EXISTS' in response for response in responses):
+                    return True
+            return False
+        finally:
+            mailbox.idle.stop()
+
+    def _wait_for_poll(self, stop_event):
+        deadline = time.monotonic() + Config.EMAIL_POLL_INTERVAL
+        while not stop_event.is_set() and not self._nudged.is_set() and time.monotonic() < deadline:
+            self._nudged.wait(min(self.STOP_CHECK_SECONDS, max(0.0, deadline - time.monotonic())))
+
+    def _ingest(self, stop_event):
+        self._nudged.clear()
+        pipeline = IngestPipeline(self.fetcher, self.assign_batch, spool=self.spool)
+        pipeline.run(stop_event=stop_event)
+        if feedback.debug_enabled() and pipeline.stats['fetch'].items:
+            feedback.info(f"🔧 Debug: Ingested {pipeline.stats['fetch'].items} emails ({pipeline.created} tickets), "
+                          f"bottleneck: {pipeline.bottleneck()}")
+            for line in pipeline.report():
+                feedback.info(f"🔧 Debug:   {line}")
@@ -0,0 +1,215 @@
+"""
+Headless ingestion worker
+
+    python -m email_processing.worker [--worker-id ID] [--processors N] [--log-level INFO]
+
+Runs the MailboxWatcher (IMAP IDLE, polling fallback) in its own process, so
+ingestion restarts and scales independently of the web UI. Set
+EMBEDDED_FETCHER=False for the Streamlit app when a worker runs. Nothing on
+this import path loads streamlit; messages go to the ``sacco`` logger.
+
+Any number of workers (and UI replicas) may run: only the holder of the
+ingest lease fetches, the rest wait as standbys and take over within about
+4/3 of ``Config.INGEST_LEASE_SECONDS`` if the leader dies.
+
+With ``Config.INGEST_SPOOL`` (the default) fetched mail lands in an ingest
+queue first, and ``--processors`` consumer threads in every worker, leader
+or not, drain it into tickets. With ``INGEST_QUEUE=database`` the queue is
+the shared ingest_jobs table: every worker on every host claims from it, so
+adding workers adds ticket-processing throughput.
+
+The Streamlit app runs the same worker on a background thread
+(start_embedded_worker) unless ``Config.EMBEDDED_FETCHER`` is False.
+
+SIGTERM or SIGINT stops the worker once the batch in flight has committed
+(a second signal exits immediately). While running, the worker refreshes its
+row in worker_heartbeats every ``Config.WORKER_HEARTBEAT_SECONDS``, along
+with its queue depth, and, while it leads, hourly makes sure the monthly tickets
+partitions ahead of now exist, so a long-running deployment never spills into pfuture.
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+import feedback
+from mysql.connector import Error
+from config import Config, EmailConfig
+from database.connection import get_db_connection
+from database.models import WorkerHeartbeat
+from database.partitions import ensure_future_partitions
+from database.setup import init_db
+from email_processing.fetcher import EmailFetcher
+from email_processing.flags import flag_committed
+from email_processing.heartbeat import HeartbeatStore
+from email_processing.leadership import ingest_lease, process_id, run_while_leader
+from email_processing.spool import open_ingest_queue, start_consumer
+from email_processing.watcher import MailboxWatcher
+from tickets.manager import TicketManager
+
+FAILED_OUTCOMES = ("exists", "no_staff", "db_error", "failed")
+
+# Raised by the ingest queues when the database or the spool file is unavailable
+QUEUE_ERRORS = (Error, ConnectionError, sqlite3.Error)
+
+# How often the heartbeat thread re-runs ensure_future_partitions
+PARTITION_CHECK_SECONDS = 3600
+
+
+class IngestionWorker:
+    """One mailbox watcher plus its heartbeat, stopped by signal or stop()"""
+
+    def __init__(self, worker_id=None, processors=None):
+        self.heartbeat = WorkerHeartbeat(
+            worker_id=worker_id or process_id(),
+            hostname=socket.gethostname(),
+            pid=os.getpid(),
+            status='starting',
+            started_at=datetime.now(),
+            last_beat_at=datetime.now(),
+        )
+        self.stop_event = threading.Event()
+        self.manager = TicketManager()
+        self.spool = open_ingest_queue()
+        self.processors = processors or Config.INGEST_PROCESSORS
+        self.watcher = MailboxWatcher(EmailConfig(), self._assign_batch, spool=self.spool)
+        self.lease = ingest_lease(self.heartbeat.worker_id)
+
+    def run(self):
+        """Watch the mailbox until stopped; returns the process exit code"""
+        init_db()
+        self._beat('standby')
+        beater = threading.Thread(target=self._heartbeat_loop, name='worker-heartbeat', daemon=True)
+        beater.start()
+        consumers = []
+        if self.spool is not None:
+            consumers = [
+                start_consumer(self.spool, EmailFetcher(EmailConfig()).analyze_emails,
+                               self._assign_batch, self.stop_event, on_commit=flag_committed)
+                for _ in range(self.processors)
+            ]
+        feedback.info(f"Ingestion worker {self.heartbeat.worker_id} started")
+
+        try:
+            run_while_leader(self.lease, self.stop_event, self.watcher.run, on_change=self._on_leadership)
+        except Exception as e:
+            self.heartbeat.last_error = str(e)
+            self._beat('failed')
+            raise
+        finally:
+            self.stop_event.set()
+            beater.join()
+            for consumer in consumers:
+                consumer.join()
+
+        self._beat('stopped')
+        feedback.info(f"Ingestion worker {self.heartbeat.worker_id} stopped "
+                      f"after creating {self.heartbeat.tickets_created} tickets")
+        return 0
+
+    def stop(self):
+        self.stop_event.set()
+
+    def install_signal_handlers(self):
+        """SIGTERM/SIGINT request a graceful stop; a second one exits at once"""
+        def handle(signum, frame):
+            if self.stop_event.is_set():
+                raise SystemExit(128 + signum)
+            feedback.info(f"Received {signal.Signals(signum).name}; stopping after the current batch")
+            self.stop()
+
+        signal.signal(signal.SIGTERM, handle)
+        signal.signal(signal.SIGINT, handle)
+
+    def _assign_batch(self, emails):
+        outcomes = self.manager.assign_tickets(emails)
+        self.heartbeat.tickets_created += sum(1 for outcome in outcomes if outcome not in FAILED_OUTCOMES)
+        return outcomes
+
+    def _on_leadership(self, leading):
+        self._beat('leader' if leading else 'standby')
+
+    def _heartbeat_loop(self):
+        next_partition_check = time.monotonic() + PARTITION_CHECK_SECONDS
+        while not self.stop_event.wait(Config.WORKER_HEARTBEAT_SECONDS):
+            try:
+                self._beat(self.heartbeat.status)
+            except Exception as e:
+                # Keep beating through outages; the next beat may succeed
+                feedback.error(f"Worker heartbeat failed: {e}")
+            # Only the lease holder runs the DDL, so workers do not race on REORGANIZE
+            if self.heartbeat.status == 'leader' and time.monotonic() >= next_partition_check:
+                self._ensure_partitions()
+                next_partition_check = time.monotonic() + PARTITION_CHECK_SECONDS
+
+    @staticmethod
+    def _ensure_partitions():
+        conn = get_db_connection()
+        if conn is None:
+            return
+        try:
+            created = ensure_future_partitions(conn)
+            if created:
+                feedback.info(f"Created tickets partitions {', '.join(created)}")
+        except Exception as e:
+            feedback.error(f"Error creating tickets partitions: {e}")
+        finally:
+            conn.close()
+
+    def _beat(self, status):
+        self.heartbeat.status = status
+        if status == 'leader':
+            self.heartbeat.last_error = self.watcher.last_error
+        if self.spool is not None:
+            try:
+                self.heartbeat.queue_depth = self.spool.depth()
+            except QUEUE_ERRORS as e:
+                self.heartbeat.queue_depth = None
+                feedback.warning(f"Ingest queue depth unavailable: {e}")
+        HeartbeatStore.beat(self.heartbeat)
+
+
+_embedded = None
+_embedded_lock = threading.Lock()
+
+
+def start_embedded_worker():
+    """Run one IngestionWorker on a daemon thread for this process; later calls return the same worker
+
+    Streamlit re-executes the app script for every session and rerun, so the
+    guard lives here, in an imported module, rather than in session state.
+    """
+    global _embedded
+    with _embedded_lock:
+        if _embedded is None:
+            _embedded = IngestionWorker()
+            threading.Thread(target=_embedded.run, name='embedded-ingestion', daemon=True).start()
+        return _embedded
+
+
+def embedded_worker():
+    """This process's embedded worker, or None if start_embedded_worker() was never called"""
+    return _embedded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--worker-id', help="heartbeat row key (default: Config.WORKER_ID or hostname:pid)")
+    parser.add_argument('--processors', type=int, help="queue consumer threads (default: Config.INGEST_PROCESSORS)")
+    parser.add_argument('--log-level', default='DEBUG' if Config.DEBUG else 'INFO')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level.upper(), format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    worker = IngestionWorker(args.worker_id, args.processors)
+    worker.install_signal_handlers()
+    return worker.run()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
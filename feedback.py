@@ -0,0 +1,75 @@
+"""
+User-facing status messages for code shared by the web UI and headless processes
+
+database, tickets, analytics and email_processing report through here
+instead of calling streamlit directly. During a Streamlit script run the
+calls go to st.error/st.warning/... and st.session_state as before. Anywhere
+else (the ingestion worker, benchmarks, the UI's background threads) they go
+to the ``sacco`` logger. This module never imports streamlit itself, so a
+process that does not already have it loaded never will.
+"""
+import logging
+import sys
+from config import Config
+
+logger = logging.getLogger('sacco')
+
+
+def _streamlit():
+    """The streamlit module if this thread is inside a Streamlit script run, else None"""
+    st = sys.modules.get('streamlit')
+    if st is None:
+        return None
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    return st if get_script_run_ctx(suppress_warning=True) is not None else None
+
+
+def error(message):
+    st = _streamlit()
+    if st:
+        st.error(message)
+    else:
+        logger.error(message)
+
+
+def warning(message):
+    st = _streamlit()
+    if st:
+        st.warning(message)
+    else:
+        logger.warning(message)
+
+
+def info(message):
+    st = _streamlit()
+    if st:
+        st.info(message)
+    else:
+        logger.info(message)
+
+
+def success(message):
+    st = _streamlit()
+    if st:
+        st.success(message)
+    else:
+        logger.info(message)
+
+
+def toast(message):
+    st = _streamlit()
+    if st:
+        st.toast(message)
+    else:
+        logger.info(message)
+
+
+def session_get(key, default=None):
+    """st.session_state.get(key, default) during a script run, default elsewhere"""
+    st = _streamlit()
+    return st.session_state.get(key, default) if st else default
+
+
+def debug_enabled():
+    """The session's debug toggle in the UI, Config.DEBUG elsewhere"""
+    return session_get('debug', Config.DEBUG)
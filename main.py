@@ -11,6 +11,7 @@ from ui.pages import (
     show_main_application
 )
 from email_processing.fetcher import EmailFetcher
+from email_processing.worker import start_embedded_worker
 from config import EmailConfig
 
 # Initialize session state
@@ -26,34 +27,13 @@ def init_session_state():
 
 # Background email fetching thread
 def start_background_fetcher():
-    """Start background email fetching thread"""
-    def fetch_emails_periodically():
-        while True:
-            try:
-                if st.session_state.get('debug', False):
-                    print("🔧 Debug: Background email fetch running...")
-                    
-                config = EmailConfig()
-                fetcher = EmailFetcher(config)
-                emails = fetcher.fetch_emails()
-                fetcher.disconnect()
-                
-                if emails:
-                    from tickets.manager import TicketManager
-                    manager = TicketManager()
-                    for email in emails:
-                        manager.assign_ticket(email)
-                
-                time.sleep(900)  # 15 minutes
-            except Exception as e:
-                print(f"Background fetcher error: {e}")
-                time.sleep(300)  # 5 minutes on error
-    
-    # Start thread only if not already running
-    if 'bg_thread' not in st.session_state:
-        thread = threading.Thread(target=fetch_emails_periodically, daemon=True)
-        thread.start()
-        st.session_state.bg_thread = thread
+    """Start the background ingestion worker (IMAP IDLE, polling fallback) once per process
+
+    Safe to call on every rerun: the worker, its queue consumers and its
+    IMAP session are shared by all browser sessions. Every replica starts
+    one; only the ingest lease holder fetches.
+    """
+    start_embedded_worker()
 
 def main():
     # Page configuration
@@ -74,10 +54,9 @@ def main():
     # Initialize session state
     init_session_state()
     
-    # Initialize database only once per session
-    if not st.session_state.get('app_initialized', False):
-        init_db()
-        st.session_state.app_initialized = True
+    # Apply pending schema migrations; checked once per process, free afterwards
+    init_db()
+    st.session_state.app_initialized = True
     
     # Debug panel (only show if debug mode is enabled)
     if st.session_state.get('debug', False):
@@ -98,8 +77,9 @@ def main():
 
 # Initialize background fetcher on startup
 if __name__ == "__main__":
-    # Start background email fetching
-    start_background_fetcher()
+    # Start background email fetching, unless python -m email_processing.worker does it
+    if Config.EMBEDDED_FETCHER:
+        start_background_fetcher()
     
     # Run the main app
     main()
\ No newline at end of file
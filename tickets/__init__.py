@@ -4,5 +4,6 @@ Handles ticket management, assignment, and resolution
 """
 
 from .manager import TicketManager
+from .archiver import TicketArchiver
 
-__all__ = ['TicketManager']
\ No newline at end of file
+__all__ = ['TicketManager', 'TicketArchiver']
\ No newline at end of file
@@ -0,0 +1,130 @@
+import time
+from datetime import datetime, timedelta
+from config import Config
+from database.connection import get_db_connection
+from analytics.engine import AnalyticsEngine
+
+# Columns copied verbatim from tickets to tickets_archive
+ARCHIVED_COLUMNS = (
+    'id', 'message_id', 'subject', 'sender_email', 'sender_name', 'body_preview',
+    'assigned_to', 'status', 'priority', 'sentiment_score', 'urgency_level',
+    'created_at', 'assigned_at', 'resolved_at', 'resolved_by', 'resolution_notes',
+    'admin_notes', 'ai_insights',
+)
+
+
+class TicketArchiver:
+    """Moves old closed tickets out of the hot tables into tickets_archive
+
+    Tickets closed more than ``older_than_days`` ago are moved in chunks of
+    ``chunk_size``. Each chunk copies the ticket row plus its COMPRESS()ed
+    body into tickets_archive, then deletes it from tickets and
+    ticket_bodies, all in one transaction, so a run can stop at any point
+    and the next run simply continues with what is left. The job sleeps
+    ``throttle_seconds`` between chunks to leave I/O for live traffic and
+    stops once ``max_seconds`` have passed.
+
+    Rollup rows are left alone, so archived tickets keep counting in the
+    day/hour analytics.
+    """
+
+    def __init__(self, older_than_days=None, chunk_size=None, throttle_seconds=None):
+        self.older_than_days = older_than_days if older_than_days is not None else Config.ARCHIVE_AFTER_DAYS
+        self.chunk_size = chunk_size or Config.ARCHIVE_CHUNK_SIZE
+        self.throttle_seconds = throttle_seconds if throttle_seconds is not None else Config.ARCHIVE_THROTTLE_SECONDS
+
+    @property
+    def cutoff(self):
+        return datetime.now() - timedelta(days=self.older_than_days)
+
+    def pending(self):
+        """Number of tickets currently eligible for archival"""
+        conn = get_db_connection()
+        if conn is None:
+            return 0
+        cursor = conn.cursor()
+        try:
+            cursor.execute('''
+                SELECT COUNT(*) FROM tickets
+                WHERE status = 'closed' AND resolved_at < %s
+            ''', (self.cutoff,))
+            return cursor.fetchone()[0]
+        finally:
+            cursor.close()
+            conn.close()
+
+    def run(self, max_seconds=None, on_chunk=None):
+        """Archive until nothing is eligible or the time budget runs out
+
+        on_chunk(archived_so_far) is called after every committed chunk.
+        Returns the number of tickets archived by this run.
+        """
+        max_seconds = max_seconds if max_seconds is not None else Config.ARCHIVE_MAX_SECONDS
+        deadline = time.monotonic() + max_seconds
+        cutoff = self.cutoff
+        archived = 0
+        last_id = 0
+
+        conn = get_db_connection()
+        if conn is None:
+            return 0
+        cursor = conn.cursor()
+        try:
+            while time.monotonic() < deadline:
+                cursor.execute(f'''
+                    SELECT id FROM tickets
+                    WHERE status = 'closed' AND resolved_at < %s AND id > %s
+                    ORDER BY id
+                    LIMIT {int(self.chunk_size)}
+                ''', (cutoff, last_id))
+                ticket_ids = [row[0] for row in cursor.fetchall()]
+                if not ticket_ids:
+                    break
+
+                archived += self._archive_chunk(conn, cursor, ticket_ids)
+                last_id = ticket_ids[-1]
+                AnalyticsEngine.invalidate_cache()
+                if on_chunk:
+                    on_chunk(archived)
+
+                if len(ticket_ids) < self.chunk_size:
+                    break
+                time.sleep(self.throttle_seconds)
+        finally:
+            cursor.close()
+            conn.close()
+        return archived
+
+    @staticmethod
+    def _archive_chunk(conn, cursor, ticket_ids):
+        """Move one chunk atomically; returns how many tickets moved"""
+        placeholders = ', '.join(['%s'] * len(ticket_ids))
+        columns = ', '.join(ARCHIVED_COLUMNS)
+        source_columns = ', '.join(f't.{column}' for column in ARCHIVED_COLUMNS)
+        try:
+            # Re-check eligibility under lock in case a ticket was reopened meanwhile
+            cursor.execute(f'''
+                SELECT id FROM tickets
+                WHERE id IN ({placeholders}) AND status = 'closed'
+                FOR UPDATE
+            ''', ticket_ids)
+            ticket_ids = [row[0] for row in cursor.fetchall()]
+            if not ticket_ids:
+                conn.rollback()
+                return 0
+            placeholders = ', '.join(['%s'] * len(ticket_ids))
+
+            cursor.execute(f'''
+                INSERT IGNORE INTO tickets_archive ({columns}, body_compressed, body_html_compressed)
+                SELECT {source_columns}, COMPRESS(b.body), COMPRESS(b.body_html)
+                FROM tickets t
+                LEFT JOIN ticket_bodies b ON b.ticket_id = t.id
+                WHERE t.id IN ({placeholders})
+            ''', ticket_ids)
+            cursor.execute(f'DELETE FROM ticket_bodies WHERE ticket_id IN ({placeholders})', ticket_ids)
+            cursor.execute(f'DELETE FROM tickets WHERE id IN ({placeholders})', ticket_ids)
+            conn.commit()
+            return len(ticket_ids)
+        except Exception:
+            conn.rollback()
+            raise
@@ -1,22 +1,39 @@
-import streamlit as st
+import feedback
 from datetime import datetime
+from mysql.connector import Error
 from database.connection import get_db_connection
+from analytics.engine import AnalyticsEngine
+from analytics.rollups import RollupStore
 from config import EmailConfig
 from email_processing.analyzer import AIEmailAnalyzer
 from email_processing.fetcher import EmailFetcher
 
 class TicketManager:
+    # Rows per executemany call; keeps multi-row INSERTs under max_allowed_packet
+    INSERT_BATCH_SIZE = 200
+    # Characters of the body kept on the tickets row for list views (tickets.body_preview)
+    BODY_PREVIEW_LENGTH = 300
+    # MySQL named lock serializing round-robin assignment across processes and servers
+    ASSIGN_LOCK = 'sacco_ticket_assign'
+    ASSIGN_LOCK_TIMEOUT = 30  # seconds
+    
     def __init__(self):
         self.config = EmailConfig()
         self.analyzer = AIEmailAnalyzer()
     
-    def get_available_staff(self):
-        """Get list of available IT staff for assignment - EXCLUDES inactive users"""
-        conn = get_db_connection()
-        if conn is None:
-            return []
+    def get_available_staff(self, cursor=None):
+        """Get list of available IT staff for assignment - EXCLUDES inactive users
+
+        Pass an open cursor to run on the caller's connection instead of
+        borrowing a second one from the pool.
+        """
+        conn = None
+        if cursor is None:
+            conn = get_db_connection()
+            if conn is None:
+                return []
+            cursor = conn.cursor()
         
-        cursor = conn.cursor()
         try:
             cursor.execute('''
                 SELECT email, name 
@@ -33,16 +50,17 @@ class TicketManager:
             ''')
             staff = cursor.fetchall()
             
-            if st.session_state.get('debug', False):
-                st.info(f"🔧 Debug: Found {len(staff)} available staff members")
+            if feedback.debug_enabled():
+                feedback.info(f"🔧 Debug: Found {len(staff)} available staff members")
                 
             return staff
         except Exception as e:
-            st.error(f"Error fetching staff: {e}")
+            feedback.error(f"Error fetching staff: {e}")
             return []
         finally:
-            cursor.close()
-            conn.close()
+            if conn is not None:
+                cursor.close()
+                conn.close()
     
     def assign_ticket(self, email_data: dict) -> str:
         conn = get_db_connection()
@@ -50,19 +68,21 @@ class TicketManager:
             return "db_error"
         
         cursor = conn.cursor()
+        locked = False
         
         try:
+            locked = self._lock_assignment(conn, cursor)
+            
             # Check if ticket already exists
-            cursor.execute('SELECT id FROM tickets WHERE message_id = %s', (email_data['message_id'],))
-            if cursor.fetchone():
-                if st.session_state.get('debug', False):
-                    st.info(f"🔧 Debug: Ticket with message_id {email_data['message_id']} already exists")
+            if self._existing_message_ids(cursor, [email_data['message_id']]):
+                if feedback.debug_enabled():
+                    feedback.info(f"🔧 Debug: Ticket with message_id {email_data['message_id']} already exists")
                 return "exists"
             
             # Get available staff for automatic assignment
-            staff_list = self.get_available_staff()
+            staff_list = self.get_available_staff(cursor)
             if not staff_list:
-                st.warning("🔧 Debug: No available staff for assignment")
+                feedback.warning("🔧 Debug: No available staff for assignment")
                 return "no_staff"
             
             # Automatic round-robin assignment
@@ -73,6 +93,7 @@ class TicketManager:
                 'subject': email_data['subject'],
                 'body': email_data['body'],
                 'sentiment_score': email_data.get('sentiment_score', 0),
+                'content_insights': email_data.get('content_insights'),
                 'status': 'open',
                 'created_at': datetime.now()
             })
@@ -80,7 +101,7 @@ class TicketManager:
             # Insert ticket with AI data
             cursor.execute('''
                 INSERT INTO tickets 
-                (message_id, subject, sender_email, sender_name, body, 
+                (message_id, subject, sender_email, sender_name, body_preview, 
                  assigned_to, assigned_at, sentiment_score, urgency_level, ai_insights)
                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
             ''', (
@@ -88,7 +109,7 @@ class TicketManager:
                 email_data['subject'],
                 email_data['sender_email'],
                 email_data['sender_name'],
-                email_data['body'],
+                self._preview(email_data['body']),
                 assigned_to,
                 datetime.now(),
                 email_data.get('sentiment_score', 0),
@@ -96,28 +117,262 @@ class TicketManager:
                 '; '.join(ai_insights) if ai_insights else 'No insights'
             ))
             
-            conn.commit()
             ticket_id = cursor.lastrowid
+            self._claim_message_ids(cursor, {email_data['message_id']: ticket_id})
+            self._insert_bodies(cursor, [(ticket_id, email_data)])
+            RollupStore.add(cursor, [ticket_id])
+            conn.commit()
+            self._unlock_assignment(cursor)
+            locked = False
+            AnalyticsEngine.invalidate_cache()
             
-            if st.session_state.get('debug', False):
-                st.success(f"🔧 Debug: Created ticket #{ticket_id} assigned to {assigned_to}")
+            if feedback.debug_enabled():
+                feedback.success(f"🔧 Debug: Created ticket #{ticket_id} assigned to {assigned_to}")
             
             # Send notification email
-            self._send_assignment_notification(assigned_to, email_data, ticket_id)
+            self._send_assignment_notification(assigned_to, email_data, ticket_id, ai_insights)
             
             return assigned_to
             
         except Exception as e:
-            st.error(f"Database error: {e}")
+            feedback.error(f"Database error: {e}")
             return "db_error"
+        finally:
+            if locked:
+                self._unlock_assignment(cursor)
+            cursor.close()
+            conn.close()
+    
+    def assign_tickets(self, emails: list) -> list:
+        """Create tickets for a whole fetch in a single transaction
+
+        Dedupes every message_id with one query, loads the staff roster once,
+        inserts with executemany and commits once. Returns one outcome per
+        email, in input order, using the same values as assign_ticket: the
+        assignee's email, "exists", "no_staff" or "db_error".
+        """
+        if not emails:
+            return []
+        
+        conn = get_db_connection()
+        if conn is None:
+            return ["db_error"] * len(emails)
+        
+        cursor = conn.cursor()
+        locked = False
+        
+        try:
+            locked = self._lock_assignment(conn, cursor)
+            existing = self._existing_message_ids(cursor, [email['message_id'] for email in emails])
+            
+            staff_emails = [staff[0] for staff in self.get_available_staff(cursor)]
+            last_assigned = self._last_assigned(cursor)
+            
+            outcomes = []
+            created = []
+            now = datetime.now()
+            
+            for email_data in emails:
+                if email_data['message_id'] in existing:
+                    outcomes.append("exists")
+                    continue
+                if not staff_emails:
+                    outcomes.append("no_staff")
+                    continue
+                
+                assigned_to = self._next_assignee(staff_emails, last_assigned)
+                # Staff holding an open ticket drop out of get_available_staff,
+                # so mirror that for the rest of the batch
+                staff_emails.remove(assigned_to)
+                last_assigned = assigned_to
+                existing.add(email_data['message_id'])
+                
+                ai_insights = self.analyzer.generate_insights({
+                    'subject': email_data['subject'],
+                    'body': email_data['body'],
+                    'sentiment_score': email_data.get('sentiment_score', 0),
+                    'content_insights': email_data.get('content_insights'),
+                    'status': 'open',
+                    'created_at': now
+                })
+                created.append((email_data, assigned_to, ai_insights))
+                outcomes.append(assigned_to)
+            
+            if "no_staff" in outcomes:
+                feedback.warning("🔧 Debug: No available staff for assignment")
+            
+            if not created:
+                return outcomes
+            
+            rows = [(
+                email_data['message_id'],
+                email_data['subject'],
+                email_data['sender_email'],
+                email_data['sender_name'],
+                self._preview(email_data['body']),
+                assigned_to,
+                now,
+                email_data.get('sentiment_score', 0),
+                email_data.get('urgency_level', 'normal'),
+                '; '.join(ai_insights) if ai_insights else 'No insights'
+            ) for email_data, assigned_to, ai_insights in created]
+            
+            for start in range(0, len(rows), self.INSERT_BATCH_SIZE):
+                cursor.executemany('''
+                    INSERT INTO tickets 
+                    (message_id, subject, sender_email, sender_name, body_preview, 
+                     assigned_to, assigned_at, sentiment_score, urgency_level, ai_insights)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                ''', rows[start:start + self.INSERT_BATCH_SIZE])
+            
+            ticket_ids = self._ticket_ids(cursor, [email_data['message_id'] for email_data, _, _ in created])
+            self._claim_message_ids(cursor, ticket_ids)
+            self._insert_bodies(cursor, [
+                (ticket_ids[email_data['message_id']], email_data) for email_data, _, _ in created
+            ])
+            RollupStore.add(cursor, ticket_ids.values())
+            
+            conn.commit()
+            self._unlock_assignment(cursor)
+            locked = False
+            AnalyticsEngine.invalidate_cache()
+            
+            if feedback.debug_enabled():
+                feedback.success(f"🔧 Debug: Created {len(created)} tickets from {len(emails)} emails")
+            
+            for email_data, assigned_to, ai_insights in created:
+                self._send_assignment_notification(
+                    assigned_to, email_data, ticket_ids.get(email_data['message_id']), ai_insights
+                )
+            
+            return outcomes
+            
+        except Exception as e:
+            conn.rollback()
+            feedback.error(f"Database error: {e}")
+            return ["db_error"] * len(emails)
+        finally:
+            if locked:
+                self._unlock_assignment(cursor)
+            cursor.close()
+            conn.close()
+    
+    def get_ticket_body(self, ticket_id):
+        """Full (body, body_html) of one ticket, loaded on demand; None if missing
+
+        Archived tickets are read back from tickets_archive.
+        """
+        conn = get_db_connection()
+        if conn is None:
+            return None
+        
+        cursor = conn.cursor()
+        try:
+            cursor.execute('SELECT body, body_html FROM ticket_bodies WHERE ticket_id = %s', (ticket_id,))
+            body = cursor.fetchone()
+            if body is None:
+                cursor.execute('''
+                    SELECT CONVERT(UNCOMPRESS(body_compressed) USING utf8mb4),
+                           CONVERT(UNCOMPRESS(body_html_compressed) USING utf8mb4)
+                    FROM tickets_archive WHERE id = %s
+                ''', (ticket_id,))
+                body = cursor.fetchone()
+            return body
+        except Exception as e:
+            feedback.error(f"Error loading ticket body: {e}")
+            return None
         finally:
             cursor.close()
             conn.close()
     
+    def _insert_bodies(self, cursor, tickets):
+        """Store full bodies for (ticket_id, email_data) pairs in ticket_bodies"""
+        rows = [
+            (ticket_id, email_data['body'], email_data.get('body_html'))
+            for ticket_id, email_data in tickets
+        ]
+        for start in range(0, len(rows), self.INSERT_BATCH_SIZE):
+            cursor.executemany(
+                'INSERT INTO ticket_bodies (ticket_id, body, body_html) VALUES (%s, %s, %s)',
+                rows[start:start + self.INSERT_BATCH_SIZE]
+            )
+    
+    @classmethod
+    def _preview(cls, body):
+        """Whitespace-collapsed start of the body for tickets.body_preview"""
+        return ' '.join((body or '').split())[:cls.BODY_PREVIEW_LENGTH]
+    
+    @staticmethod
+    def _existing_message_ids(cursor, message_ids):
+        """Return the subset of message_ids that already have tickets, live or archived"""
+        message_ids = list(set(message_ids))
+        if not message_ids:
+            return set()
+        placeholders = ', '.join(['%s'] * len(message_ids))
+        cursor.execute(f'SELECT message_id FROM ticket_message_ids WHERE message_id IN ({placeholders})', message_ids)
+        return {row[0] for row in cursor.fetchall()}
+    
+    @staticmethod
+    def _ticket_ids(cursor, message_ids):
+        """Map message_id -> ticket id for freshly inserted tickets"""
+        placeholders = ', '.join(['%s'] * len(message_ids))
+        cursor.execute(f'SELECT message_id, id FROM tickets WHERE message_id IN ({placeholders})', message_ids)
+        return dict(cursor.fetchall())
+    
+    def _claim_message_ids(self, cursor, ticket_ids):
+        """Record message_id -> ticket id; a duplicate raises, as the old UNIQUE key did
+
+        tickets is partitioned by created_at, so message_id cannot be unique
+        there; ticket_message_ids holds the constraint instead.
+        """
+        rows = list(ticket_ids.items())
+        for start in range(0, len(rows), self.INSERT_BATCH_SIZE):
+            cursor.executemany(
+                'INSERT INTO ticket_message_ids (message_id, ticket_id) VALUES (%s, %s)',
+                rows[start:start + self.INSERT_BATCH_SIZE]
+            )
+    
+    @classmethod
+    def _lock_assignment(cls, conn, cursor):
+        """Take the assignment lock; raises Error if it is not granted in time
+
+        Held from reading the available staff and the last assignee until
+        the tickets are committed, so two workers (or a worker and the UI)
+        cannot both hand out the same staff member.
+        """
+        cursor.execute('SELECT GET_LOCK(%s, %s)', (cls.ASSIGN_LOCK, cls.ASSIGN_LOCK_TIMEOUT))
+        if cursor.fetchone()[0] != 1:
+            raise Error(msg="Timed out waiting for another process to finish assigning tickets")
+        # End any earlier snapshot so the reads below see the previous holder's tickets
+        conn.commit()
+        return True
+    
+    @classmethod
+    def _unlock_assignment(cls, cursor):
+        # Pooled connections outlive this call, so release explicitly
+        try:
+            cursor.execute('SELECT RELEASE_LOCK(%s)', (cls.ASSIGN_LOCK,))
+            cursor.fetchone()
+        except Error as e:
+            feedback.warning(f"Could not release the ticket assignment lock: {e}")
+    
+    @staticmethod
+    def _last_assigned(cursor):
+        """Email of the most recently auto-assigned staff member, if any"""
+        cursor.execute('SELECT assigned_to FROM tickets ORDER BY assigned_at DESC, id DESC LIMIT 1')
+        row = cursor.fetchone()
+        return row[0] if row else None
+    
+    @staticmethod
+    def _next_assignee(staff_emails, last_assigned):
+        """Round-robin pick: the staff member after last_assigned, else the first"""
+        if last_assigned in staff_emails:
+            return staff_emails[(staff_emails.index(last_assigned) + 1) % len(staff_emails)]
+        return staff_emails[0]
+    
     def _automatic_assignment(self, cursor, staff_list):
         """Automatic round-robin assignment among available staff"""
-        cursor.execute('SELECT assigned_to FROM tickets ORDER BY assigned_at DESC LIMIT 1')
-        last_assigned = cursor.fetchone()
+        last_assigned = self._last_assigned(cursor)
         
         staff_emails = [staff[0] for staff in staff_list]
         
@@ -132,13 +387,7 @@ class TicketManager:
         if not verified_staff_emails:
             return None
         
-        if last_assigned and last_assigned[0] in verified_staff_emails:
-            last_index = verified_staff_emails.index(last_assigned[0])
-            next_index = (last_index + 1) % len(verified_staff_emails)
-        else:
-            next_index = 0
-            
-        return verified_staff_emails[next_index]
+        return self._next_assignee(verified_staff_emails, last_assigned)
     
     def manual_assign_ticket(self, ticket_id, assigned_to):
         """Manual ticket assignment by admin"""
@@ -148,19 +397,23 @@ class TicketManager:
         
         cursor = conn.cursor()
         try:
+            RollupStore.retract(cursor, [ticket_id])
             cursor.execute('''
                 UPDATE tickets 
                 SET assigned_to = %s, assigned_at = %s 
                 WHERE id = %s
             ''', (assigned_to, datetime.now(), ticket_id))
+            RollupStore.add(cursor, [ticket_id])
             conn.commit()
+            AnalyticsEngine.invalidate_cache()
             
-            if st.session_state.get('debug', False):
-                st.success(f"🔧 Debug: Manually assigned ticket #{ticket_id} to {assigned_to}")
+            if feedback.debug_enabled():
+                feedback.success(f"🔧 Debug: Manually assigned ticket #{ticket_id} to {assigned_to}")
                 
             return True
         except Exception as e:
-            st.error(f"Error assigning ticket: {e}")
+            conn.rollback()
+            feedback.error(f"Error assigning ticket: {e}")
             return False
         finally:
             cursor.close()
@@ -174,25 +427,29 @@ class TicketManager:
         
         cursor = conn.cursor()
         try:
+            RollupStore.retract(cursor, [ticket_id])
             cursor.execute('''
                 UPDATE tickets 
                 SET status = 'closed', resolved_at = %s, resolved_by = %s, resolution_notes = %s 
                 WHERE id = %s
             ''', (datetime.now(), resolved_by, resolution_notes, ticket_id))
+            RollupStore.add(cursor, [ticket_id])
             conn.commit()
+            AnalyticsEngine.invalidate_cache()
             
-            if st.session_state.get('debug', False):
-                st.success(f"🔧 Debug: Closed ticket #{ticket_id}")
+            if feedback.debug_enabled():
+                feedback.success(f"🔧 Debug: Closed ticket #{ticket_id}")
                 
             return True
         except Exception as e:
-            st.error(f"Error closing ticket: {e}")
+            conn.rollback()
+            feedback.error(f"Error closing ticket: {e}")
             return False
         finally:
             cursor.close()
             conn.close()
     
-    def _send_assignment_notification(self, staff_email: str, email_data: dict, ticket_id: int):
+    def _send_assignment_notification(self, staff_email: str, email_data: dict, ticket_id: int, ai_insights: list):
         try:
             subject = f"🚨 New Ticket Assigned: #{ticket_id} - {email_data['subject']}"
             urgency_icon = "🔴" if email_data.get('urgency_level') == 'urgent' else "🟡"
@@ -207,7 +464,7 @@ class TicketManager:
             **Sentiment:** {email_data.get('sentiment_label', 'neutral')}
             
             **AI Insights:**
-            {chr(10).join(self.analyzer.generate_insights(email_data))}
+            {chr(10).join(ai_insights)}
             
             Please log in to the system to view and resolve this ticket.
             
@@ -215,8 +472,8 @@ class TicketManager:
             🤖 Sacco Support System
             """
             
-            if st.session_state.get('debug', False):
-                st.info(f"🔧 Debug: Would send email to {staff_email}: {subject}")
+            if feedback.debug_enabled():
+                feedback.info(f"🔧 Debug: Would send email to {staff_email}: {subject}")
             
         except Exception as e:
-            st.error(f"Failed to send notification: {e}")
\ No newline at end of file
+            feedback.error(f"Failed to send notification: {e}")
\ No newline at end of file
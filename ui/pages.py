@@ -1,6 +1,9 @@
 import streamlit as st
+import os
+import sqlite3
 import time
 import re
+from datetime import datetime, timedelta
 import hashlib
 import pandas as pd
 import plotly.express as px
@@ -9,12 +12,23 @@ from mysql.connector import Error
 
 from database.connection import get_db_connection
 from database.setup import reset_db
+from database.partitions import ensure_future_partitions, drop_empty_partitions
+from database.leases import Lease
 from auth.authentication import AuthSystem
 from tickets.manager import TicketManager
+from tickets.archiver import TicketArchiver
 from analytics.engine import AnalyticsEngine
+from analytics.rollups import RollupStore
 from ui.components import UIComponents
 from email_processing.fetcher import EmailFetcher
-from config import EmailConfig
+from email_processing.analyzer import AIEmailAnalyzer
+from email_processing.pipeline import IngestPipeline
+from email_processing.heartbeat import HeartbeatStore
+from email_processing.leadership import INGEST_LEASE, ingest_lease, run_once_as_leader
+from email_processing.spool import open_ingest_queue
+from email_processing.session import get_session_manager
+from email_processing.worker import embedded_worker
+from config import Config, EmailConfig
 
 # You would need to split your existing page functions here
 # Due to length, I'll show the structure for one function:
@@ -152,7 +166,8 @@ def show_ai_dashboard():
 
     try:
         # --- Analytics data ---
-        analytics = AnalyticsEngine.get_dashboard_metrics(conn)
+        include_archive = st.checkbox("🗄️ Include archived tickets", key="dashboard_include_archive")
+        analytics = AnalyticsEngine.get_dashboard_metrics(conn, include_archive=include_archive)
 
         # =======================
         # KPI CARDS
@@ -236,41 +251,66 @@ def show_ai_dashboard():
         with col1:
             st.info("""
             **Email Automation Status**: Active  
-            **Last Check**: Recent  
-            **Next Fetch**: 15 minutes
+            **Delivery**: Push (IMAP IDLE)  
+            **Fallback Polling**: 15 minutes
             """)
         
         with col2:
             if st.button("🔄 Fetch Now", width='stretch', type="secondary"):
-                with st.spinner("🤖 Analyzing emails..."):
-                    try:
-                        config = EmailConfig()
-                        fetcher = EmailFetcher(config)
-                        emails = fetcher.fetch_emails()
-                        fetcher.disconnect()
-                        
-                        if emails:
-                            manager = TicketManager()
-                            results = []
-                            for email in emails:
-                                result = manager.assign_ticket(email)
-                                results.append(result)
-                            
-                            success_count = sum(1 for r in results if r not in ["exists", "no_staff", "db_error"])
-                            
-                            if success_count > 0:
-                                st.success(f"✅ Created {success_count} new tickets from {len(emails)} emails")
-                            else:
-                                st.info("📭 No new tickets created (all emails already processed)")
-                        else:
-                            st.info("📭 No new emails found")
-                            
-                    except Exception as e:
-                        st.error(f"❌ Email fetch failed: {str(e)}")
+                _fetch_now()
     finally:
         conn.close()
 
 
+def _fetch_now():
+    """Ingest new mail on demand without racing the process that holds the ingest lease"""
+    worker = embedded_worker()
+    if worker is not None and worker.heartbeat.status == 'leader':
+        # This process is already the fetcher: wake it rather than run a second fetch beside it
+        worker.watcher.nudge()
+        st.info("📬 Checking the mailbox now; new tickets appear in a few seconds")
+        return
+
+    with st.spinner("🤖 Analyzing emails..."):
+        config = EmailConfig()
+        fetcher = EmailFetcher(config)
+        pipeline = IngestPipeline(fetcher, TicketManager().assign_tickets)
+        progress = st.empty()
+        
+        def show_progress(batch, results):
+            progress.info(f"📥 {pipeline.stats['fetch'].items} emails read, "
+                          f"{pipeline.created} tickets created so far...")
+        
+        try:
+            led = run_once_as_leader(
+                ingest_lease(), lambda term_event: pipeline.run(on_batch=show_progress, stop_event=term_event)
+            )
+            progress.empty()
+            
+            if not led:
+                leader = Lease.current(INGEST_LEASE)
+                st.info(f"📬 {leader[0] if leader else 'Another process'} is fetching mail; "
+                        f"new emails become tickets as they arrive")
+                return
+            
+            fetched = pipeline.stats['fetch'].items
+            if fetched:
+                if pipeline.created > 0:
+                    st.success(f"✅ Created {pipeline.created} new tickets from {fetched} emails")
+                else:
+                    st.info("📭 No new tickets created (all emails already processed)")
+            else:
+                st.info("📭 No new emails found")
+            
+            if st.session_state.get('debug', False):
+                st.code("\n".join(pipeline.report()))
+                
+        except Exception as e:
+            st.error(f"❌ Email fetch failed: {str(e)}")
+        finally:
+            fetcher.disconnect()
+
+
 def show_recent_tickets_with_insights(conn):
     """Show recent tickets with AI insights in styled cards"""
     cursor = conn.cursor()
@@ -278,7 +318,7 @@ def show_recent_tickets_with_insights(conn):
     try:
         cursor.execute('''
             SELECT id, subject, sender_email, assigned_to, status, priority,
-                   created_at, sentiment_score, urgency_level, ai_insights
+                   created_at, sentiment_score, urgency_level, ai_insights, body_preview
             FROM tickets 
             ORDER BY created_at DESC 
             LIMIT 10
@@ -316,6 +356,8 @@ def show_recent_tickets_with_insights(conn):
                 st.markdown(f"<div class='ticket-title'>#{ticket['id']}: {ticket['subject']}</div>", unsafe_allow_html=True)
                 st.markdown(f"<div class='ticket-meta'>📧 {ticket['sender_email']} &nbsp; | &nbsp; 👤 {ticket['assigned_to']}</div>", unsafe_allow_html=True)
                 st.markdown(f"{status_badge} {urgency_badge} <span class='badge'>⚡ {ticket['priority']}</span> <span class='badge'>{sentiment_icon} sentiment</span>", unsafe_allow_html=True)
+                if ticket["body_preview"]:
+                    st.caption(ticket["body_preview"])
 
                 # AI Insights
                 if ticket["ai_insights"]:
@@ -368,55 +410,76 @@ def show_ticket_management():
         conn.close()
 
 
+TICKET_PAGE_SIZES = [25, 50, 100]
+
+STATUS_BADGES = {
+    "closed": ("closed", "✅"),
+}
+URGENCY_BADGES = {
+    "urgent": ("urgent", "🔴"),
+    "high": ("high", "🟡"),
+}
+
+
 def show_all_tickets(conn):
-    """Display all tickets in a styled table"""
+    """Display tickets one keyset page at a time, filtered in SQL"""
     cursor = conn.cursor()
 
     try:
-        cursor.execute('''
-            SELECT id, subject, sender_email, assigned_to, status, priority, 
-                   urgency_level, created_at, resolved_at
-            FROM tickets 
-            ORDER BY created_at DESC
-        ''')
+        cursor.execute('SELECT email FROM users ORDER BY email')
+        assignees = [row[0] for row in cursor.fetchall()]
         
-        tickets = cursor.fetchall()
-        column_names = [i[0] for i in cursor.description]
+        col1, col2, col3, col4, col5, col6 = st.columns([1, 1, 2, 2, 1, 1])
+        with col1:
+            status = st.selectbox("Status", ["All", "open", "closed"], key="tickets_status")
+        with col2:
+            urgency = st.selectbox("Urgency", ["All", "urgent", "high", "normal"], key="tickets_urgency")
+        with col3:
+            assignee = st.selectbox("Assigned To", ["All", "Unassigned"] + assignees, key="tickets_assignee")
+        with col4:
+            date_range = st.date_input("Created Between", value=(), key="tickets_dates")
+        with col5:
+            page_size = st.selectbox("Per Page", TICKET_PAGE_SIZES, key="tickets_page_size")
+        with col6:
+            include_archive = st.checkbox("Include archive", key="tickets_include_archive")
+        
+        filters = (status, urgency, assignee, tuple(date_range), page_size, include_archive)
+        
+        # Stack of (created_at, id) keys, one per page start; reset when filters change
+        if st.session_state.get("tickets_filters") != filters:
+            st.session_state.tickets_filters = filters
+            st.session_state.tickets_page_keys = [None]
+        page_keys = st.session_state.tickets_page_keys
+        
+        tickets, column_names, has_more = _fetch_ticket_page(
+            cursor, status, urgency, assignee, date_range, page_keys[-1], page_size, include_archive
+        )
         
         if tickets:
-            df = pd.DataFrame(tickets, columns=column_names)
-
-            # Format datetime columns
-            for col in ["created_at", "resolved_at"]:
-                df[col] = df[col].apply(lambda x: x.strftime("%Y-%m-%d %H:%M") if pd.notnull(x) else "")
-
-            # Add status badges
-            def format_status(x):
-                if x == "closed":
-                    return f"<span class='status-badge closed'>✅ {x}</span>"
-                else:
-                    return f"<span class='status-badge open'>🟡 {x}</span>"
-
-            df["status"] = df["status"].apply(format_status)
-
-            # Add urgency badges
-            def format_urgency(x):
-                if x == "urgent":
-                    return f"<span class='urgency-badge urgent'>🔴 {x}</span>"
-                elif x == "high":
-                    return f"<span class='urgency-badge high'>🟡 {x}</span>"
-                else:
-                    return f"<span class='urgency-badge normal'>🟢 {x}</span>"
-
-            df["urgency_level"] = df["urgency_level"].apply(format_urgency)
+            df = _format_ticket_page(pd.DataFrame(tickets, columns=column_names))
 
             # Render as HTML for styling
             st.markdown(
                 df.to_html(escape=False, index=False), 
                 unsafe_allow_html=True
             )
+            
+            last = tickets[-1]
+            nav1, nav2, nav3 = st.columns([1, 2, 1])
+            with nav1:
+                st.button("◀ Newer", disabled=len(page_keys) == 1,
+                          on_click=page_keys.pop, key="tickets_newer")
+            with nav2:
+                st.caption(f"Page {len(page_keys)} · {len(tickets)} tickets")
+            with nav3:
+                st.button("Older ▶", disabled=not has_more,
+                          on_click=page_keys.append, args=((last[column_names.index('created_at')], last[0]),),
+                          key="tickets_older")
+        elif len(page_keys) > 1:
+            st.info("📭 No more tickets.")
+            st.button("◀ Newer", on_click=page_keys.pop, key="tickets_newer")
         else:
-            st.info("📭 No tickets found in the system.")
+            st.info("📭 No tickets match these filters.")
     
     except Error as e:
         st.error(f"Error loading tickets: {e}")
@@ -424,6 +487,83 @@ def show_all_tickets(conn):
         cursor.close()
 
 
+def _fetch_ticket_page(cursor, status, urgency, assignee, date_range, after, page_size, include_archive=False):
+    """One page of tickets newest first, starting after the (created_at, id) key
+
+    Returns (rows, column names, whether an older page exists). Filters are
+    applied in SQL and the page is read by seeking on (created_at, id), so
+    the cost does not grow with the page number. With include_archive the
+    same seek runs against tickets_archive and the two pages are merged.
+    """
+    conditions = []
+    params = []
+    if status != "All":
+        conditions.append("status = %s")
+        params.append(status)
+    if urgency != "All":
+        conditions.append("urgency_level = %s")
+        params.append(urgency)
+    if assignee == "Unassigned":
+        conditions.append("assigned_to IS NULL")
+    elif assignee != "All":
+        conditions.append("assigned_to = %s")
+        params.append(assignee)
+    if len(date_range) >= 1:
+        conditions.append("created_at >= %s")
+        params.append(date_range[0])
+    if len(date_range) == 2:
+        conditions.append("created_at < %s")
+        params.append(date_range[1] + timedelta(days=1))
+    if after is not None:
+        conditions.append("(created_at < %s OR (created_at = %s AND id < %s))")
+        params.extend([after[0], after[0], after[1]])
+    
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    page_query = f'''
+        SELECT id, subject, sender_email, assigned_to, status, priority, 
+               urgency_level, created_at, resolved_at
+        FROM {{table}} 
+        {where}
+        ORDER BY created_at DESC, id DESC
+        LIMIT %s
+    '''
+    if include_archive:
+        cursor.execute(f'''
+            SELECT * FROM ({page_query.format(table="tickets")}) AS live
+            UNION ALL
+            SELECT * FROM ({page_query.format(table="tickets_archive")}) AS archived
+            ORDER BY created_at DESC, id DESC
+            LIMIT %s
+        ''', (params + [page_size + 1]) * 2 + [page_size + 1])
+    else:
+        cursor.execute(page_query.format(table="tickets"), params + [page_size + 1])
+    
+    rows = cursor.fetchall()
+    column_names = [i[0] for i in cursor.description]
+    return rows[:page_size], column_names, len(rows) > page_size
+
+
+def _format_ticket_page(df):
+    """Date strings and HTML status/urgency badges, computed column-wise"""
+    # Format datetime columns
+    for col in ["created_at", "resolved_at"]:
+        df[col] = pd.to_datetime(df[col]).dt.strftime("%Y-%m-%d %H:%M").fillna("")
+
+    # Add status badges
+    df["status"] = _badges("status-badge", df["status"].fillna(""), STATUS_BADGES, ("open", "🟡"))
+
+    # Add urgency badges
+    df["urgency_level"] = _badges("urgency-badge", df["urgency_level"].fillna(""), URGENCY_BADGES, ("normal", "🟢"))
+    return df
+
+
+def _badges(css_class, values, badges, default):
+    """Wrap each value in a badge span; badges maps value -> (modifier class, icon)"""
+    modifiers = values.map({value: badge[0] for value, badge in badges.items()}).fillna(default[0])
+    icons = values.map({value: badge[1] for value, badge in badges.items()}).fillna(default[1])
+    return "<span class='" + css_class + " " + modifiers + "'>" + icons + " " + values + "</span>"
+
+
 def show_manual_assignment(conn):
     """Manual ticket assignment interface for Eva/admin"""
     st.subheader("👑 Manual Ticket Assignment")
@@ -543,7 +683,7 @@ def show_ticket_closure(conn):
         current_user_email = st.session_state.user['email']
         
         cursor.execute('''
-            SELECT id, subject, sender_email, created_at, assigned_to 
+            SELECT id, subject, sender_email, created_at, assigned_to, body_preview 
             FROM tickets 
             WHERE status = "open" AND assigned_to = %s
             ORDER BY created_at DESC
@@ -555,12 +695,19 @@ def show_ticket_closure(conn):
             st.info(f"🔧 You have {len(my_tickets)} open ticket(s) assigned to you")
             
             for ticket in my_tickets:
-                ticket_id, subject, sender_email, created_at, assigned_to = ticket
+                ticket_id, subject, sender_email, created_at, assigned_to, body_preview = ticket
                 
                 with st.expander(f"🎫 Ticket #{ticket_id}: {subject}", expanded=True):
                     st.write(f"**From:** {sender_email}")
                     st.write(f"**Created:** {created_at.strftime('%Y-%m-%d %H:%M')}")
                     
+                    # Full body lives in ticket_bodies; load it only when asked for
+                    if st.toggle("📄 Show full email", key=f"body_{ticket_id}"):
+                        body = TicketManager().get_ticket_body(ticket_id)
+                        st.text(body[0] if body else "Email body not available.")
+                    elif body_preview:
+                        st.caption(body_preview)
+                    
                     # Resolution form
                     with st.form(f"resolve_ticket_{ticket_id}"):
                         resolution_notes = st.text_area(
@@ -886,7 +1033,7 @@ def show_user_analytics(conn):
 
 
 def show_advanced_analytics():
-    """Advanced analytics for admin"""
+    """Advanced analytics for admin, read from the day/hour rollups"""
     st.markdown('<div class="main-header">📈 ADVANCED ANALYTICS</div>', unsafe_allow_html=True)
     
     conn = get_db_connection()
@@ -899,60 +1046,47 @@ def show_advanced_analytics():
         col1, col2, col3 = st.columns(3)
         with col1:
             period = st.selectbox("📅 Time Period", 
-                                ["Last 7 days", "Last 30 days", "Last 90 days", "All time"])
+                                ["Last 24 hours", "Last 7 days", "Last 30 days", "Last 90 days", "All time"])
         
-        # Convert period to SQL
+        # Convert period to a rollup grain and start bucket
+        now = datetime.now()
         period_map = {
-            "Last 7 days": "7 DAY",
-            "Last 30 days": "30 DAY",
-            "Last 90 days": "90 DAY",
-            "All time": "1000 YEAR"  # Practical "all time"
+            "Last 24 hours": ("hour", now.replace(minute=0, second=0, microsecond=0) - timedelta(hours=23)),
+            "Last 7 days": ("day", (now - timedelta(days=7)).replace(hour=0, minute=0, second=0, microsecond=0)),
+            "Last 30 days": ("day", (now - timedelta(days=30)).replace(hour=0, minute=0, second=0, microsecond=0)),
+            "Last 90 days": ("day", (now - timedelta(days=90)).replace(hour=0, minute=0, second=0, microsecond=0)),
+            "All time": ("day", None)
         }
+        grain, since = period_map[period]
         
-        cursor = conn.cursor()
+        rollups = RollupStore.load(conn, grain, since)
         
-        # Ticket volume trends
-        st.subheader("📊 Ticket Volume Trends")
-        cursor.execute(f'''
-            SELECT DATE(created_at) as date, COUNT(*) as count
-            FROM tickets
-            WHERE created_at >= DATE_SUB(NOW(), INTERVAL {period_map[period]})
-            GROUP BY DATE(created_at)
-            ORDER BY date
-        ''')
+        if rollups.empty:
+            st.info("📭 No analytics data for this period. If tickets exist, run \"Rebuild Analytics\" in Settings.")
+            return
         
-        trend_data = cursor.fetchall()
+        by_bucket = rollups.groupby('bucket')[['tickets_created', 'sentiment_sum']].sum().sort_index()
         
-        if trend_data:
-            dates = [row[0] for row in trend_data]
-            counts = [row[1] for row in trend_data]
-            
-            fig = px.line(x=dates, y=counts, title=f"Ticket Volume Trend - {period}",
-                         labels={'x': 'Date', 'y': 'Number of Tickets'})
-            st.plotly_chart(fig, width='stretch')
+        # Ticket volume trends
+        st.subheader("📊 Ticket Volume Trends")
+        fig = px.line(x=by_bucket.index, y=by_bucket['tickets_created'], title=f"Ticket Volume Trend - {period}",
+                     labels={'x': 'Hour' if grain == 'hour' else 'Date', 'y': 'Number of Tickets'})
+        st.plotly_chart(fig, width='stretch')
         
         # Staff performance comparison
         st.subheader("👥 Staff Performance Comparison")
-        cursor.execute(f'''
-            SELECT 
-                assigned_to,
-                COUNT(*) as total_tickets,
-                SUM(CASE WHEN status = 'closed' THEN 1 ELSE 0 END) as closed_tickets,
-                AVG(CASE WHEN status = 'closed' THEN TIMESTAMPDIFF(HOUR, created_at, resolved_at) ELSE NULL END) as avg_resolution_hours
-            FROM tickets
-            WHERE created_at >= DATE_SUB(NOW(), INTERVAL {period_map[period]})
-                AND assigned_to IS NOT NULL
-            GROUP BY assigned_to
-            ORDER BY closed_tickets DESC
-        ''')
-        
-        staff_performance = cursor.fetchall()
+        staff = rollups[rollups['assigned_to'] != '']
         
-        if staff_performance:
-            df = pd.DataFrame(staff_performance, 
-                            columns=['Staff', 'Total Tickets', 'Closed Tickets', 'Avg Resolution Hours'])
-            df['Closed Tickets'] = pd.to_numeric(df['Closed Tickets'], errors='coerce')
-            df['Total Tickets'] = pd.to_numeric(df['Total Tickets'], errors='coerce')
+        if not staff.empty:
+            staff = staff.groupby('assigned_to')[['tickets_created', 'tickets_closed', 'resolution_hours']].sum()
+            df = pd.DataFrame({
+                'Staff': staff.index,
+                'Total Tickets': staff['tickets_created'].round().astype(int).values,
+                'Closed Tickets': staff['tickets_closed'].round().astype(int).values,
+                'Avg Resolution Hours': (
+                    staff['resolution_hours'] / staff['tickets_closed'].where(staff['tickets_closed'] > 0)
+                ).round(4).values
+            }).sort_values('Closed Tickets', ascending=False)
             df['Completion Rate'] = (df['Closed Tickets'] / df['Total Tickets'] * 100).round(1)
             
             # Create performance chart
@@ -966,60 +1100,30 @@ def show_advanced_analytics():
         
         # Sentiment analysis over time
         st.subheader("😊 Sentiment Analysis Trend")
-
-        # First, get all dates in the range
-        cursor.execute(f'''
-            SELECT DISTINCT DATE(created_at) as date
-            FROM tickets
-            WHERE created_at >= DATE_SUB(NOW(), INTERVAL {period_map[period]})
-            ORDER BY date
-        ''')
-        all_dates = [row[0] for row in cursor.fetchall()]
-
-        # Then get sentiment data with proper handling
-        cursor.execute(f'''
-            SELECT 
-                DATE(created_at) as date, 
-                COALESCE(ROUND(AVG(sentiment_score), 3), 0) as avg_sentiment
-            FROM tickets
-            WHERE created_at >= DATE_SUB(NOW(), INTERVAL {period_map[period]})
-            GROUP BY DATE(created_at)
-            ORDER BY date
-        ''')
-
-        sentiment_data = cursor.fetchall()
-        sentiment_dict = {row[0]: float(row[1]) for row in sentiment_data}
-
-        # Fill in missing dates with 0 or None
-        dates = []
-        sentiments = []
-        for date in all_dates:
-            dates.append(date)
-            sentiments.append(sentiment_dict.get(date, 0.0))
-
-        if dates and sentiments:
-            fig = px.line(
-                x=dates, 
-                y=sentiments, 
-                title="Average Sentiment Over Time",
-                labels={'x': 'Date', 'y': 'Sentiment Score'}
-            )
-            
-            fig.update_traces(
-                mode='lines+markers',
-                line=dict(width=3, color='#FF6B6B'),
-                marker=dict(size=6, color='#FF6B6B')
-            )
-            
-            fig.add_hline(y=0, line_dash="dash", line_color="red")
-            fig.update_layout(yaxis=dict(range=[-1, 1]))
-            
-            st.plotly_chart(fig, width='stretch')
+        
+        sentiments = (by_bucket['sentiment_sum'] / by_bucket['tickets_created']).round(3).fillna(0.0)
+        
+        fig = px.line(
+            x=sentiments.index, 
+            y=sentiments.values, 
+            title="Average Sentiment Over Time",
+            labels={'x': 'Hour' if grain == 'hour' else 'Date', 'y': 'Sentiment Score'}
+        )
+        
+        fig.update_traces(
+            mode='lines+markers',
+            line=dict(width=3, color='#FF6B6B'),
+            marker=dict(size=6, color='#FF6B6B')
+        )
+        
+        fig.add_hline(y=0, line_dash="dash", line_color="red")
+        fig.update_layout(yaxis=dict(range=[-1, 1]))
+        
+        st.plotly_chart(fig, width='stretch')
     
     except Error as e:
         st.error(f"Analytics error: {e}")
     finally:
-        cursor.close()
         conn.close()
 
 
@@ -1192,13 +1296,60 @@ def show_settings():
             
             if st.form_submit_button("🔗 Test Connection"):
                 with st.spinner("Testing email connection..."):
-                    config = EmailConfig()
-                    fetcher = EmailFetcher(config)
-                    if fetcher.connect():
+                    # A new login, not a pooled session, so the credentials are actually checked
+                    try:
+                        get_session_manager().check_login()
                         st.success("✅ Email connection successful!")
-                        fetcher.disconnect()
-                    else:
-                        st.error("❌ Failed to connect to email server")
+                    except Exception as e:
+                        st.error(f"❌ Failed to connect to email server: {e}")
+        
+        st.subheader("Ingestion Workers")
+        if Config.EMBEDDED_FETCHER:
+            st.caption("📥 Mail is fetched by this web app's background thread (EMBEDDED_FETCHER=True)")
+        shared_queue = Config.INGEST_QUEUE == 'database'
+        if Config.INGEST_SPOOL and (shared_queue or os.path.exists(Config.INGEST_SPOOL_PATH)):
+            spool = open_ingest_queue()
+            try:
+                depth = spool.depth()
+                oldest_age = spool.oldest_age() if depth else 0
+                st.metric(
+                    f"📬 Ingest queue ({'all servers' if shared_queue else 'this server'})", f"{depth} emails",
+                    delta=f"oldest waiting {oldest_age:.0f}s" if depth else None, delta_color="off"
+                )
+                dead = spool.dead_count()
+                if dead:
+                    st.warning(f"☠️ {dead} queued emails failed {Config.INGEST_MAX_FAILURES} times and were set aside")
+                    with st.expander("☠️ Dead letters"):
+                        st.dataframe(pd.DataFrame(
+                            spool.dead_letters(), columns=['Message ID', 'Failures', 'Last error', 'Set aside at']
+                        ), hide_index=True, width='stretch')
+                        if st.button("🔁 Requeue dead letters", key="requeue_dead"):
+                            st.success(f"✅ {spool.requeue_dead()} emails back on the queue")
+                            time.sleep(1)
+                            st.rerun()
+            except (Error, ConnectionError, sqlite3.Error) as e:
+                st.warning(f"⚠️ Ingest queue unavailable: {e}")
+        leader = Lease.current(INGEST_LEASE)
+        if leader:
+            st.caption(f"🗝️ Fetching: {leader[0]} (lease until {leader[1]:%H:%M:%S})")
+        else:
+            st.caption("🗝️ No process holds the ingest lease; mail is not being fetched")
+        workers = HeartbeatStore.recent()
+        if workers:
+            stale_after = timedelta(seconds=Config.WORKER_HEARTBEAT_SECONDS * 3)
+            now = datetime.now()
+            st.dataframe(pd.DataFrame([{
+                'Worker': worker.worker_id,
+                'Status': worker.status if worker.status not in ('leader', 'standby')
+                or now - worker.last_beat_at <= stale_after else '⚠️ silent',
+                'Last heartbeat': f"{(now - worker.last_beat_at).total_seconds():.0f}s ago",
+                'Started': worker.started_at,
+                'Tickets created': worker.tickets_created,
+                'Queued': worker.queue_depth if worker.queue_depth is not None else 'unknown',
+                'Last error': worker.last_error or '',
+            } for worker in workers]), hide_index=True, width='stretch')
+        else:
+            st.info("ℹ️ No ingestion worker has reported in the last 24 hours (python -m email_processing.worker)")
     
     with tab3:
         st.subheader("System Maintenance")
@@ -1208,17 +1359,64 @@ def show_settings():
         col1, col2 = st.columns(2)
         
         with col1:
+            cache_stats = AIEmailAnalyzer.get_cache().stats()
+            st.caption(
+                f"🧠 Analysis cache: {cache_stats['hit_rate']:.0%} hit rate, "
+                f"{cache_stats['size']} entries in memory (rules v{cache_stats['version']})"
+            )
             if st.button("🔄 Clear Cache", width='stretch'):
-                st.info("🗑️ Cache cleared successfully")
+                if AIEmailAnalyzer.get_cache().clear():
+                    st.info("🗑️ Cache cleared successfully")
             
             if st.button("📊 Rebuild Analytics", width='stretch'):
                 with st.spinner("Rebuilding analytics data..."):
-                    time.sleep(2)
-                    st.success("✅ Analytics data rebuilt!")
+                    conn = get_db_connection()
+                    if conn is None:
+                        st.error("❌ Cannot connect to database")
+                    else:
+                        try:
+                            scanned = RollupStore.rebuild(conn)
+                            AnalyticsEngine.invalidate_cache()
+                            st.success(f"✅ Analytics data rebuilt from {scanned} tickets!")
+                        except Error as e:
+                            st.error(f"Error rebuilding analytics: {e}")
+                        finally:
+                            conn.close()
         
         with col2:
+            archiver = TicketArchiver()
             if st.button("🗃️ Archive Old Tickets", width='stretch'):
-                st.info("📦 Tickets older than 90 days have been archived")
+                progress = st.empty()
+                try:
+                    archived = archiver.run(
+                        on_chunk=lambda count: progress.info(f"📦 Archived {count} tickets so far...")
+                    )
+                    remaining = archiver.pending()
+                    progress.empty()
+                    st.success(
+                        f"📦 Archived {archived} tickets closed more than {archiver.older_than_days} days ago"
+                    )
+                    if remaining:
+                        st.info(f"⏳ {remaining} tickets still eligible; run again to continue")
+                except Error as e:
+                    st.error(f"Error archiving tickets: {e}")
+            
+            if st.button("🧱 Maintain Partitions", width='stretch'):
+                conn = get_db_connection()
+                if conn is None:
+                    st.error("❌ Cannot connect to database")
+                else:
+                    try:
+                        created = ensure_future_partitions(conn)
+                        dropped = drop_empty_partitions(conn, TicketArchiver().cutoff.date())
+                        st.success(
+                            f"🧱 Partitions created: {', '.join(created) or 'none'}; "
+                            f"emptied partitions dropped: {', '.join(dropped) or 'none'}"
+                        )
+                    except (Error, ValueError) as e:
+                        st.error(f"Error maintaining partitions: {e}")
+                    finally:
+                        conn.close()
             
             if st.button("🔍 System Health Check", width='stretch'):
                 with st.spinner("Running system diagnostics..."):